@@ -0,0 +1,49 @@
+"""
+Пакетная деконволюция без графического интерфейса.
+
+Запуск из корня проекта:
+    python batch.py data/Dy_parse_TGA.csv data/Ho_parse_TGA.csv --config batch.json --output results
+
+Для каждого столбца rate_* каждого файла строится DTG кривая, подбираются пики
+и сохраняются кривые компонент, таблицы gauss и сводка summary.csv.
+"""
+import argparse
+import logging
+import multiprocessing
+import sys
+
+from src.resources import prepare_process
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Пакетная деконволюция DTG кривых')
+    parser.add_argument('files', nargs='+', help='CSV файлы с данными')
+    parser.add_argument('--config', help='JSON или TOML конфигурация (таблицы gauss и options)')
+    parser.add_argument('--output', default='batch_results', help='папка для результатов')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='число процессов (по умолчанию - доступные ядра / blas-threads или cpu_workers из config)')
+    parser.add_argument('--blas-threads', type=int, default=None,
+                        help='потоков BLAS в каждом процессе (по умолчанию 1 или blas_threads из config)')
+    parser.add_argument('--affinity', default=None, help="ядра для расчета, например '0-7,16'")
+    parser.add_argument('--verbose', action='store_true', help='подробный лог процессов пула')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Привязка и потоки BLAS задаются до первого импорта numpy
+    prepare_process(args.affinity, args.blas_threads)
+    from src.batch import load_config, run_batch
+
+    config = load_config(args.config) if args.config else {}
+    summary = run_batch(args.files, config, args.output, workers=args.workers,
+                        log_level=logging.INFO if args.verbose else logging.WARNING,
+                        blas_threads=args.blas_threads, affinity=args.affinity)
+    print(summary.to_string(index=False, float_format=lambda value: f'{value:.5g}'))
+    return 0 if (summary['status'] == 'ok').all() else 1
+
+
+if __name__ == '__main__':
+    # Нужно и при запуске из замороженной сборки (см. main.py)
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Набор бенчмарков деконволюции без графического интерфейса.
+
+Запуск из корня проекта:
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json --threshold 0.2
+
+Результаты сохраняются в JSON. В режиме сравнения бенчмарки, медиана которых выросла
+больше чем на threshold относительно базового файла, помечаются как регрессии,
+а скрипт завершается с кодом 1.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+import scipy
+
+from src.math_operations import MathOperations
+from src.deconvolution import DeconvolutionProblem, smooth_derivative, initial_peaks_from_curve
+
+KERNEL_SIZES = [500, 5000, 50000]
+DATA_FILES = ['Dy_parse_TGA.csv', 'Ho_parse_TGA.csv', 'NH4_parse_TGA.csv']
+N_PEAKS = 3
+SEED = 42
+
+
+def measure(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'median_s': float(np.median(timings)), 'min_s': float(np.min(timings)), 'repeats': repeats}
+
+
+def bench_kernels(repeats):
+    results = {}
+    for size in KERNEL_SIZES:
+        x = np.linspace(30, 500, size)
+        y = MathOperations.gaussian(x, 1.0, 250.0, 20.0)
+        kernels = {
+            'gaussian': lambda: MathOperations.gaussian(x, 1.0, 250.0, 20.0),
+            'fraser_suzuki': lambda: MathOperations.fraser_suzuki(x, 1.0, 250.0, 20.0, -0.5),
+            'asymmetric_double_sigmoid': lambda: MathOperations.asymmetric_double_sigmoid(x, 1.0, 250.0, 20.0, 5.0, 5.0),
+            'peaks': lambda: MathOperations.peaks(
+                x, ('gauss', 'fraser', 'ads'), [0, -0.5, 0], [0, 0, 5.0], [0, 0, 5.0],
+                1.0, 150.0, 20.0, 1.0, 250.0, 20.0, 1.0, 350.0, 20.0),
+            'compute_derivative': lambda: MathOperations.compute_derivative(x, y),
+        }
+        for name, kernel in kernels.items():
+            results[f'kernel/{name}/{size}'] = measure(kernel, repeats)
+    return results
+
+
+def load_dtg(file_name, column='rate_3'):
+    df = pd.read_csv(ROOT / 'data' / file_name)
+    x_values = df['temperature'].to_numpy(dtype=float)
+    y_values = smooth_derivative(x_values, df[column].to_numpy(dtype=float))
+    return x_values, y_values
+
+
+def peaks_bounds_for(peaks_params):
+    lower, upper = [], []
+    for i in range(0, len(peaks_params), 3):
+        height, center, width = peaks_params[i:i + 3]
+        lower.extend([0.0, center - 2 * width, width * 0.2])
+        upper.extend([height * 3, center + 2 * width, width * 5])
+    return lower, upper
+
+
+def bench_inner_fits(repeats):
+    results = {}
+    for file_name in DATA_FILES:
+        x_values, y_values = load_dtg(file_name)
+        peaks_params = initial_peaks_from_curve(x_values, y_values, N_PEAKS)
+        bounds = peaks_bounds_for(peaks_params)
+        n_peaks = len(peaks_params) // 3
+        for peak_type in ['gauss', 'fraser', 'ads']:
+            combination = (peak_type,) * n_peaks
+
+            def fit():
+                MathOperations.fit_combination(
+                    x_values, y_values, combination, peaks_params, 1000, bounds,
+                    [-0.1] * n_peaks, [5.0] * n_peaks, [5.0] * n_peaks)
+
+            results[f'curve_fit/{Path(file_name).stem}/{peak_type}'] = measure(fit, repeats)
+    return results
+
+
+def bench_end_to_end():
+    x_values, y_values = load_dtg(DATA_FILES[0])
+    peaks_params = initial_peaks_from_curve(x_values, y_values, 2)
+    selected = {f'Reaction_{i + 1}': ['gauss', 'fraser'] for i in range(len(peaks_params) // 3)}
+    shape_bounds = [(-1.0, 0.5)] * len(selected)
+    options = {'optimizer': 'de', 'strategy': 'best2bin', 'popsize': 3, 'recombination': 0.9,
+               'mutation': 0.7, 'tol': 0.1, 'maxiter': 3}
+    problem = DeconvolutionProblem(x_values, y_values, peaks_params, peaks_bounds_for(peaks_params), selected, 1000)
+
+    start = time.perf_counter()
+    best = problem.solve(shape_bounds, options, seed=SEED)
+    elapsed = time.perf_counter() - start
+    return {'end_to_end/de': {'median_s': elapsed, 'min_s': elapsed, 'repeats': 1,
+                              'nfev': problem.nfev, 'rmse': float(best['rmse'])}}
+
+
+def compare(results, baseline_path, threshold):
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))['results']
+    regressions = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        ratio = current['median_s'] / baseline[name]['median_s']
+        status = 'РЕГРЕССИЯ' if ratio > 1 + threshold else 'ok'
+        print(f'{status:10} {name}: {baseline[name]["median_s"]:.6f} -> {current["median_s"]:.6f} с ({ratio:.2f}x)')
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки деконволюции')
+    parser.add_argument('--output', default='bench_results.json', help='файл для сохранения результатов')
+    parser.add_argument('--compare', help='базовый файл результатов для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2, help='допустимый относительный рост медианы')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--skip-e2e', action='store_true', help='не запускать сквозной прогон DE')
+    args = parser.parse_args()
+
+    results = {}
+    results.update(bench_kernels(args.repeats * 4))
+    results.update(bench_inner_fits(args.repeats))
+    if not args.skip_e2e:
+        results.update(bench_end_to_end())
+
+    payload = {
+        'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'scipy': scipy.__version__,
+                 'pandas': pd.__version__, 'machine': platform.machine(), 'seed': SEED,
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'Результаты сохранены в {args.output}')
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f'Найдено регрессий: {len(regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
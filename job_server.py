@@ -0,0 +1,145 @@
+"""
+Локальный сервер заданий деконволюции для нескольких пользователей одной машины.
+
+Запуск сервера из корня проекта (TCP на localhost или путь к сокету Unix):
+    python job_server.py serve --address localhost:6060 --workers 4
+
+Отправка файлов (каждый столбец rate_* - отдельное задание) и ожидание результатов:
+    python job_server.py submit data/Dy_parse_TGA.csv --config batch.json --output results --priority 1
+
+Состояние очереди, отмена задания и остановка сервера:
+    python job_server.py status
+    python job_server.py cancel 3
+    python job_server.py shutdown
+
+Ключ аутентификации обязателен. Он создается один раз и передается серверу и клиентам
+файлом (--authkey-file или DECONVOLUTION_JOB_KEY_FILE) либо переменной DECONVOLUTION_JOB_KEY:
+    python job_server.py keygen ~/.deconvolution_job_key
+"""
+import argparse
+import logging
+import multiprocessing
+import sys
+from pathlib import Path
+
+from src.resources import governor, prepare_process
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Сервер заданий деконволюции DTG кривых')
+    parser.add_argument('--address', default=None, help='host:port (по умолчанию localhost:6060) или путь к сокету Unix')
+    parser.add_argument('--authkey-file', default=None,
+                        help='файл ключа аутентификации (по умолчанию DECONVOLUTION_JOB_KEY_FILE '
+                             'или ключ из DECONVOLUTION_JOB_KEY)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='запустить сервер')
+    serve.add_argument('--workers', type=int, default=0, help='число процессов (по умолчанию - доступные ядра)')
+    serve.add_argument('--blas-threads', type=int, default=1, help='потоков BLAS в каждом процессе')
+    serve.add_argument('--affinity', default='', help="ядра для расчета, например '0-7,16'")
+    serve.add_argument('--socket-mode', type=lambda value: int(value, 8), default=None,
+                       help='права сокета Unix, например 660 для группы (по умолчанию 600)')
+    serve.add_argument('--verbose', action='store_true', help='подробный лог процессов пула')
+
+    keygen = commands.add_parser('keygen', help='создать файл со случайным ключом (права 600)')
+    keygen.add_argument('path', help='путь к файлу ключа')
+
+    submit = commands.add_parser('submit', help='отправить файлы и дождаться результатов')
+    submit.add_argument('files', nargs='+', help='CSV файлы с данными')
+    submit.add_argument('--config', help='JSON или TOML конфигурация (таблицы gauss и options)')
+    submit.add_argument('--output', default='batch_results', help='папка для результатов')
+    submit.add_argument('--priority', type=int, default=0, help='приоритет заданий')
+    submit.add_argument('--no-wait', action='store_true', help='только поставить задания в очередь')
+
+    status = commands.add_parser('status', help='состояние заданий')
+    status.add_argument('job_id', type=int, nargs='?', help='номер задания (по умолчанию все)')
+
+    cancel = commands.add_parser('cancel', help='отменить задание в очереди')
+    cancel.add_argument('job_id', type=int)
+
+    commands.add_parser('shutdown', help='остановить сервер')
+    return parser.parse_args(argv)
+
+
+def serve(args, authkey):
+    from src.job_server import JobServer, SOCKET_MODE
+
+    governor.configure(workers=args.workers, blas_threads=args.blas_threads, affinity=args.affinity)
+    server = JobServer(args.address, authkey, governor.pool_size(), args.blas_threads,
+                       logging.INFO if args.verbose else logging.WARNING,
+                       socket_mode=SOCKET_MODE if args.socket_mode is None else args.socket_mode)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.scheduler.shutdown(wait=False)
+    return 0
+
+
+def submit(args, client):
+    from src.batch import load_config, plan_jobs, export_results
+    from src.csv_viewer import load_csv_file
+    from src.resampling import temperature_column_for
+
+    config = load_config(args.config) if args.config else {}
+    job_ids = []
+    for job in plan_jobs(args.files, config):
+        df = load_csv_file(job['file'])
+        x_column = config.get('x_column') or temperature_column_for(job['column'], df.columns)
+        job_id = client.submit(df[x_column], df[job['column']], job['column'], config, x_column,
+                               file=Path(job['file']).name, priority=args.priority)
+        print(f"Задание {job_id}: {job['file']}:{job['column']}", flush=True)
+        job_ids.append(job_id)
+    if args.no_wait:
+        return 0
+
+    results = []
+    for job_id in job_ids:
+        for event in client.subscribe(job_id):
+            details = ', '.join(f'{key} {value}' for key, value in event.items() if key not in ('stage', 'time') and value is not None)
+            print(f"Задание {job_id}: {event['stage']} {details}", flush=True)
+        results.append(client.result(job_id)['result'])
+    summary = export_results([result for result in results if result is not None], args.output)
+    print(summary.to_string(index=False, float_format=lambda value: f'{value:.5g}'))
+    return 0 if (summary['status'] == 'ok').all() else 1
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'serve':
+        # Привязка и потоки BLAS сервера задаются до первого импорта numpy
+        prepare_process(args.affinity, args.blas_threads)
+    from src.job_server import JobClient, DEFAULT_ADDRESS, generate_authkey, get_authkey
+
+    args.address = args.address or DEFAULT_ADDRESS
+    if args.command == 'keygen':
+        print(f'Ключ записан в {generate_authkey(args.path)}')
+        return 0
+    try:
+        authkey = get_authkey(path=args.authkey_file)
+    except (ValueError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.command == 'serve':
+        return serve(args, authkey)
+    with JobClient(args.address, authkey) as client:
+        if args.command == 'submit':
+            return submit(args, client)
+        if args.command == 'status':
+            statuses = [client.status(args.job_id)] if args.job_id else client.jobs()
+            for status in statuses:
+                print(f"{status['id']:>4} {status['state']:<9} {status['user']:<12} приоритет {status['priority']:<3} "
+                      f"{status['column']:<12} очередь {status['position'] or '-'} {status['error'] or ''}")
+            print(client.stats())
+            return 0
+        if args.command == 'cancel':
+            cancelled = client.cancel(args.job_id)
+            print('Отменено' if cancelled else 'Задание уже запущено или завершено')
+            return 0 if cancelled else 1
+        client.shutdown()
+        return 0
+
+
+if __name__ == '__main__':
+    # Нужно и при запуске из замороженной сборки (см. main.py)
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,31 +1,45 @@
+import time
+STARTUP_STARTED = time.perf_counter()
 import sys
+import os
 from io import StringIO
 import logging
-from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+import multiprocessing
+from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow, QFileDialog
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from src.csv_viewer import CSVViewer
 from src.pandas_model import PandasModel
 from src.table_manager import TableManager
 from src.math_operations import MathOperations
 from src.ui import UIInitializer
 from src.event_handler import EventHandler
+from src.early_stopping import EarlyStopping
+from src.deconvolution import run_outer_optimizer, options_to_dict, DEFAULT_OPTIONS
+from src.instrumentation import instrumentation
+from src.resources import governor
+from src.project_file import save_project, load_project, PROJECT_FILTER
+from src.multi_rate import MultiRateDeconvolution
+from src.global_fit import GlobalFit
+from src.conversion import conversion_from_components, save_conversion, CONVERSION_FILTER
+from src.model_order import ModelOrderSearch
+from src.uncertainty import bootstrap_uncertainty, covariance_uncertainty, apply_uncertainty, UNCERTAINTY_COLUMNS
+from src.derivative_pipeline import rate_columns
+from src.resampling import temperature_column_for, TEMPERATURE_COLUMN
 import numpy as np
 import pandas as pd
-from scipy.optimize import differential_evolution
 import pathlib
-# Импортируем matplotlib и применяем стиль
-import matplotlib.pyplot as plt
-import scienceplots
-plt.style.use(['science', 'no-latex', 'nature', 'grid'])
+# matplotlib.pyplot, scienceplots и стиль графика загружаются при первом построении (src.startup)
+from src.startup import warm_up, startup_report
 
-from src.logger_config import logger
+from src.logger_config import logger, set_log_file
+IMPORTS_FINISHED = time.perf_counter()
 
 
 class ComputePeaksThread(QThread):
     progress_signal = pyqtSignal(float)
     finished_signal = pyqtSignal(object)
 
-    def __init__(self, event_handler, peaks_params, combinations, extracted_bounds, peaks_bounds, selected, options):
+    def __init__(self, event_handler, peaks_params, combinations, extracted_bounds, peaks_bounds, selected, options, y_values=None):
         super().__init__()        
         self.is_running = True
         self.event_handler = event_handler        
@@ -35,30 +49,58 @@ class ComputePeaksThread(QThread):
         self.peaks_bounds = peaks_bounds
         self.selected = selected
         self.options = options
+        self.early_stopping = EarlyStopping.from_options(options, y_values)
 
     def run(self):
+        instrumentation.reset()
+        governor.reset_usage()
+        if int(float(self.options['profile'].values.item())):
+            # Подборы ComputeCombinationTask в пуле потоков профилируются сами, статистика объединяется в конце
+            instrumentation.enable_profiling()
+        start = time.perf_counter()
+        try:
+            with instrumentation.profile():
+                self.optimize()
+        finally:
+            stats = instrumentation.collect_profile()
+            if stats:
+                self.dump_profile(stats)
+            summary = f'{instrumentation.summary(time.perf_counter() - start)}\n{governor.report()}'
+            logger.info(summary)
+            self.event_handler.data_handler.console_message_signal.emit(f'\n{summary}\n')
+
+    def dump_profile(self, stats):
+        # Статистика cProfile сохраняется рядом с логом текущего файла
+        bp = pathlib.Path().absolute() / 'logs_folder'
+        bp.mkdir(exist_ok=True, parents=True)
+        profile_path = bp / f'{self.event_handler.main_app.viewer.file_name}.prof'
+        stats.dump_stats(profile_path)
+        logger.info(f'Статистика профилирования сохранена: {profile_path}')
+
+    def optimize(self):
         def objective(coefficients):
             if not self.is_running:
                 raise Exception("Остановка оптимизации по требованию пользователя")
-            best_rmse = self.event_handler.data_handler.compute_peaks_button_pushed(
+            # Оптимизатор минимизирует метрику rank_by, правила ранней остановки заданы через RMSE
+            score, best_rmse = self.event_handler.data_handler.compute_peaks_button_pushed(
                 coefficients, self.selected, self.peaks_params, self.combinations, self.peaks_bounds)
-            return best_rmse
+            self.early_stopping.update(best_rmse)
+            return score
 
-        def callback(x):
+        def callback(x, convergence=None):
             if not self.is_running:
                 raise Exception("Остановка оптимизации по требованию пользователя")
+            reason = self.early_stopping.check(convergence)
+            if reason:
+                logger.info(f'Ранняя остановка оптимизации: {reason}')
+                self.event_handler.data_handler.console_message_signal.emit(
+                    f'\nРанняя остановка оптимизации: {reason}\n')
+                return True
+            return False
         
         try:
-            result = differential_evolution(
-                objective, 
-                self.extracted_bounds, 
-                strategy=self.options['strategy'].values.item(), 
-                popsize=int(self.options['popsize'].values.item()), 
-                recombination=float(self.options['recombination'].values.item()),
-                mutation=float(self.options['mutation'].values.item()), 
-                tol=float(self.options['tol'].values.item()), 
-                maxiter=int(self.options['maxiter'].values.item())
-            )
+            result = run_outer_optimizer(
+                objective, self.extracted_bounds, options_to_dict(self.options), callback=callback)
             if self.is_running:
                 self.finished_signal.emit(result)
         
@@ -70,19 +112,132 @@ class ComputePeaksThread(QThread):
 
     def stop(self):
         self.is_running = False
-        
+
+
+class MultiRateThread(QThread):
+    """
+    Подбор всех скоростей нагрева файла (MultiRateDeconvolution или GlobalFit).
+    """
+    rate_finished_signal = pyqtSignal(str, object)
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, event_handler, engine):
+        super().__init__()
+        self.is_running = True
+        self.event_handler = event_handler
+        self.engine = engine
+
+    def run(self):
+        def callback(x, convergence=None):
+            if not self.is_running:
+                raise Exception("Остановка оптимизации по требованию пользователя")
+            return False
+
+        instrumentation.reset()
+        governor.reset_usage()
+        start = time.perf_counter()
+        try:
+            results = self.engine.run(
+                progress=lambda column, result: self.rate_finished_signal.emit(column, result), callback=callback)
+            self.finished_signal.emit(results)
+        except Exception as e:
+            logger.warning(str(e))
+            self.event_handler.data_handler.console_message_signal.emit(
+                f'\nОшибка в функции оптимизации\n {e}')
+            self.finished_signal.emit(None)
+        finally:
+            logger.info(f'{instrumentation.summary(time.perf_counter() - start)}\n{governor.report()}')
+
+    def stop(self):
+        self.is_running = False
+
+
+class ModelOrderThread(QThread):
+    """
+    Поиск числа пиков (ModelOrderSearch) в фоновом потоке.
+    """
+    candidate_signal = pyqtSignal(object)
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, event_handler, search):
+        super().__init__()
+        self.is_running = True
+        self.event_handler = event_handler
+        self.search = search
+
+    def run(self):
+        governor.reset_usage()
+        try:
+            self.search.run(progress=self.candidate_signal.emit, callback=lambda _: not self.is_running)
+        except Exception as e:
+            logger.warning(str(e))
+            self.event_handler.data_handler.console_message_signal.emit(f'\nОшибка поиска числа пиков\n {e}')
+        logger.info(governor.report())
+        self.finished_signal.emit(self.search)
+
+    def stop(self):
+        self.is_running = False
+
+
+class BootstrapThread(QThread):
+    """
+    Остаточный бутстреп лучшего подбора в пуле процессов, чтобы не блокировать интерфейс.
+    """
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, best_fit, n_samples, workers, confidence):
+        super().__init__()
+        self.best_fit = best_fit
+        self.n_samples = n_samples
+        self.workers = workers
+        self.confidence = confidence
+
+    def run(self):
+        try:
+            rows = bootstrap_uncertainty(
+                n_samples=self.n_samples, workers=self.workers, confidence=self.confidence, **self.best_fit)
+        except Exception as e:
+            logger.exception(f'Ошибка бутстрепа: {e}')
+            rows = None
+        self.finished_signal.emit(rows)
+
+
+class ColumnStatsThread(QThread):
+    """
+    Сводка по загруженной таблице (df.info и диапазоны числовых столбцов) в фоновом потоке.
+    """
+    finished_signal = pyqtSignal(str)
+
+    def __init__(self, df):
+        super().__init__()
+        # Поверхностная копия: новые столбцы в исходной таблице не влияют на подсчет
+        self.df = df.copy(deep=False)
+
+    def run(self):
+        with instrumentation.timer('column_stats'):
+            buffer = StringIO()
+            self.df.info(buf=buffer)
+            lines = [buffer.getvalue()]
+            if self.isInterruptionRequested():
+                return
+            numeric = self.df.select_dtypes(include='number')
+            if not numeric.empty:
+                values = numeric.to_numpy(dtype=np.float64)
+                with np.errstate(all='ignore'):
+                    stats = zip(numeric.columns, np.nanmin(values, axis=0), np.nanmax(values, axis=0),
+                                np.nanmean(values, axis=0), np.isnan(values).sum(axis=0))
+                lines.append(f"{'column':<24}{'min':>14}{'max':>14}{'mean':>14}{'NaN':>8}")
+                for column, col_min, col_max, col_mean, nan_count in stats:
+                    lines.append(f'{str(column):<24}{col_min:>14.6g}{col_max:>14.6g}{col_mean:>14.6g}{nan_count:>8}')
+        self.finished_signal.emit('\n'.join(lines))
+
+
 class MainApp(QMainWindow):
     """Главное приложение."""
     functions_data = pd.DataFrame(columns=[
         'reaction', 'height', 'center', 'width', 'type', 'coeff_a'])
     
-    options_data = pd.DataFrame({
-        'maxfev': [1000], 'popsize': [5], 'maxiter': [5], 'recombination': [0.9], 'coeff_s2': [1], 'mutation':[0.7], 
-        'tol':[0.1], 'strategy':['best2bin'], 'rmse':[0.0], 'window_length':[11],'polyorder':[3], 'Savitzky_mode':['nearest'],
-        'coeff_a': [-0.01], 'coeff_s1': [1], 'coeff_s2': [1], 
-        'rmse':[1000], 'a_bottom_constraint':[-4], 'a_top_constraint':[-0.01], 
-        's1_bottom_constraint':[0], 's1_top_constraint':[10],
-        's2_bottom_constraint':[0], 's2_top_constraint':[10],})
+    options_data = pd.DataFrame({name: [value] for name, value in DEFAULT_OPTIONS.items()})
     
     table_dict = {
         'gauss':functions_data,'options':options_data}
@@ -103,30 +258,98 @@ class MainApp(QMainWindow):
         self.viewer.initialize(self.table_manager, self.ui_initializer) 
         
         self.event_handler = EventHandler(self)
-        self.table_manager.models['gauss'].data_changed_signal.connect(self.event_handler.graph_handler.rebuild_gaussians) 
+        self.table_manager.models['gauss'].data_changed_signal.connect(self.event_handler.graph_handler.schedule_rebuild) 
         self.event_handler.ui_handler.connect_signals()
         self.event_handler.update_console_signal.connect(self.ui_initializer.update_console)
         
         self.stop_optimization = False
+        self.optimizer_state = {}
+        self.column_stats_thread = None
+        # Потоки сводки прежних файлов хранятся до завершения, чтобы их не удалил сборщик мусора
+        self.stale_stats_threads = set()
+        self.bootstrap_thread = None
     
+    def on_window_shown(self):
+        # Вызывается из первой итерации цикла событий, когда окно уже показано
+        self.event_handler.data_handler.console_message_signal.emit(
+            f'{startup_report(STARTUP_STARTED, IMPORTS_FINISHED)}\n')
+        warm_up()
+
     def load_csv_table(self):
         self.viewer.get_csv()
-        self.table_dict.update({self.viewer.file_name: self.viewer.df})
+        if int(float(self.table_manager.data['options']['resample_uniform'].values.item())):
+            try:
+                self.viewer.df = self.event_handler.data_handler.resample_uniform(self.viewer.df)
+            except ValueError as e:
+                logger.warning(f'Передискретизация пропущена: {e}')
+                self.event_handler.data_handler.console_message_signal.emit(f'\nПередискретизация пропущена: {e}\n')
+        self.register_data_table(self.viewer.file_name, self.viewer.df)
+        # Сводка по столбцам считается в фоне, чтобы большой файл не блокировал интерфейс.
+        # Незавершенный поток прежнего файла не ожидается: он прерывается, а его результат отбрасывается
+        previous = self.column_stats_thread
+        if previous is not None and previous.isRunning():
+            previous.requestInterruption()
+            self.stale_stats_threads.add(previous)
+            previous.finished.connect(lambda thread=previous: self.stale_stats_threads.discard(thread))
+            if previous.isFinished():
+                self.stale_stats_threads.discard(previous)
+        thread = ColumnStatsThread(self.viewer.df)
+        thread.finished_signal.connect(lambda file_info, thread=thread: self.on_column_stats(thread, file_info))
+        self.column_stats_thread = thread
+        thread.start()
+        bp = pathlib.Path().absolute() / 'logs_folder'
+        bp.mkdir(exist_ok=True, parents=True)
+        set_log_file(bp / f'{self.viewer.file_name}.log')
+
+    def on_column_stats(self, thread, file_info):
+        # Сводка, посчитанная для уже замененного файла, не выводится
+        if thread is self.column_stats_thread:
+            self.event_handler.data_handler.console_message_signal.emit(f'Загружен CSV файл:\n {file_info}')
+
+    def register_data_table(self, file_name, df):
+        self.viewer.file_name = file_name
+        self.viewer.df = df
+        self.table_manager.component_store.clear(file_name)
+        self.event_handler.data_handler.derivative_pipeline.clear(file_name)
+        self.table_dict.update({file_name: df})
         # Удаление всех ключей со значением None
         self.table_dict = {k: v for k, v in self.table_dict.items() if k is not None} 
-        self.table_manager.update_table_data(self.viewer.file_name, self.viewer.df)
-        self.table_manager.fill_table(self.viewer.file_name)
+        self.table_manager.update_table_data(file_name, df)
+        self.table_manager.fill_table(file_name)
         box_list = [self.ui_initializer.combo_box_x, self.ui_initializer.combo_box_y]
-        self.table_manager.fill_combo_boxes(self.viewer.file_name, box_list, True)
-        # Сохранение информации DataFrame в строке
-        buffer = StringIO()
-        self.viewer.df.info(buf=buffer)
-        file_info = buffer.getvalue()
-        self.event_handler.data_handler.console_message_signal.emit(f'Загружен CSV файл:\n {file_info}')
-        bp = pathlib.Path().absolute() / 'logs_folder'
-        bp.mkdir(exist_ok=True, parents=True)
-        file_handler = logging.FileHandler(bp / f'{self.viewer.file_name}.log')
-        logger.addHandler(file_handler)
+        self.table_manager.fill_combo_boxes(file_name, box_list, True)
+
+    def save_project(self):
+        if not self.viewer.file_name:
+            self.event_handler.data_handler.console_message_signal.emit('\nНет загруженных данных для сохранения проекта\n')
+            return
+        file_path, _ = QFileDialog.getSaveFileName(None, 'Save project', os.getenv('HOME'), PROJECT_FILTER)
+        if not file_path:
+            return
+        state = dict(self.optimizer_state)
+        state.update({'x_column': self.ui_initializer.combo_box_x.currentText(),
+                      'y_column': self.ui_initializer.combo_box_y.currentText()})
+        save_project(
+            file_path, self.viewer.file_name, self.table_manager.materialize_table(self.viewer.file_name),
+            {'gauss': self.table_manager.data['gauss'], 'options': self.table_manager.data['options']}, state)
+        self.event_handler.data_handler.console_message_signal.emit(f'\nПроект сохранен: {file_path}\n')
+
+    def open_project(self):
+        file_path, _ = QFileDialog.getOpenFileName(None, 'Open project', os.getenv('HOME'), PROJECT_FILTER)
+        if not file_path:
+            return
+        project = load_project(file_path)
+        # Опции из старых проектов дополняются значениями по умолчанию
+        options = self.options_data.copy()
+        for column in project['tables']['options'].columns:
+            options[column] = project['tables']['options'][column].values
+        self.table_manager.update_table_data('options', options)
+        self.table_manager.update_table_data('gauss', project['tables']['gauss'])
+        self.optimizer_state = project['optimizer_state']
+        self.register_data_table(project['file_name'], project['data'])
+        self.ui_initializer.combo_box_x.setCurrentText(self.optimizer_state.get('x_column', ''))
+        self.ui_initializer.combo_box_y.setCurrentText(self.optimizer_state.get('y_column', ''))
+        self.event_handler.data_handler.console_message_signal.emit(f'\nОткрыт проект: {file_path}\n')
     
     def switch_to_interactive_mode(self, activated):
         if activated:
@@ -137,6 +360,20 @@ class MainApp(QMainWindow):
     def options_mode(self):        
         self.table_manager.fill_table_signal.emit('options')    
    
+    def configure_resources(self):
+        # Бюджет ядер задается в главном потоке: привязка к ядрам наследуется потоками и процессами расчета
+        try:
+            if not governor.configure_from_options(
+                    {**DEFAULT_OPTIONS, **options_to_dict(self.table_manager.data['options'])}):
+                self.event_handler.data_handler.console_message_signal.emit(
+                    '\nПредыдущий расчет еще занимает слоты, новые опции ресурсов применятся после него\n')
+        except (ValueError, OSError) as e:
+            logger.warning(f'Некорректные опции ресурсов: {e}')
+            self.event_handler.data_handler.console_message_signal.emit(
+                f'\nНекорректные опции cpu_workers, blas_threads или cpu_affinity: {e}\n')
+            return False
+        return True
+
     def compute_peaks(self):
         selected, combinations, coeffs_bounds, peaks_bounds_dict = self.event_handler.calculation_dialog_handler.fetch_peak_type_and_bounds()
         if not selected:
@@ -144,8 +381,14 @@ class MainApp(QMainWindow):
         extracted_bounds = self.event_handler.calculation_dialog_handler.extract_bounds_selected_combinations(selected, coeffs_bounds)
         peaks_bounds = self.event_handler.calculation_dialog_handler.extract_peaks_bounds(peaks_bounds_dict)        
         peaks_params = self.event_handler.data_handler.get_peaks_params()        
+        y_values = self.table_manager.data[self.viewer.file_name][self.ui_initializer.combo_box_y.currentText()].astype(float)
+        if not self.configure_resources():
+            return
+        self.event_handler.data_handler.best_score = np.inf
         
-        self.compute_peaks_thread = ComputePeaksThread(self.event_handler, peaks_params, combinations, extracted_bounds, peaks_bounds, selected, self.table_manager.data['options'])
+        self.compute_peaks_thread = ComputePeaksThread(
+            self.event_handler, peaks_params, combinations, extracted_bounds, peaks_bounds, selected, 
+            self.table_manager.data['options'], y_values)
 
         # Соединение сигналов с нужными слотами
         self.compute_peaks_thread.finished_signal.connect(self.on_peaks_computed)
@@ -157,12 +400,256 @@ class MainApp(QMainWindow):
     def on_peaks_computed(self, result):
         if result:
             best_coefficients = result.x            
+            self.optimizer_state = {
+                'x': np.asarray(result.x).tolist(), 'fun': float(result.fun), 
+                'nfev': int(result.nfev), 'message': str(result.message)}
             logger.info(f'Лучшие значения коэффициентов = {best_coefficients}')
             self.event_handler.data_handler.console_message_signal.emit(
                 f'Оптимизация завершена. Лучшие параметры:\n {best_coefficients}')
+            self.start_bootstrap()
         else:
             logger.warning('Ошибка при вычислении пиков')
 
+    def start_bootstrap(self):
+        # Бутстреп включается опцией bootstrap_samples и уточняет ошибки, найденные по ковариации
+        options = options_to_dict(self.table_manager.data['options'])
+        n_samples = int(float(options['bootstrap_samples']))
+        best_fit = self.event_handler.data_handler.best_fit
+        if n_samples <= 0 or best_fit is None:
+            return
+        if self.bootstrap_thread is not None and self.bootstrap_thread.isRunning():
+            self.event_handler.data_handler.console_message_signal.emit('\nБутстреп уже выполняется\n')
+            return
+        if not self.configure_resources():
+            return
+        self.event_handler.data_handler.console_message_signal.emit(f'\nБутстреп: {n_samples} выборок...\n')
+        self.bootstrap_thread = BootstrapThread(
+            best_fit, n_samples, int(float(options['bootstrap_workers'])) or None, float(options['confidence']))
+        self.bootstrap_thread.finished_signal.connect(self.on_bootstrap_computed)
+        self.bootstrap_thread.start()
+
+    def on_bootstrap_computed(self, rows):
+        if not rows:
+            self.event_handler.data_handler.console_message_signal.emit('\nБутстреп не удался: мало успешных выборок\n')
+            return
+        self.table_manager.update_table_data('gauss', apply_uncertainty(self.table_manager.data['gauss'], rows))
+        self.table_manager.fill_table('gauss')
+        self.event_handler.data_handler.console_message_signal.emit(
+            f"\nБутстреп завершен ({rows[0]['uncertainty']}), интервалы записаны в таблицу gauss\n")
+
+    def prepare_rate_curves(self):
+        """
+        Общая подготовка подбора всех скоростей нагрева: DTG кривые и один диалог типов пиков и границ.
+
+        Returns:
+            dict | None: reference, curves, selected, coeffs_bounds, peaks_bounds или None при отмене.
+        """
+        file_name = self.viewer.file_name
+        x_column = self.ui_initializer.combo_box_x.currentText()
+        reference = self.ui_initializer.combo_box_y.currentText()
+        if not file_name or self.table_manager.data['gauss'].empty:
+            self.event_handler.data_handler.console_message_signal.emit('\nНет данных или пиков для подбора\n')
+            return None
+        diff_columns = {f'{column}_diff': column for column in rate_columns(self.table_manager.data[file_name].columns)}
+        if reference not in diff_columns:
+            self.event_handler.data_handler.console_message_signal.emit(
+                f'\nВыберите по оси Y столбец производной скорости нагрева: {list(diff_columns)}\n')
+            return None
+        missing = [column for diff_column, column in diff_columns.items()
+                   if diff_column not in self.table_manager.column_names(file_name)]
+        if missing:
+            derivatives = self.event_handler.data_handler.compute_smoothed_derivatives(x_column, missing)
+            self.table_manager.add_columns(file_name, {f'{name}_diff': values for name, values in derivatives.items()})
+
+        selected, combinations, coeffs_bounds, peaks_bounds_dict = self.event_handler.calculation_dialog_handler.fetch_peak_type_and_bounds()
+        if not selected:
+            return None
+        columns = self.table_manager.data[file_name].columns
+        curves = {}
+        for diff_column, column in diff_columns.items():
+            own_x_column = temperature_column_for(column, columns)
+            curve_x_column = own_x_column if own_x_column != TEMPERATURE_COLUMN else x_column
+            curves[diff_column] = (self.table_manager.get_column_values(file_name, curve_x_column).to_numpy(dtype=float),
+                                   self.table_manager.get_column_values(file_name, diff_column).to_numpy(dtype=float))
+        return {
+            'reference': reference,
+            'curves': curves,
+            'selected': selected,
+            'coeffs_bounds': coeffs_bounds,
+            'peaks_bounds': self.event_handler.calculation_dialog_handler.extract_peaks_bounds(peaks_bounds_dict),
+        }
+
+    def compute_peaks_multi_rate(self):
+        # Все скорости нагрева файла подбираются с одними типами пиков и границами
+        prepared = self.prepare_rate_curves()
+        if prepared is None:
+            return
+        gauss = self.table_manager.data['gauss']
+        multi_rate = MultiRateDeconvolution(
+            prepared['curves'], prepared['reference'], self.event_handler.data_handler.get_peaks_params(),
+            prepared['peaks_bounds'], prepared['selected'],
+            self.event_handler.calculation_dialog_handler.extract_bounds_selected_combinations(
+                prepared['selected'], prepared['coeffs_bounds']),
+            self.table_manager.data['options'],
+            gauss['coeff_a'].astype(float).tolist(), gauss['coeff_s1'].astype(float).tolist(),
+            gauss['coeff_s2'].astype(float).tolist())
+        self.start_rate_thread(multi_rate)
+
+    def compute_peaks_global(self):
+        # Совместный подбор: общие типы пиков и коэффициенты формы для всех скоростей нагрева
+        prepared = self.prepare_rate_curves()
+        if prepared is None:
+            return
+        gauss = self.table_manager.data['gauss']
+        global_fit = GlobalFit(
+            prepared['curves'], prepared['reference'], self.event_handler.data_handler.get_peaks_params(),
+            prepared['peaks_bounds'], prepared['selected'], prepared['coeffs_bounds'],
+            gauss['coeff_a'].astype(float).tolist(), gauss['coeff_s1'].astype(float).tolist(),
+            gauss['coeff_s2'].astype(float).tolist(),
+            max_nfev=int(float(self.table_manager.data['options']['maxfev'].values.item())))
+        self.start_rate_thread(global_fit)
+
+    def start_rate_thread(self, engine):
+        if not self.configure_resources():
+            return
+        self.compute_peaks_thread = MultiRateThread(self.event_handler, engine)
+        self.compute_peaks_thread.rate_finished_signal.connect(self.on_rate_computed)
+        self.compute_peaks_thread.finished_signal.connect(self.on_multi_rate_computed)
+        self.compute_peaks_thread.start()
+
+    def on_rate_computed(self, column, result):
+        # Результат каждой скорости попадает в собственную таблицу gauss_<столбец>
+        gauss = self.table_manager.data['gauss'].reset_index(drop=True)
+        gauss = gauss.drop(columns=[column for column in UNCERTAINTY_COLUMNS if column in gauss.columns])
+        x_values = self.compute_peaks_thread.engine.curves[column][0]
+        if result.get('pcov') is not None:
+            gauss = apply_uncertainty(gauss, covariance_uncertainty(
+                x_values, result['combination'], result['popt'], result['pcov'], result['coeff_a'], result['s1'],
+                result['s2'], float(self.table_manager.data['options']['confidence'].values.item())))
+        for i, peak_type in enumerate(result['combination']):
+            gauss.loc[i, ['height', 'center', 'width']] = result['popt'][3 * i:3 * i + 3]
+            gauss.loc[i, ['type', 'coeff_a', 'coeff_s1', 'coeff_s2']] = [
+                peak_type, result['coeff_a'][i], result['s1'][i], result['s2'][i]]
+        self.table_manager.update_table_data(f'gauss_{column}', gauss)
+        self.table_manager.add_reaction_cumulative_func(
+            result['popt'], tuple(result['combination']), x_values, column, np.zeros(len(x_values)),
+            result['coeff_a'], result['s1'], result['s2'])
+        self.event_handler.data_handler.console_message_signal.emit(
+            f"\n{column}: RMSE {result['rmse']:.5f}, комбинация {result['combination']}, "
+            f"сдвиг пиков {result['shift']:.2f}, таблица gauss_{column}\n")
+
+    def on_multi_rate_computed(self, results):
+        if results:
+            self.optimizer_state = {
+                'multi_rate': {column: {'rmse': float(result['rmse']), 'shift': result['shift'],
+                                        'combination': list(result['combination'])}
+                               for column, result in results.items()}}
+            self.event_handler.data_handler.console_message_signal.emit(
+                f'Подбор всех скоростей нагрева завершен: {len(results)} кривых')
+            self.show_rate_table()
+        else:
+            logger.warning('Ошибка при вычислении пиков')
+
+    def compute_model_order(self):
+        # Модели с разным числом пиков для выбранной кривой, начиная с текущей таблицы gauss
+        file_name = self.viewer.file_name
+        if not file_name:
+            self.event_handler.data_handler.console_message_signal.emit('\nНет данных для подбора\n')
+            return
+        options = options_to_dict(self.table_manager.data['options'])
+        x_column = self.ui_initializer.combo_box_x.currentText()
+        y_column = self.ui_initializer.combo_box_y.currentText()
+        search = ModelOrderSearch(
+            self.table_manager.get_column_values(file_name, x_column).to_numpy(dtype=float),
+            self.table_manager.get_column_values(file_name, y_column).to_numpy(dtype=float),
+            self.table_manager.data['gauss'].to_dict('records'),
+            int(float(options['order_min'])), int(float(options['order_max'])),
+            [peak_type.strip() for peak_type in str(options['order_peak_types']).split(',') if peak_type.strip()],
+            int(float(options['maxfev'])), float(options['coeff_a']), float(options['coeff_s1']),
+            float(options['coeff_s2']), str(options['order_criterion']), float(options['order_delta']))
+        if not self.configure_resources():
+            return
+        self.compute_peaks_thread = ModelOrderThread(self.event_handler, search)
+        self.compute_peaks_thread.candidate_signal.connect(self.on_order_candidate)
+        self.compute_peaks_thread.finished_signal.connect(self.on_model_order_computed)
+        self.compute_peaks_thread.start()
+
+    def on_order_candidate(self, candidate):
+        # Каждая модель попадает в собственную таблицу gauss_order_<N>
+        rows = [{'reaction': f'Reaction_{i + 1}', 'height': h, 'center': z, 'width': w, 'type': peak_type,
+                 'coeff_a': candidate['coeff_a'][i], 'coeff_s1': candidate['s1'][i], 'coeff_s2': candidate['s2'][i]}
+                for i, (peak_type, (h, z, w)) in enumerate(
+                    zip(candidate['combination'], np.reshape(candidate['popt'], (-1, 3))))]
+        self.table_manager.update_table_data(f"gauss_order_{candidate['n_peaks']}", pd.DataFrame(rows))
+        self.event_handler.data_handler.console_message_signal.emit(
+            f"\n{candidate['n_peaks']} пиков: RMSE {candidate['rmse']:.5f}, AIC {candidate['aic']:.1f}, "
+            f"BIC {candidate['bic']:.1f}, {candidate['seconds']:.2f} с\n")
+
+    def on_model_order_computed(self, search):
+        if search.best is None:
+            logger.warning('Ошибка при поиске числа пиков')
+            return
+        lines = [f"{'N':>3}{'RMSE':>12}{'AIC':>12}{'BIC':>12}{'время, с':>10}"]
+        for candidate in search.candidates:
+            mark = ' <-' if candidate is search.best else ''
+            lines.append(f"{candidate['n_peaks']:>3}{candidate['rmse']:>12.5f}{candidate['aic']:>12.1f}"
+                         f"{candidate['bic']:>12.1f}{candidate['seconds']:>10.2f}{mark}")
+        table_name = f"gauss_order_{search.best['n_peaks']}"
+        self.optimizer_state = {'model_order': {
+            'criterion': search.criterion, 'best': search.best['n_peaks'],
+            'candidates': [{key: candidate[key] for key in ('n_peaks', 'rmse', 'aic', 'bic', 'seconds')}
+                           for candidate in search.candidates]}}
+        self.table_manager.fill_table(table_name)
+        self.event_handler.data_handler.console_message_signal.emit(
+            '\n' + '\n'.join(lines) + f"\nПредлагается {search.best['n_peaks']} пиков по {search.criterion.upper()}: "
+            f"таблица {table_name}. Apply order переносит показанную таблицу gauss_order_* в gauss\n")
+
+    def apply_model_order(self):
+        table_name = self.table_manager.current_table_name
+        if not str(table_name).startswith('gauss_order_'):
+            best = self.optimizer_state.get('model_order', {}).get('best')
+            table_name = f'gauss_order_{best}'
+        if table_name not in self.table_manager.table_names:
+            self.event_handler.data_handler.console_message_signal.emit('\nСначала выполните Model order\n')
+            return
+        self.table_manager.update_table_data('gauss', self.table_manager.data[table_name].copy())
+        # Прежнее лучшее RMSE относилось к другой модели
+        options = self.table_manager.data['options'].copy()
+        options['rmse'] = DEFAULT_OPTIONS['rmse']
+        self.table_manager.update_table_data('options', options)
+        self.table_manager.fill_table('gauss')
+        self.event_handler.graph_handler.rebuild_gaussians_signal.emit()
+        self.event_handler.data_handler.console_message_signal.emit(f'\nТаблица {table_name} перенесена в gauss\n')
+
+    def export_conversion(self):
+        # α(T), dα/dT и температуры уровней превращения для всех подобранных кривых файла
+        file_name = self.viewer.file_name
+        component_sets = self.table_manager.component_store.components.get(file_name, {})
+        if not component_sets:
+            self.event_handler.data_handler.console_message_signal.emit('\nНет подобранных реакций для экспорта\n')
+            return
+        columns = self.table_manager.data[file_name].columns
+        x_column = self.ui_initializer.combo_box_x.currentText()
+        x_values_by_column = {}
+        for y_column in component_sets:
+            own_x_column = temperature_column_for(y_column.removesuffix('_diff'), columns)
+            curve_x_column = own_x_column if own_x_column != TEMPERATURE_COLUMN else x_column
+            x_values_by_column[y_column] = self.table_manager.get_column_values(file_name, curve_x_column).to_numpy(dtype=float)
+        file_path, _ = QFileDialog.getSaveFileName(None, 'Save conversion', os.getenv('HOME'), CONVERSION_FILTER)
+        if not file_path:
+            return
+        arrays = conversion_from_components(component_sets, x_values_by_column)
+        save_conversion(file_path, arrays)
+        levels = ', '.join(f'{level:g}' for level in arrays['alpha_levels'][[0, len(arrays['alpha_levels']) // 2, -1]])
+        self.event_handler.data_handler.console_message_signal.emit(
+            f"\nКривые превращения ({arrays['alpha'].shape[0]} реакций) сохранены: {file_path}\n"
+            f"Температуры при α = {levels} - массив T_at_alpha\n")
+
+    def show_rate_table(self):
+        # Таблица gauss выбранной по оси Y скорости нагрева, если она уже подобрана
+        table_name = f'gauss_{self.ui_initializer.combo_box_y.currentText()}'
+        self.table_manager.fill_table(table_name if table_name in self.table_manager.table_names else 'gauss')
+
     def on_progress_update(self, progress):
         # Здесь можно обновить индикатор прогресса или другие элементы UI
         pass
@@ -176,6 +663,25 @@ class MainApp(QMainWindow):
         x_column_name = self.ui_initializer.combo_box_x.currentText() 
         y_column_name = self.ui_initializer.combo_box_y.currentText()     
         self.event_handler.data_handler.add_diff_button_pushed(x_column_name, y_column_name)
+
+    def resample_data(self):
+        # Производные и подобранные кривые строились на старой сетке, поэтому таблица заменяется целиком
+        file_name = self.viewer.file_name
+        if not file_name:
+            return
+        try:
+            resampled = self.event_handler.data_handler.resample_uniform(self.table_manager.data[file_name])
+        except ValueError as e:
+            logger.warning(f'Передискретизация не выполнена: {e}')
+            self.event_handler.data_handler.console_message_signal.emit(f'\nПередискретизация не выполнена: {e}\n')
+            return
+        self.register_data_table(file_name, resampled.copy())
+        self.event_handler.data_handler.console_message_signal.emit(
+            f'\nДанные {file_name} передискретизированы: {resampled.shape[0]} точек\n')
+
+    def add_diff_all(self):
+        x_column_name = self.ui_initializer.combo_box_x.currentText() 
+        self.event_handler.data_handler.add_diff_all_button_pushed(x_column_name)
         
     def plot_graph(self):
         self.event_handler.graph_handler.plot_graph_signal.emit()
@@ -185,7 +691,10 @@ class MainApp(QMainWindow):
     
 
 if __name__ == '__main__':
+    # В сборке PyInstaller процессы пула запускают этот же exe, freeze_support передает им управление
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     ex = MainApp()
     ex.show()
+    QTimer.singleShot(0, ex.on_window_shown)
     sys.exit(app.exec_())
@@ -0,0 +1,370 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import count
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.csv_viewer import load_csv_file, detect_encoding
+from src.deconvolution import (
+    DEFAULT_OPTIONS, DeconvolutionProblem, extract_shape_bounds, smooth_derivative, initial_peaks_from_curve)
+from src.derivative_pipeline import rate_columns
+from src.math_operations import MathOperations
+from src.conversion import conversion_arrays, save_conversion
+from src.metrics import residual_metrics, combination_params
+from src.resampling import temperature_column_for, TEMPERATURE_COLUMN
+from src.uncertainty import covariance_uncertainty, bootstrap_uncertainty
+from src.resources import governor
+from src.logger_config import logger
+
+PEAK_PARAMS = ['height', 'center', 'width']
+# Столбец таблицы gauss, от которого считаются границы коэффициента формы
+CONSTRAINT_TO_COLUMN = {
+    'a_bottom_constraint': 'coeff_a', 'a_top_constraint': 'coeff_a',
+    's1_bottom_constraint': 'coeff_s1', 's1_top_constraint': 'coeff_s1',
+    's2_bottom_constraint': 'coeff_s2', 's2_top_constraint': 'coeff_s2',
+}
+SUMMARY_COLUMNS = ['file', 'column', 'status', 'n_peaks', 'combination', 'rmse', 'r2', 'aic', 'bic', 'nfev',
+                   'derivative_s', 'fit_s', 'total_s']
+
+
+def load_config(path):
+    """
+    Читает конфигурацию пакетной обработки из JSON или TOML.
+
+    Ключи конфигурации:
+        options (dict): значения таблицы options, заменяющие значения по умолчанию.
+        gauss (list | dict): строки таблицы gauss (reaction, height, center, width, type,
+            coeff_a, coeff_s1, coeff_s2) и дополнительно peak_types, bounds, coeffs_bounds;
+            словарь задает отдельные строки для столбцов rate_* (ключ default - для остальных).
+        n_peaks (int): число пиков, если gauss не задан (пики ищутся по кривой).
+        peak_types (list): типы пиков по умолчанию для перебора комбинаций.
+        columns (list): обрабатываемые столбцы, по умолчанию все rate_*.
+        seed (int): зерно внешнего оптимизатора.
+
+    Args:
+        path (str | Path): путь к файлу конфигурации.
+
+    Returns:
+        dict: конфигурация.
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def bounds_around(value, bottom):
+    # Те же границы по умолчанию, что и в диалоге Compute peaks: +-20% от значения
+    if value < 0:
+        return value * 1.2 if bottom else value * 0.8
+    return value * 0.8 if bottom else value * 1.2
+
+
+def gauss_rows(config, column, x_values, y_values, options):
+    """
+    Строки таблицы gauss для столбца: из конфигурации или по найденным на кривой пикам.
+    """
+    gauss = config.get('gauss')
+    if isinstance(gauss, dict):
+        gauss = gauss.get(column, gauss.get('default'))
+    if gauss:
+        return [dict(row) for row in gauss]
+
+    params = initial_peaks_from_curve(x_values, y_values, int(config.get('n_peaks', 1)))
+    return [{'reaction': f'Reaction_{i + 1}', 'height': params[3 * i], 'center': params[3 * i + 1],
+             'width': params[3 * i + 2], 'type': 'fraser', 'coeff_a': float(options['coeff_a']),
+             'coeff_s1': float(options['coeff_s1']), 'coeff_s2': float(options['coeff_s2'])}
+            for i in range(len(params) // 3)]
+
+
+def problem_inputs(rows, peak_types):
+    """
+    Переводит строки gauss в аргументы DeconvolutionProblem так же, как диалог Compute peaks.
+
+    Returns:
+        dict: peaks_params, peaks_bounds, selected, coeffs_bounds, coeff_a, s1, s2.
+    """
+    peaks_params, lower, upper = [], [], []
+    selected, coeffs_bounds = {}, {}
+    for row in rows:
+        reaction = row['reaction']
+        row.setdefault('coeff_a', DEFAULT_OPTIONS['coeff_a'])
+        row.setdefault('coeff_s1', DEFAULT_OPTIONS['coeff_s1'])
+        row.setdefault('coeff_s2', DEFAULT_OPTIONS['coeff_s2'])
+        bounds = row.get('bounds', {})
+        for param in PEAK_PARAMS:
+            value = float(row[param])
+            peaks_params.append(value)
+            low, high = bounds.get(param, (bounds_around(value, True), bounds_around(value, False)))
+            lower.append(float(low))
+            upper.append(float(high))
+        selected[reaction] = list(row.get('peak_types', peak_types))
+        coeffs_bounds[reaction] = {}
+        for peak_type in ('gauss', 'fraser', 'ads'):
+            given = row.get('coeffs_bounds', {}).get(peak_type, {})
+            coeffs_bounds[reaction][peak_type] = {
+                constraint: float(given.get(constraint, bounds_around(float(row[column]), 'bottom' in constraint)))
+                for constraint, column in CONSTRAINT_TO_COLUMN.items()}
+    return {
+        'peaks_params': peaks_params,
+        'peaks_bounds': (lower, upper),
+        'selected': selected,
+        'coeffs_bounds': coeffs_bounds,
+        'coeff_a': [float(row['coeff_a']) for row in rows],
+        's1': [float(row['coeff_s1']) for row in rows],
+        's2': [float(row['coeff_s2']) for row in rows],
+    }
+
+
+def deconvolve_curve(x_values, y_values, column, config, x_column=TEMPERATURE_COLUMN, progress=None):
+    """
+    Деконволюция одной кривой: производная -> подбор пиков -> кривые компонент.
+
+    Общая часть пакетной обработки и сервера заданий, принимает массивы, а не файл.
+
+    Args:
+        x_values (array_like): температура.
+        y_values (array_like): исходная кривая (столбец rate_*), DTG строится по ней.
+        column (str): имя столбца, от которого образуются имена кривых.
+        config (dict): конфигурация (см. load_config).
+        x_column (str): имя столбца x в кривых.
+        progress (callable, optional): progress(event) - словарь со стадией (derivative, fit,
+            uncertainty), а на стадии fit и номером итерации, лучшим RMSE и числом вычислений.
+
+    Returns:
+        dict: строка сводной таблицы (summary), таблица gauss (gauss) и кривые (curves).
+    """
+    start = time.perf_counter()
+    summary = {'column': column, 'status': 'ok'}
+    report = progress or (lambda event: None)
+    try:
+        options = {**DEFAULT_OPTIONS, **config.get('options', {})}
+        x_values = np.asarray(x_values, dtype=np.float64)
+
+        report({'stage': 'derivative'})
+        derivative_start = time.perf_counter()
+        dtg = smooth_derivative(x_values, np.asarray(y_values, dtype=np.float64), int(options['window_length']),
+                                int(options['polyorder']), str(options['Savitzky_mode']))
+        summary['derivative_s'] = time.perf_counter() - derivative_start
+
+        fit_start = time.perf_counter()
+        rows = gauss_rows(config, column, x_values, dtg, options)
+        inputs = problem_inputs(rows, config.get('peak_types', ['gauss', 'fraser']))
+        problem = DeconvolutionProblem(
+            x_values, dtg, inputs['peaks_params'], inputs['peaks_bounds'], inputs['selected'],
+            int(options['maxfev']), inputs['coeff_a'], inputs['s1'], inputs['s2'])
+        iterations = count(1)
+
+        def callback(x, convergence=None):
+            report({'stage': 'fit', 'iteration': next(iterations), 'nfev': problem.nfev,
+                    'rmse': problem.best['rmse'] if problem.best else None})
+            return False
+
+        best = problem.solve(extract_shape_bounds(inputs['selected'], inputs['coeffs_bounds']), options,
+                             callback=callback, seed=config.get('seed'))
+        summary['fit_s'] = time.perf_counter() - fit_start
+        if best is None:
+            raise RuntimeError('ни одна комбинация пиков не подобрана')
+
+        report({'stage': 'uncertainty', 'rmse': best['rmse']})
+        diff_column = f'{column}_diff'
+        curves = {x_column: x_values, diff_column: dtg}
+        gauss = []
+        for i, (row, peak_type) in enumerate(zip(rows, best['combination'])):
+            h, z, w = best['popt'][3 * i:3 * i + 3]
+            curves[f'{diff_column}_reaction_{i}'] = MathOperations.peak_component(
+                x_values, peak_type, h, z, w, best['coeff_a'][i], best['s1'][i], best['s2'][i])
+            gauss.append({'reaction': row['reaction'], 'height': h, 'center': z, 'width': w, 'type': peak_type,
+                          'coeff_a': best['coeff_a'][i], 'coeff_s1': best['s1'][i], 'coeff_s2': best['s2'][i]})
+        uncertainty = covariance_uncertainty(
+            x_values, best['combination'], best['popt'], best['pcov'], best['coeff_a'], best['s1'], best['s2'],
+            float(options['confidence']))
+        if int(options['bootstrap_samples']) > 0:
+            # Задание уже выполняется в процессе пула, поэтому бутстреп идет в этом же процессе
+            uncertainty = bootstrap_uncertainty(
+                x_values, dtg, best['combination'], best['popt'], inputs['peaks_bounds'], best['coeff_a'],
+                best['s1'], best['s2'], int(options['maxfev']), int(options['bootstrap_samples']), workers=1,
+                confidence=float(options['confidence']), seed=config.get('seed')) or uncertainty
+        for row, row_uncertainty in zip(gauss, uncertainty):
+            row.update(row_uncertainty)
+        cumulative = np.sum([curves[f'{diff_column}_reaction_{i}'] for i in range(len(gauss))], axis=0)
+        curves[f'{diff_column}_cumulative'] = cumulative
+
+        metrics = residual_metrics(dtg - cumulative, dtg, combination_params(best['combination']))
+        summary.update({
+            'n_peaks': len(gauss),
+            'combination': '+'.join(best['combination']),
+            'rmse': float(best['rmse']),
+            'r2': float(metrics['r2'][0]),
+            'aic': float(metrics['aic'][0]),
+            'bic': float(metrics['bic'][0]),
+            'nfev': problem.nfev,
+        })
+        result = {'summary': summary, 'gauss': gauss, 'curves': curves, 'x_column': x_column}
+    except Exception as e:
+        logger.error(f'Ошибка обработки {column}: {e}')
+        summary['status'] = f'error: {e}'
+        result = {'summary': summary, 'gauss': [], 'curves': {}, 'x_column': None}
+    summary['total_s'] = time.perf_counter() - start
+    return result
+
+
+@lru_cache(maxsize=2)
+def _read_file(file_path, size, mtime_ns):
+    # Ключ включает размер и время изменения: файл, измененный во время обработки, читается заново
+    return load_csv_file(file_path)
+
+
+def read_file(file_path):
+    """
+    Данные файла для задания. Столбцы одного файла идут в очереди подряд, поэтому процесс пула
+    читает файл один раз, а не для каждого столбца.
+    """
+    stat = os.stat(file_path)
+    return _read_file(str(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+def run_job(job):
+    """
+    Деконволюция одного столбца rate_* файла (deconvolve_curve).
+
+    Выполняется в процессе пула, поэтому принимает и возвращает только простые объекты.
+
+    Args:
+        job (dict): file, column, config.
+
+    Returns:
+        dict: строка сводной таблицы (summary), таблица gauss (gauss) и кривые (curves).
+    """
+    start = time.perf_counter()
+    file_path, column, config = job['file'], job['column'], job['config']
+    try:
+        df = read_file(file_path)
+        x_column = config.get('x_column') or temperature_column_for(column, df.columns)
+        # Копии: таблица файла общая для всех столбцов, которые обрабатывает процесс
+        result = deconvolve_curve(df[x_column].to_numpy(dtype=np.float64, copy=True),
+                                  df[column].to_numpy(dtype=np.float64, copy=True),
+                                  column, config, x_column)
+    except Exception as e:
+        logger.error(f'Ошибка чтения {file_path}:{column}: {e}')
+        result = {'summary': {'column': column, 'status': f'error: {e}'}, 'gauss': [], 'curves': {}, 'x_column': None}
+    result['summary'] = {'file': Path(file_path).name, **result['summary'], 'total_s': time.perf_counter() - start}
+    return result
+
+
+def plan_jobs(files, config):
+    """
+    Список заданий: каждый файл x каждый столбец rate_* (или столбцы из config['columns']).
+    """
+    jobs = []
+    for file_path in files:
+        header = pd.read_csv(file_path, nrows=0, encoding=detect_encoding(file_path)).columns
+        columns = config.get('columns') or rate_columns(header)
+        jobs.extend({'file': str(file_path), 'column': column, 'config': config}
+                    for column in columns if column in header)
+    return jobs
+
+
+def init_worker(log_level, blas_threads):
+    logger.setLevel(log_level)
+    # Процесс пула подбирает по одной комбинации за раз: параллельность дают сами процессы
+    governor.configure(workers=1, blas_threads=blas_threads)
+
+
+def export_results(results, output_dir):
+    """
+    Сохраняет кривые (один CSV на входной файл), кривые превращения (один npz на файл),
+    таблицы gauss (на каждый столбец) и сводку.
+
+    Returns:
+        DataFrame: сводная таблица.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    by_file = {}
+    for result in results:
+        by_file.setdefault(result['summary']['file'], []).append(result)
+
+    for file_name, file_results in by_file.items():
+        stem = Path(file_name).stem
+        curves = {}
+        for result in sorted(file_results, key=lambda r: r['summary']['column']):
+            curves.update(result['curves'])
+            if result['gauss']:
+                pd.DataFrame(result['gauss']).to_csv(
+                    output_dir / f"{stem}_{result['summary']['column']}_gauss.csv", index=False, encoding='utf-8')
+        if curves:
+            pd.DataFrame(curves).to_csv(output_dir / f'{stem}_deconvoluted.csv', index=False, encoding='utf-8')
+            export_conversion(file_results, output_dir / f'{stem}_conversion.npz')
+
+    summary = pd.DataFrame([result['summary'] for result in results]).reindex(columns=SUMMARY_COLUMNS)
+    summary = summary.sort_values(['file', 'column'], ignore_index=True)
+    summary.to_csv(output_dir / 'summary.csv', index=False, encoding='utf-8')
+    return summary
+
+
+def export_conversion(file_results, path):
+    # Все реакции всех скоростей нагрева файла одним набором массивов
+    x_rows, reaction_rows, columns, reactions = [], [], [], []
+    for result in file_results:
+        diff_column = f"{result['summary']['column']}_diff"
+        for i in range(len(result['gauss'])):
+            x_rows.append(result['curves'][result['x_column']])
+            reaction_rows.append(result['curves'][f'{diff_column}_reaction_{i}'])
+            columns.append(diff_column)
+            reactions.append(i)
+    if reaction_rows:
+        save_conversion(path, conversion_arrays(np.vstack(x_rows), np.vstack(reaction_rows), columns, reactions))
+
+
+def run_batch(files, config, output_dir, workers=None, log_level=logging.WARNING, blas_threads=None, affinity=None):
+    """
+    Обрабатывает все файлы и столбцы в пуле процессов и записывает результаты.
+
+    Бюджет ресурсов берется из опций cpu_workers, blas_threads, cpu_affinity конфигурации,
+    аргументы функции их заменяют.
+
+    Args:
+        files (list): пути к CSV файлам.
+        config (dict): конфигурация (см. load_config).
+        output_dir (str | Path): папка для результатов.
+        workers (int, optional): число процессов, по умолчанию доступные ядра / blas_threads.
+        log_level (int): уровень логирования в процессах пула.
+        blas_threads (int, optional): потоков BLAS в каждом процессе.
+        affinity (str, optional): ядра для процессов пула ('0-7,16').
+
+    Returns:
+        DataFrame: сводная таблица.
+    """
+    options = {**DEFAULT_OPTIONS, **config.get('options', {})}
+    blas_threads = int(options['blas_threads']) if blas_threads is None else blas_threads
+    # Привязка и переменные BLAS задаются до запуска пула и наследуются его процессами
+    governor.configure(workers=int(options['cpu_workers']) if workers is None else workers, blas_threads=blas_threads,
+                       affinity=options['cpu_affinity'] if affinity is None else affinity)
+    governor.reset_usage()
+    jobs = plan_jobs(files, config)
+    workers = governor.pool_size(len(jobs))
+    logger.info(f'Пакетная обработка: {len(files)} файлов, {len(jobs)} столбцов, {workers} процессов')
+    results = []
+    # spawn: каждый процесс запускает собственный слушатель очереди логов
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker, initargs=(log_level, blas_threads)) as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            summary = result['summary']
+            logger.info(f"{summary['file']}:{summary['column']} - {summary['status']}, "
+                        f"RMSE: {summary.get('rmse')}, {summary['total_s']:.1f} с")
+            results.append(result)
+    logger.info(governor.report(children=True))
+    return export_results(results, output_dir)
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from src.math_operations import MathOperations
+from src.logger_config import logger
+
+
+class ComponentSet:
+    """
+    Подобранные компоненты одной целевой кривой.
+
+    Attributes:
+        y_column (str): имя аппроксимируемого столбца.
+        reactions (np.ndarray): непрерывный массив (n_reactions, n_points) кривых реакций.
+        cumulative (np.ndarray): суммарная кривая (n_points,).
+    """
+
+    def __init__(self, y_column, n_reactions, n_points):
+        self.y_column = y_column
+        self.reactions = np.zeros((n_reactions, n_points), dtype=np.float64)
+        self.cumulative = np.zeros(n_points, dtype=np.float64)
+
+    def column_names(self):
+        names = [f'{self.y_column}_reaction_{i}' for i in range(self.reactions.shape[0])]
+        names.append(f'{self.y_column}_cumulative')
+        return names
+
+    def columns(self):
+        columns = dict(zip(self.column_names()[:-1], self.reactions))
+        columns[f'{self.y_column}_cumulative'] = self.cumulative
+        return columns
+
+
+class ComponentStore:
+    """
+    Хранилище подобранных кривых реакций вне DataFrame эксперимента.
+
+    Для каждой целевой кривой кривые реакций лежат в одном непрерывном массиве, который
+    перезаписывается на месте при каждом улучшении. Таблица и график видят их как
+    виртуальные столбцы, настоящие столбцы DataFrame создаются только при экспорте.
+    """
+
+    def __init__(self):
+        self.components = {}  # file_name -> {y_column: ComponentSet}
+
+    def update(self, file_name, y_column, peak_types, params, x_values, coeff_a, s1, s2):
+        """
+        Пересчитывает кривые реакций и суммарную кривую для целевого столбца.
+
+        Returns:
+            ComponentSet: обновленный набор компонент.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        file_components = self.components.setdefault(file_name, {})
+        component_set = file_components.get(y_column)
+        if component_set is None or component_set.reactions.shape != (len(peak_types), len(x_values)):
+            component_set = ComponentSet(y_column, len(peak_types), len(x_values))
+            file_components[y_column] = component_set
+
+        for i, peak_type in enumerate(peak_types):
+            component_set.reactions[i] = MathOperations.peak_component(
+                x_values, peak_type, params[3 * i], params[3 * i + 1], params[3 * i + 2], coeff_a[i], s1[i], s2[i])
+        np.sum(component_set.reactions, axis=0, out=component_set.cumulative)
+        return component_set
+
+    def get(self, file_name, y_column):
+        return self.components.get(file_name, {}).get(y_column)
+
+    def columns(self, file_name):
+        """
+        Виртуальные столбцы файла в порядке отображения.
+
+        Returns:
+            dict: имя столбца -> одномерный массив.
+        """
+        columns = {}
+        for component_set in self.components.get(file_name, {}).values():
+            columns.update(component_set.columns())
+        return columns
+
+    def column_names(self, file_name):
+        return list(self.columns(file_name).keys())
+
+    def get_column(self, file_name, column_name):
+        return self.columns(file_name).get(column_name)
+
+    def remove_column(self, file_name, column_name):
+        # Кривые одной целевой кривой согласованы между собой, поэтому удаляется весь набор
+        for y_column, component_set in list(self.components.get(file_name, {}).items()):
+            if column_name in component_set.column_names():
+                del self.components[file_name][y_column]
+                logger.info(f'Удалены компоненты для столбца {y_column}')
+                return True
+        return False
+
+    def clear(self, file_name):
+        self.components.pop(file_name, None)
+
+    def materialize(self, file_name, df):
+        """
+        Возвращает DataFrame с виртуальными столбцами, добавленными за одну операцию.
+
+        Args:
+            file_name (str): имя таблицы эксперимента.
+            df (DataFrame): данные эксперимента.
+
+        Returns:
+            DataFrame: новая таблица для экспорта.
+        """
+        columns = self.columns(file_name)
+        if not columns:
+            return df
+        components = pd.DataFrame(columns, index=df.index)
+        return pd.concat([df.drop(columns=[c for c in columns if c in df.columns]), components], axis=1)
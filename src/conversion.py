@@ -0,0 +1,124 @@
+import re
+
+import numpy as np
+
+from src.instrumentation import instrumentation
+from src.logger_config import logger
+
+ALPHA_LEVELS = np.round(np.arange(0.05, 0.951, 0.05), 2)
+CONVERSION_FILTER = 'Conversion arrays(*.npz)'
+RATE_PATTERN = re.compile(r'rate_([\d.]+)')
+
+
+def heating_rate(column):
+    """
+    Скорость нагрева из имени столбца (rate_10_diff -> 10.0), nan если имя другое.
+    """
+    match = RATE_PATTERN.search(str(column))
+    return float(match.group(1)) if match else np.nan
+
+
+def cumulative_trapezoid(x_rows, y_rows):
+    # Интеграл от начала сетки для всех строк сразу, первый столбец равен нулю
+    steps = np.diff(x_rows, axis=1)
+    areas = (y_rows[:, 1:] + y_rows[:, :-1]) * steps / 2
+    integral = np.zeros_like(y_rows)
+    np.cumsum(areas, axis=1, out=integral[:, 1:])
+    return integral
+
+
+def temperatures_at_levels(x_rows, alpha_rows, levels=ALPHA_LEVELS):
+    """
+    Температуры, при которых каждая кривая достигает заданных степеней превращения.
+
+    Args:
+        x_rows (np.ndarray): температуры (k, n).
+        alpha_rows (np.ndarray): степени превращения (k, n), неубывающие по строке.
+        levels (array_like): уровни α (m,).
+
+    Returns:
+        np.ndarray: температуры (k, m).
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    n_points = alpha_rows.shape[1]
+    # Правый узел: первый индекс с alpha >= level, тогда alpha[left] < level и знаменатель положителен
+    right = np.vstack([np.searchsorted(alpha_row, levels, side='left') for alpha_row in alpha_rows])
+    right = np.clip(right, 1, n_points - 1)
+    left = right - 1
+    alpha_left = np.take_along_axis(alpha_rows, left, axis=1)
+    alpha_right = np.take_along_axis(alpha_rows, right, axis=1)
+    x_left = np.take_along_axis(x_rows, left, axis=1)
+    x_right = np.take_along_axis(x_rows, right, axis=1)
+    span = alpha_right - alpha_left
+    weight = np.divide(levels[None, :] - alpha_left, span, out=np.zeros_like(span), where=span > 0)
+    return x_left + np.clip(weight, 0, 1) * (x_right - x_left)
+
+
+@instrumentation.timed('conversion')
+def conversion_arrays(x_rows, reaction_rows, columns, reactions, levels=ALPHA_LEVELS):
+    """
+    Кривые превращения всех реакций всех скоростей нагрева за один проход.
+
+    Каждая строка входных массивов - одна реакция одной скорости нагрева; строки
+    описываются индексами column/reaction, поэтому результат хранится плотными массивами.
+
+    Args:
+        x_rows (np.ndarray): температуры (k, n).
+        reaction_rows (np.ndarray): DTG кривые реакций (k, n).
+        columns (list[str]): столбец (скорость нагрева) каждой строки.
+        reactions (list[int]): номер реакции каждой строки.
+        levels (array_like): уровни α для температур превращения.
+
+    Returns:
+        dict: temperature, alpha, dalpha_dT (k, n), T_at_alpha (k, m), alpha_levels,
+            column, rate, reaction, total_area.
+    """
+    x_rows = np.asarray(x_rows, dtype=np.float64)
+    reaction_rows = np.asarray(reaction_rows, dtype=np.float64)
+    integral = cumulative_trapezoid(x_rows, reaction_rows)
+    total = integral[:, -1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha = np.where(total != 0, integral / total, np.nan)
+        dalpha_dT = np.where(total != 0, reaction_rows / total, np.nan)
+    # Отрицательные выбросы формы пика не должны делать α немонотонной при поиске уровней
+    monotonic_alpha = np.maximum.accumulate(np.nan_to_num(alpha), axis=1)
+    return {
+        'temperature': x_rows,
+        'alpha': alpha,
+        'dalpha_dT': dalpha_dT,
+        'alpha_levels': np.asarray(levels, dtype=np.float64),
+        'T_at_alpha': temperatures_at_levels(x_rows, monotonic_alpha, levels),
+        'column': np.asarray(columns, dtype=str),
+        'rate': np.array([heating_rate(column) for column in columns]),
+        'reaction': np.asarray(reactions, dtype=np.int64),
+        'total_area': total[:, 0],
+    }
+
+
+def conversion_from_components(component_sets, x_values_by_column, levels=ALPHA_LEVELS):
+    """
+    Кривые превращения из подобранных компонент (ComponentStore) нескольких столбцов.
+
+    Args:
+        component_sets (dict): столбец -> ComponentSet.
+        x_values_by_column (dict): столбец -> температуры.
+
+    Returns:
+        dict: см. conversion_arrays или None, если компонент нет.
+    """
+    x_rows, reaction_rows, columns, reactions = [], [], [], []
+    for column, component_set in component_sets.items():
+        x_values = np.asarray(x_values_by_column[column], dtype=np.float64)
+        for i, reaction in enumerate(component_set.reactions):
+            x_rows.append(x_values)
+            reaction_rows.append(reaction)
+            columns.append(column)
+            reactions.append(i)
+    if not reaction_rows:
+        return None
+    return conversion_arrays(np.vstack(x_rows), np.vstack(reaction_rows), columns, reactions, levels)
+
+
+def save_conversion(path, arrays):
+    np.savez_compressed(path, **arrays)
+    logger.info(f"Кривые превращения сохранены: {path} ({arrays['alpha'].shape[0]} кривых)")
@@ -1,8 +1,55 @@
 from PyQt5.QtWidgets import QFileDialog
 import os
+import hashlib
+import pathlib
+import numpy as np
 import pandas as pd
 import chardet
 
+from src.instrumentation import instrumentation
+from src.logger_config import logger
+
+ENCODING_SAMPLE_SIZE = 64 * 1024 # Для определения кодировки достаточно начала файла
+CACHE_FOLDER = 'cache_folder'
+
+
+def detect_encoding(file_path):
+    # Определение кодировки по образцу из начала файла
+    with open(file_path, 'rb') as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+    encoding = chardet.detect(sample)['encoding'] or 'utf-8'
+    # ascii в начале файла не гарантирует ascii в конце, utf-8 совместим с ним
+    if encoding.lower() == 'ascii':
+        encoding = 'utf-8'
+    return encoding
+
+
+def read_csv_file(file_path, file_encoding):
+    # Считывание данных из CSV файла: сначала многопоточный парсер pyarrow, при ошибке - стандартный
+    try:
+        df = pd.read_csv(file_path, encoding=file_encoding, engine='pyarrow')
+    except (ImportError, ValueError) as e:
+        logger.debug('pyarrow недоступен для %s: %s', file_path, e)
+        df = pd.read_csv(file_path, encoding=file_encoding)
+    numeric_columns = df.select_dtypes(include='number').columns
+    return df.astype({column: 'float64' for column in numeric_columns})
+
+
+def load_csv_file(file_path):
+    """
+    Читает CSV файл без диалогов и кэша (пакетный режим).
+
+    Returns:
+        DataFrame: данные файла.
+    """
+    try:
+        return read_csv_file(file_path, detect_encoding(file_path))
+    except UnicodeDecodeError:
+        # Образец оказался непоказательным, определяем кодировку по всему файлу
+        with open(file_path, 'rb') as f:
+            return read_csv_file(file_path, chardet.detect(f.read())['encoding'])
+
+
 class CSVViewer: # Класс отвечает за обработку CSV файлов.
     
     def __init__(self, table_dict):
@@ -25,24 +72,78 @@ class CSVViewer: # Класс отвечает за обработку CSV фа
             self.file_name, _ = os.path.splitext(file_name_with_extension)
             self.file_name = self.file_name.strip()
            
+    def cache_enabled(self):
+        table_manager = getattr(self, 'table_manager', None)
+        if table_manager is None or 'csv_cache' not in table_manager.data['options'].columns:
+            return False
+        return bool(int(float(table_manager.data['options']['csv_cache'].values.item())))
 
+    @instrumentation.timed('csv_load')
     def load_csv(self): # Было: loadCSV
         # Эта функция считывает данные из CSV файла и сохраняет их в DataFrame.
-        # Определение кодировки файла
-        with open(self.file_path, 'rb') as f: 
-            result = chardet.detect(f.read())
-        file_encoding = result['encoding']
-
-        # Считывание данных из CSV файла
-        self.df = pd.read_csv(
-            self.file_path, 
-            encoding=file_encoding,
-        ) 
-        
+        use_cache = self.cache_enabled()
+        if use_cache:
+            cached_df = self.load_cache()
+            if cached_df is not None:
+                self.df = cached_df
+                return
+
+        file_encoding = self.detect_encoding()
+        try:
+            self.df = self.read_csv(file_encoding)
+        except UnicodeDecodeError:
+            # Образец оказался непоказательным, определяем кодировку по всему файлу
+            with open(self.file_path, 'rb') as f:
+                file_encoding = chardet.detect(f.read())['encoding']
+            self.df = self.read_csv(file_encoding)
+
+        if use_cache:
+            self.save_cache()
+
+    def detect_encoding(self):
+        return detect_encoding(self.file_path)
+
+    def read_csv(self, file_encoding):
+        return read_csv_file(self.file_path, file_encoding)
+
+    def cache_path(self):
+        # Имя кэша зависит от пути, размера и времени изменения исходного файла
+        stat = os.stat(self.file_path)
+        path_key = hashlib.sha1(os.path.abspath(self.file_path).encode('utf-8')).hexdigest()[:12]
+        state_key = hashlib.sha1(f'{stat.st_size}|{stat.st_mtime_ns}'.encode('utf-8')).hexdigest()[:12]
+        bp = pathlib.Path().absolute() / CACHE_FOLDER
+        return bp, path_key, bp / f'{path_key}_{state_key}.npz'
+
+    def load_cache(self):
+        _, _, path = self.cache_path()
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as cache:
+                df = pd.DataFrame(cache['values'], columns=cache['columns'].tolist())
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f'Не удалось прочитать кэш {path}: {e}')
+            return None
+        logger.info(f'Данные загружены из кэша: {path}')
+        return df
+
+    def save_cache(self):
+        # Кэшируются только полностью числовые таблицы
+        if self.df.empty or len(self.df.select_dtypes(include='number').columns) != self.df.shape[1]:
+            return
+        bp, path_key, path = self.cache_path()
+        bp.mkdir(exist_ok=True, parents=True)
+        for stale_path in bp.glob(f'{path_key}_*.npz'):
+            stale_path.unlink()
+        np.savez(path, columns=np.array(self.df.columns, dtype=str), values=self.df.to_numpy(dtype=np.float64))
+
     def export_csv(self): # Было: exportCSV
         # Эта функция экспортирует текущий DataFrame в файл CSV.
-        self.file_name, _ = QFileDialog.getSaveFileName(None, 'Save CSV', os.getenv('HOME'), 'CSV(*.csv)') 
-        if self.file_name: 
-            self.df.to_csv(self.file_name, index=False, encoding='utf-8') #
+        # Подобранные кривые реакций хранятся отдельно и добавляются в таблицу только здесь
+        file_path, _ = QFileDialog.getSaveFileName(None, 'Save CSV', os.getenv('HOME'), 'CSV(*.csv)')
+        if file_path:
+            with instrumentation.timer('csv_export'):
+                df = self.table_manager.materialize_table(self.file_name) if self.file_name else self.df
+                df.to_csv(file_path, index=False, encoding='utf-8')
     
     
\ No newline at end of file
@@ -0,0 +1,233 @@
+from itertools import product
+
+import numpy as np
+
+from src.math_operations import MathOperations
+from src.metrics import METRICS, objective_value
+from src.logger_config import logger
+
+# Порядок коэффициентов формы для каждого типа пика, как в таблице gauss
+SHAPE_BOUNDS_KEYS = {
+    'fraser': [('a_bottom_constraint', 'a_top_constraint')],
+    'ads': [('s1_bottom_constraint', 's1_top_constraint'),
+            ('s2_bottom_constraint', 's2_top_constraint')]
+}
+
+# Значения таблицы options по умолчанию, общие для интерфейса и пакетного режима
+DEFAULT_OPTIONS = {
+    'maxfev': 1000, 'popsize': 5, 'maxiter': 5, 'recombination': 0.9, 'coeff_s2': 1, 'mutation': 0.7,
+    'tol': 0.1, 'strategy': 'best2bin', 'rmse': 1000, 'window_length': 11, 'polyorder': 3, 'Savitzky_mode': 'nearest',
+    'coeff_a': -0.01, 'coeff_s1': 1,
+    'a_bottom_constraint': -4, 'a_top_constraint': -0.01,
+    's1_bottom_constraint': 0, 's1_top_constraint': 10,
+    's2_bottom_constraint': 0, 's2_top_constraint': 10,
+    'target_rmse': 0.0, 'target_r2': 0.0, 'patience': 0, 'min_rel_improvement': 0.001, 'spread_tol': 0.0,
+    'polish': 0,
+    'optimizer': 'de', 'surrogate_init_points': 8, 'surrogate_max_evals': 30, 'surrogate_candidates': 2000,
+    'profile': 0, 'csv_cache': 1, 'resample_uniform': 0, 'resample_points': 0,
+    'rank_by': 'rmse', 'confidence': 0.95, 'bootstrap_samples': 0, 'bootstrap_workers': 0,
+    'order_min': 1, 'order_max': 5, 'order_criterion': 'bic', 'order_delta': 10, 'order_peak_types': 'gauss,fraser',
+    'cpu_workers': 0, 'blas_threads': 1, 'cpu_affinity': '',
+}
+
+
+def options_to_dict(options):
+    """
+    Преобразует однострочную таблицу options в словарь.
+
+    Args:
+        options (DataFrame | dict): таблица options или уже готовый словарь.
+
+    Returns:
+        dict: имя опции -> значение.
+    """
+    if isinstance(options, dict):
+        return dict(options)
+    return options.iloc[0].to_dict()
+
+
+def extract_shape_bounds(selected, coeffs_bounds):
+    """
+    Формирует границы коэффициентов формы для внешнего оптимизатора.
+
+    Args:
+        selected (dict): реакция -> список выбранных типов пиков.
+        coeffs_bounds (dict): реакция -> тип пика -> имя ограничения -> значение.
+
+    Returns:
+        list[tuple[float, float]]: границы в порядке, ожидаемом split_shape_coefficients.
+    """
+    result = []
+    for reaction, functions in selected.items():
+        for func in functions:
+            for bottom_key, top_key in SHAPE_BOUNDS_KEYS.get(func, []):
+                bounds = coeffs_bounds[reaction][func]
+                result.append((bounds[bottom_key], bounds[top_key]))
+    return result
+
+
+def split_shape_coefficients(selected, coefficients, coeff_a, s1, s2):
+    """
+    Раскладывает вектор внешнего оптимизатора по коэффициентам реакций.
+
+    Повторяет порядок DataHandler.modify_gauss_dataframe.
+
+    Returns:
+        tuple[list[float], list[float], list[float]]: новые coeff_a, s1, s2.
+    """
+    coefficients = list(coefficients)
+    coeff_a, s1, s2 = list(coeff_a), list(s1), list(s2)
+    for i, functions in enumerate(selected.values()):
+        if 'fraser' in functions:
+            coeff_a[i] = coefficients.pop(0)
+        if 'ads' in functions:
+            s1[i] = coefficients.pop(0)
+            s2[i] = coefficients.pop(0)
+    return coeff_a, s1, s2
+
+
+def smooth_derivative(x_values, y_values, window_length=11, polyorder=3, mode='nearest'):
+    """
+    DTG кривая так же, как ее строит кнопка Add Diff: производная и фильтр Савицкого-Голея.
+    """
+    dy_dx = MathOperations.compute_derivative(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))
+    if window_length <= polyorder:
+        return dy_dx
+    from scipy import signal
+    return signal.savgol_filter(dy_dx, window_length=window_length, polyorder=polyorder, mode=mode)
+
+
+def initial_peaks_from_curve(x_values, y_values, n_peaks):
+    """
+    Грубое начальное приближение пиков по наиболее выраженным максимумам кривой.
+
+    Returns:
+        list[float]: height, center, width для каждого пика в порядке возрастания center.
+    """
+    from scipy import signal
+
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    peaks, properties = signal.find_peaks(y_values, prominence=0)
+    strongest = peaks[np.argsort(properties['prominences'])[::-1][:n_peaks]]
+    widths = signal.peak_widths(y_values, strongest, rel_height=0.5)[0]
+    step = np.mean(np.diff(x_values))
+    params = []
+    for peak, width in sorted(zip(strongest, widths)):
+        params.extend([y_values[peak], x_values[peak], max(width * step / 2.355, step)])
+    return params
+
+
+def run_outer_optimizer(objective, bounds, options, callback=None, seed=None, x0=None):
+    """
+    Запускает внешний оптимизатор коэффициентов формы, выбранный опцией optimizer.
+
+    Args:
+        objective (callable): целевая функция от вектора коэффициентов.
+        bounds (list[tuple[float, float]]): границы коэффициентов.
+        options (dict): опции в формате таблицы options.
+        callback (callable, optional): callback(x, convergence), True останавливает оптимизацию.
+        seed (int, optional): зерно генератора случайных чисел.
+        x0 (array_like, optional): начальное приближение (теплый старт), используется
+            дифференциальной эволюцией как одна из особей начальной популяции.
+
+    Returns:
+        OptimizeResult: результат оптимизации.
+    """
+    # Оптимизаторы импортируются при первом запуске, а не при старте приложения
+    if str(options.get('optimizer', 'de')) == 'surrogate':
+        from src.surrogate_optimizer import SurrogateOptimizer
+        return SurrogateOptimizer(
+            objective,
+            bounds,
+            init_points=int(options['surrogate_init_points']),
+            max_evals=int(options['surrogate_max_evals']),
+            n_candidates=int(options['surrogate_candidates']),
+            callback=callback,
+            seed=seed
+        ).minimize()
+    from scipy.optimize import differential_evolution
+    return differential_evolution(
+        objective,
+        bounds,
+        strategy=str(options['strategy']),
+        popsize=int(options['popsize']),
+        recombination=float(options['recombination']),
+        mutation=float(options['mutation']),
+        tol=float(options['tol']),
+        maxiter=int(options['maxiter']),
+        callback=callback,
+        seed=seed,
+        x0=x0,
+        # Доводка L-BFGS-B вызывает полный перебор комбинаций на каждую конечную разность
+        # и выполняется даже после ранней остановки, поэтому по умолчанию выключена
+        polish=bool(int(float(options.get('polish', 0))))
+    )
+
+
+class DeconvolutionProblem:
+    """
+    Деконволюция одной DTG кривой без графического интерфейса.
+
+    Повторяет цепочку ComputePeaksThread -> DataHandler.compute_peaks_button_pushed ->
+    MathOperations.compute_best_peaks, но работает с массивами, а не с таблицами.
+
+    Attributes:
+        best (dict): лучший найденный результат (rmse, score, popt, pcov, metrics, combination, coeff_a, s1, s2);
+            score - значение rank_by, которое минимизирует внешний оптимизатор.
+        nfev (int): число вызовов целевой функции.
+    """
+
+    def __init__(self, x_values, y_values, peaks_params, peaks_bounds, selected, maxfev,
+                 coeff_a=None, s1=None, s2=None, console_message_signal=None):
+        self.x_values = np.asarray(x_values, dtype=float)
+        self.y_values = np.asarray(y_values, dtype=float)
+        self.peaks_params = list(peaks_params)
+        self.peaks_bounds = peaks_bounds
+        self.selected = selected
+        self.combinations = list(product(*selected.values()))
+        self.maxfev = maxfev
+        n_reactions = len(selected)
+        self.coeff_a = list(coeff_a) if coeff_a is not None else [-0.01] * n_reactions
+        self.s1 = list(s1) if s1 is not None else [1.0] * n_reactions
+        self.s2 = list(s2) if s2 is not None else [1.0] * n_reactions
+        self.console_message_signal = console_message_signal
+        self.rank_by = 'rmse'
+        self.best = None
+        self.nfev = 0
+
+    def objective(self, coefficients):
+        self.nfev += 1
+        coeff_a, s1, s2 = split_shape_coefficients(self.selected, coefficients, self.coeff_a, self.s1, self.s2)
+        results = {}
+        popt, combination, rmse = MathOperations.compute_best_peaks(
+            self.x_values, self.y_values, self.peaks_params, self.maxfev, coeff_a, s1, s2,
+            self.combinations, self.peaks_bounds, self.console_message_signal, results, self.rank_by)
+        if rmse is None:
+            return np.inf
+        # Внешний оптимизатор минимизирует ту же метрику, по которой выбирается комбинация
+        score = objective_value(results[combination][self.rank_by], self.rank_by)
+        if self.best is None or score < self.best['score']:
+            self.best = {'rmse': rmse, 'score': score, 'popt': popt, 'pcov': results[combination]['pcov'],
+                         'metrics': {name: results[combination][name] for name in METRICS}, 'combination': combination,
+                         'coeff_a': coeff_a, 's1': s1, 's2': s2, 'coefficients': np.asarray(coefficients)}
+            logger.info(f'Новое лучшее {self.rank_by}: {results[combination][self.rank_by]:.5f}, '
+                        f'RMSE: {rmse:.5f}, комбинация: {combination}')
+        return score
+
+    def solve(self, shape_bounds, options, callback=None, seed=None, x0=None):
+        """
+        Подбирает коэффициенты формы внешним оптимизатором.
+
+        Если ни одна реакция не использует fraser/ads, выполняется единственный перебор комбинаций.
+
+        Returns:
+            dict: лучший результат (см. атрибут best).
+        """
+        options = options_to_dict(options)
+        self.rank_by = str(options.get('rank_by', 'rmse'))
+        if shape_bounds:
+            run_outer_optimizer(self.objective, shape_bounds, options, callback=callback, seed=seed, x0=x0)
+        else:
+            self.objective([])
+        return self.best
@@ -0,0 +1,100 @@
+import hashlib
+import re
+
+import numpy as np
+
+from src.instrumentation import instrumentation
+
+RATE_COLUMN_PATTERN = re.compile(r'^rate_[\d.]+$')
+
+
+def rate_columns(columns):
+    """
+    Отбирает исходные столбцы скоростей нагрева (rate_3, rate_10, ...) без производных.
+    """
+    return [column for column in columns if RATE_COLUMN_PATTERN.match(str(column))]
+
+
+def data_fingerprint(*arrays):
+    """
+    Отпечаток содержимого массивов для проверки, что кэшированный результат не устарел.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(str(array.shape).encode())
+        digest.update(array.data)
+    return digest.digest()
+
+
+class DerivativePipeline:
+    """
+    Пакетное вычисление DTG кривых для нескольких столбцов сразу.
+
+    Столбцы складываются в один двумерный массив, градиент и фильтр Савицкого-Голея
+    применяются вдоль оси точек за один вызов. Сырые градиенты кэшируются по
+    (файл, x, y), сглаженные кривые - дополнительно по параметрам фильтра, поэтому
+    смена только параметров сглаживания не пересчитывает градиент. Вместе с результатом
+    хранится отпечаток значений x и y: после правки таблицы запись считается устаревшей.
+    """
+
+    def __init__(self):
+        self.gradients = {}
+        self.smoothed = {}
+
+    def clear(self, file_name=None):
+        if file_name is None:
+            self.gradients.clear()
+            self.smoothed.clear()
+            return
+        self.gradients = {k: v for k, v in self.gradients.items() if k[0] != file_name}
+        self.smoothed = {k: v for k, v in self.smoothed.items() if k[0] != file_name}
+
+    def fingerprints(self, x_values, y_columns):
+        x_fingerprint = data_fingerprint(x_values)
+        return {column: data_fingerprint(values) + x_fingerprint for column, values in y_columns.items()}
+
+    @instrumentation.timed('derivative_gradient')
+    def compute_gradients(self, file_name, x_column, x_values, y_columns, fingerprints=None):
+        fingerprints = fingerprints or self.fingerprints(x_values, y_columns)
+        missing = [column for column in y_columns
+                   if self.gradients.get((file_name, x_column, column), (None,))[0] != fingerprints[column]]
+        if missing:
+            stacked = np.vstack([np.asarray(y_columns[column], dtype=np.float64) for column in missing])
+            # Знак как в MathOperations.compute_derivative: DTG кривая положительна при потере массы
+            gradients = -np.gradient(stacked, np.asarray(x_values, dtype=np.float64), axis=1)
+            for column, gradient in zip(missing, gradients):
+                self.gradients[(file_name, x_column, column)] = (fingerprints[column], gradient)
+        return {column: self.gradients[(file_name, x_column, column)][1] for column in y_columns}
+
+    @instrumentation.timed('derivative_smoothing')
+    def differentiate(self, file_name, x_column, x_values, y_columns, window_length, polyorder, mode):
+        """
+        Возвращает сглаженные производные для набора столбцов.
+
+        Args:
+            file_name (str): имя таблицы эксперимента.
+            x_column (str): имя столбца температуры.
+            x_values (array_like): значения температуры.
+            y_columns (dict): имя столбца -> значения.
+            window_length (int): длина окна фильтра Савицкого-Голея.
+            polyorder (int): порядок полинома фильтра.
+            mode (str): режим обработки краев фильтра.
+
+        Returns:
+            dict: имя столбца -> сглаженная производная.
+        """
+        fingerprints = self.fingerprints(x_values, y_columns)
+        gradients = self.compute_gradients(file_name, x_column, x_values, y_columns, fingerprints)
+        params = (int(window_length), int(polyorder), str(mode))
+        missing = [column for column in y_columns
+                   if self.smoothed.get((file_name, x_column, column, *params), (None,))[0] != fingerprints[column]]
+        if missing:
+            from scipy import signal
+            stacked = np.vstack([gradients[column] for column in missing])
+            smoothed = signal.savgol_filter(
+                stacked, window_length=params[0], polyorder=params[1], mode=params[2], axis=1)
+            for column, values in zip(missing, smoothed):
+                self.smoothed[(file_name, x_column, column, *params)] = (fingerprints[column], values)
+        # Копии, чтобы правки таблицы не портили кэш
+        return {column: self.smoothed[(file_name, x_column, column, *params)][1].copy() for column in y_columns}
@@ -0,0 +1,135 @@
+import numpy as np
+
+from src.logger_config import logger
+
+
+class EarlyStopping:
+    """
+    Правила ранней остановки внешнего оптимизатора (дифференциальной эволюции).
+
+    Нулевое значение любого порога отключает соответствующее правило. Разброс популяции
+    вычисляется из convergence как tol / convergence, поэтому при tol = 0 правило spread_tol
+    не работает.
+
+    Attributes:
+        target_rmse (float): остановка при достижении RMSE не выше заданного.
+        target_r2 (float): остановка при достижении R2 не ниже заданного.
+        patience (int): число поколений без относительного улучшения до остановки.
+        min_rel_improvement (float): минимальное относительное улучшение RMSE за поколение.
+        spread_tol (float): порог относительного разброса целевой функции в популяции.
+        de_tol (float): параметр tol дифференциальной эволюции.
+        reason (str): причина остановки или None.
+    """
+
+    def __init__(self, target_rmse=0.0, target_r2=0.0, patience=0, min_rel_improvement=0.0,
+                 spread_tol=0.0, de_tol=0.0, y_variance=None):
+        self.target_rmse = target_rmse
+        self.target_r2 = target_r2
+        self.patience = patience
+        self.min_rel_improvement = min_rel_improvement
+        self.spread_tol = spread_tol
+        self.de_tol = de_tol
+        self.y_variance = y_variance
+        if spread_tol > 0 and de_tol <= 0:
+            logger.warning(f'Правило spread_tol = {spread_tol} отключено: разброс популяции вычисляется через tol, '
+                           f'а tol = {de_tol}')
+
+        self.best_rmse = np.inf
+        self.generation_best_rmse = np.inf
+        self.stale_generations = 0
+        self.generation = 0
+        self.reason = None
+
+    @classmethod
+    def from_options(cls, options, y_values=None):
+        """
+        Создает правила остановки по таблице options.
+
+        Args:
+            options (DataFrame): таблица options.
+            y_values (array_like, optional): аппроксимируемая кривая, нужна для расчета R2.
+
+        Returns:
+            EarlyStopping: настроенный объект.
+        """
+        def option(name, default):
+            if name not in options.columns:
+                return default
+            return float(options[name].values.item())
+
+        y_variance = None
+        if y_values is not None:
+            y_variance = float(np.var(np.asarray(y_values, dtype=float)))
+
+        return cls(
+            target_rmse=option('target_rmse', 0.0),
+            target_r2=option('target_r2', 0.0),
+            patience=int(option('patience', 0)),
+            min_rel_improvement=option('min_rel_improvement', 0.0),
+            spread_tol=option('spread_tol', 0.0),
+            de_tol=option('tol', 0.0),
+            y_variance=y_variance,
+        )
+
+    def r2_from_rmse(self, rmse):
+        # R2 = 1 - SS_res / SS_tot = 1 - RMSE^2 / Var(y)
+        if not self.y_variance:
+            return None
+        return 1 - rmse ** 2 / self.y_variance
+
+    def update(self, rmse):
+        """
+        Учитывает очередное значение целевой функции.
+
+        Args:
+            rmse (float): RMSE лучшей комбинации для очередного набора коэффициентов.
+        """
+        if rmse is not None and rmse < self.best_rmse:
+            self.best_rmse = rmse
+
+    def check(self, convergence=None):
+        """
+        Проверяет правила остановки в конце поколения.
+
+        Args:
+            convergence (float, optional): значение convergence из callback дифференциальной эволюции.
+
+        Returns:
+            str: причина остановки или None, если оптимизацию следует продолжить.
+        """
+        self.generation += 1
+
+        if self.target_rmse > 0 and self.best_rmse <= self.target_rmse:
+            self.reason = f'достигнуто целевое RMSE: {self.best_rmse:.5f} <= {self.target_rmse}'
+            return self.reason
+
+        r2 = self.r2_from_rmse(self.best_rmse) if np.isfinite(self.best_rmse) else None
+        if self.target_r2 > 0 and r2 is not None and r2 >= self.target_r2:
+            self.reason = f'достигнуто целевое R2: {r2:.5f} >= {self.target_r2}'
+            return self.reason
+
+        if self.patience > 0:
+            previous = self.generation_best_rmse
+            if np.isfinite(previous) and previous > 0:
+                improvement = (previous - self.best_rmse) / previous
+            else:
+                improvement = np.inf
+            if improvement < self.min_rel_improvement:
+                self.stale_generations += 1
+            else:
+                self.stale_generations = 0
+            self.generation_best_rmse = self.best_rmse
+            if self.stale_generations >= self.patience:
+                self.reason = (f'нет относительного улучшения больше {self.min_rel_improvement} '
+                               f'за {self.stale_generations} поколений')
+                return self.reason
+
+        # convergence = tol / (std(energies) / |mean(energies)|), откуда относительный разброс популяции
+        if self.spread_tol > 0 and self.de_tol > 0 and convergence:
+            spread = self.de_tol / convergence
+            if spread < self.spread_tol:
+                self.reason = f'разброс популяции {spread:.2e} меньше порога {self.spread_tol}'
+                return self.reason
+
+        logger.debug('Поколение %s: лучшее RMSE %s, без улучшения %s', self.generation, self.best_rmse, self.stale_generations)
+        return None
@@ -0,0 +1,190 @@
+from itertools import product
+
+import numpy as np
+
+from src.deconvolution import SHAPE_BOUNDS_KEYS
+from src.math_operations import MathOperations
+from src.multi_rate import observed_peak_shift, shift_peaks
+from src.resources import governor
+from src.logger_config import logger
+
+# Коэффициенты формы каждого типа пика: (имя в результате, индекс границ в SHAPE_BOUNDS_KEYS)
+SHAPE_COEFFICIENTS = {
+    'gauss': [],
+    'fraser': [('coeff_a', 0)],
+    'ads': [('s1', 0), ('s2', 1)],
+}
+
+
+class GlobalFit:
+    """
+    Совместный подбор DTG кривых всех скоростей нагрева с общими параметрами формы.
+
+    Невязки всех кривых складываются в один вектор. Типы пиков и коэффициенты формы
+    (coeff_a, s1, s2) общие для всех скоростей, height, center и width у каждой скорости свои.
+    Каждая невязка зависит только от общих коэффициентов и параметров своей скорости,
+    поэтому якобиан блочный, и least_squares получает его разреженную структуру.
+
+    Attributes:
+        results (dict): столбец -> результат в формате MultiRateDeconvolution.results.
+    """
+
+    def __init__(self, curves, reference, peaks_params, peaks_bounds, selected, coeffs_bounds,
+                 coeff_a, s1, s2, max_nfev=None):
+        """
+        Args:
+            curves (dict): столбец -> (x, y) DTG кривой.
+            reference (str): опорный столбец, для которого заданы начальные параметры и границы.
+            peaks_params (list[float]): начальные height, center, width для опорной кривой.
+            peaks_bounds (tuple[list[float], list[float]]): границы параметров пиков опорной кривой.
+            selected (dict): реакция -> список типов пиков.
+            coeffs_bounds (dict): реакция -> тип пика -> имя ограничения -> значение.
+            coeff_a, s1, s2 (list[float]): начальные коэффициенты формы.
+            max_nfev (int, optional): ограничение числа вычислений невязки.
+        """
+        self.curves = {column: (np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+                       for column, (x, y) in curves.items()}
+        self.columns = list(self.curves)
+        self.reference = reference
+        self.selected = selected
+        self.reactions = list(selected)
+        self.coeffs_bounds = coeffs_bounds
+        self.initial_shape = {'coeff_a': list(map(float, coeff_a)), 's1': list(map(float, s1)), 's2': list(map(float, s2))}
+        self.max_nfev = max_nfev
+        self.results = {}
+
+        # Начальные параметры и границы каждой скорости - перенос опорных на наблюдаемый сдвиг
+        x_reference, y_reference = self.curves[reference]
+        self.rate_start = {}
+        for column in self.columns:
+            shift, scale = (0.0, 1.0) if column == reference else observed_peak_shift(
+                x_reference, y_reference, *self.curves[column])
+            self.rate_start[column] = (shift, *shift_peaks(peaks_params, peaks_bounds, shift, scale))
+
+    def shape_layout(self, combination):
+        """
+        Общие коэффициенты формы для комбинации типов пиков.
+
+        Returns:
+            list: (номер пика, имя коэффициента, нижняя граница, верхняя граница).
+        """
+        layout = []
+        for i, (reaction, peak_type) in enumerate(zip(self.reactions, combination)):
+            for name, bounds_index in SHAPE_COEFFICIENTS.get(peak_type, []):
+                bottom_key, top_key = SHAPE_BOUNDS_KEYS[peak_type][bounds_index]
+                bounds = self.coeffs_bounds[reaction][peak_type]
+                low, high = sorted((float(bounds[bottom_key]), float(bounds[top_key])))
+                layout.append((i, name, low, high))
+        return layout
+
+    def jac_sparsity(self, n_shape, n_peak_params):
+        # Строки скорости k зависят от общих коэффициентов и только от своего блока параметров пиков
+        from scipy.sparse import lil_matrix
+
+        n_rows = sum(self.curves[column][0].size for column in self.columns)
+        sparsity = lil_matrix((n_rows, n_shape + n_peak_params * len(self.columns)), dtype=int)
+        row = 0
+        for k, column in enumerate(self.columns):
+            n_points = self.curves[column][0].size
+            sparsity[row:row + n_points, :n_shape] = 1
+            start = n_shape + k * n_peak_params
+            sparsity[row:row + n_points, start:start + n_peak_params] = 1
+            row += n_points
+        return sparsity
+
+    def unpack_shape(self, combination, layout, shape_values):
+        shape = {name: list(values) for name, values in self.initial_shape.items()}
+        for (i, name, _, _), value in zip(layout, shape_values):
+            shape[name][i] = value
+        return shape
+
+    def fit_combination(self, combination):
+        """
+        Совместный подбор для одной комбинации типов пиков.
+
+        Returns:
+            dict: combination, total_rmse, nfev и результаты по столбцам (rates).
+        """
+        from scipy.optimize import least_squares
+
+        layout = self.shape_layout(combination)
+        n_shape = len(layout)
+        n_peak_params = 3 * len(combination)
+
+        shape_x0 = [np.clip(self.initial_shape[name][i], low, high) for i, name, low, high in layout]
+        x0 = list(shape_x0)
+        lower = [low for _, _, low, _ in layout]
+        upper = [high for _, _, _, high in layout]
+        for column in self.columns:
+            _, params, (params_lower, params_upper) = self.rate_start[column]
+            x0.extend(params)
+            lower.extend(params_lower)
+            upper.extend(params_upper)
+        x0 = np.clip(np.asarray(x0, dtype=float), lower, upper)
+
+        def residuals(vector):
+            shape = self.unpack_shape(combination, layout, vector[:n_shape])
+            stacked = []
+            for k, column in enumerate(self.columns):
+                x_values, y_values = self.curves[column]
+                params = vector[n_shape + k * n_peak_params:n_shape + (k + 1) * n_peak_params]
+                model = np.zeros_like(x_values)
+                for i, peak_type in enumerate(combination):
+                    model += MathOperations.peak_component(
+                        x_values, peak_type, params[3 * i], params[3 * i + 1], params[3 * i + 2],
+                        shape['coeff_a'][i], shape['s1'][i], shape['s2'][i])
+                stacked.append(model - y_values)
+            return np.concatenate(stacked)
+
+        with governor.slot():
+            solution = least_squares(
+                residuals, x0, bounds=(lower, upper), method='trf', x_scale='jac',
+                jac_sparsity=self.jac_sparsity(n_shape, n_peak_params), max_nfev=self.max_nfev)
+
+        shape = self.unpack_shape(combination, layout, solution.x[:n_shape])
+        residual = solution.fun
+        rates = {}
+        row = 0
+        for k, column in enumerate(self.columns):
+            n_points = self.curves[column][0].size
+            rates[column] = {
+                'popt': solution.x[n_shape + k * n_peak_params:n_shape + (k + 1) * n_peak_params].copy(),
+                'combination': tuple(combination),
+                'coeff_a': shape['coeff_a'], 's1': shape['s1'], 's2': shape['s2'],
+                'rmse': float(np.sqrt(np.mean(residual[row:row + n_points] ** 2))),
+                'shift': self.rate_start[column][0],
+            }
+            row += n_points
+        total_rmse = float(np.sqrt(np.mean(residual ** 2)))
+        logger.info(f'Совместный подбор {combination}: RMSE {total_rmse:.5f}, вычислений {solution.nfev}')
+        return {'combination': tuple(combination), 'total_rmse': total_rmse, 'nfev': solution.nfev, 'rates': rates}
+
+    def run(self, progress=None, callback=None):
+        """
+        Перебирает комбинации типов пиков и оставляет лучшую по суммарному RMSE.
+
+        Args:
+            progress (callable, optional): progress(column, result) для каждой скорости лучшей комбинации.
+            callback (callable, optional): вызывается перед каждой комбинацией, True останавливает перебор.
+
+        Returns:
+            dict: столбец -> результат (см. атрибут results).
+        """
+        best = None
+        for combination in product(*self.selected.values()):
+            if callback is not None and callback(None):
+                break
+            try:
+                result = self.fit_combination(combination)
+            except ValueError as e:
+                logger.warning(f'Совместный подбор {combination} не удался: {e}')
+                continue
+            if best is None or result['total_rmse'] < best['total_rmse']:
+                best = result
+        if best is None:
+            return self.results
+        self.results = best['rates']
+        if progress:
+            for column, result in self.results.items():
+                progress(column, result)
+        return self.results
@@ -0,0 +1,137 @@
+import cProfile
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+
+class Instrumentation:
+    """
+    Легковесные именованные таймеры и счетчики для горячих участков кода.
+
+    Потокобезопасен: таймеры могут использоваться из пула потоков ComputeCombinationTask.
+    cProfile видит только поток, в котором включен, поэтому при профилировании каждый
+    поток оборачивает свою работу в profile(), а статистика потоков объединяется в collect_profile().
+
+    Attributes:
+        timers (dict): имя -> [число вызовов, суммарное время в секундах].
+        counters (dict): имя -> значение счетчика.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timers = defaultdict(lambda: [0, 0.0])
+            self.counters = defaultdict(int)
+            self.started_at = time.perf_counter()
+
+    def add_time(self, name, elapsed):
+        with self._lock:
+            timer = self.timers[name]
+            timer[0] += 1
+            timer[1] += elapsed
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Контекстный менеджер, измеряющий время выполнения блока.
+
+        Args:
+            name (str): имя таймера.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """
+        Декоратор, измеряющий время выполнения функции.
+
+        Args:
+            name (str): имя таймера.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def enable_profiling(self):
+        with self._lock:
+            self._profiles = []
+
+    @contextmanager
+    def profile(self):
+        """
+        Профилирует блок в текущем потоке, если профилирование включено enable_profiling.
+        """
+        if self._profiles is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                if self._profiles is not None:
+                    self._profiles.append(profiler)
+
+    def collect_profile(self):
+        """
+        Объединяет статистику всех потоков и выключает профилирование.
+
+        Returns:
+            pstats.Stats | None: общая статистика или None, если профилирование не включалось.
+        """
+        with self._lock:
+            profiles, self._profiles = self._profiles, None
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profiler in profiles[1:]:
+            stats.add(profiler)
+        return stats
+
+    def summary(self, wall_time=None):
+        """
+        Формирует текстовую сводку: время по стадиям и число вызовов в секунду.
+
+        Args:
+            wall_time (float, optional): полное время прогона, по умолчанию время с последнего reset.
+
+        Returns:
+            str: сводка для вывода в консоль.
+        """
+        with self._lock:
+            timers = {name: tuple(value) for name, value in self.timers.items()}
+            counters = dict(self.counters)
+        if wall_time is None:
+            wall_time = time.perf_counter() - self.started_at
+
+        lines = [f'Сводка по времени (всего {wall_time:.3f} с):']
+        for name, (calls, total) in sorted(timers.items(), key=lambda item: -item[1][1]):
+            rate = calls / wall_time if wall_time > 0 else 0.0
+            mean_ms = 1000 * total / calls if calls else 0.0
+            lines.append(f'  {name}: {total:.3f} с, вызовов {calls}, {mean_ms:.2f} мс/вызов, {rate:.2f} вызовов/с')
+        for name, value in sorted(counters.items()):
+            lines.append(f'  {name}: {value}')
+        return '\n'.join(lines)
+
+
+instrumentation = Instrumentation()
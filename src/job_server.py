@@ -0,0 +1,541 @@
+import getpass
+import itertools
+import logging
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Listener, Client, AuthenticationError
+from pathlib import Path
+
+import numpy as np
+
+from src.batch import deconvolve_curve, init_worker
+from src.resampling import TEMPERATURE_COLUMN
+from src.resources import governor
+from src.logger_config import logger
+
+DEFAULT_ADDRESS = 'localhost:6060'
+# Общий ключ сервера и клиентов: значение или путь к файлу ключа. Ключа по умолчанию нет:
+# multiprocessing.connection распаковывает (pickle) каждый запрос, поэтому знающий ключ
+# может выполнить код от имени пользователя сервера.
+AUTHKEY_ENV = 'DECONVOLUTION_JOB_KEY'
+AUTHKEY_FILE_ENV = 'DECONVOLUTION_JOB_KEY_FILE'
+# Права сокета Unix по умолчанию - только владелец сервера
+SOCKET_MODE = 0o600
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+# Сколько завершенных заданий (с результатами) хранится в памяти сервера
+MAX_FINISHED = 200
+
+_progress_queue = None
+
+
+def parse_address(value):
+    """
+    Адрес сервера: 'host:port' - TCP, иначе путь к сокету Unix (или именованный канал Windows).
+    """
+    if isinstance(value, tuple):
+        return value
+    host, separator, port = str(value).rpartition(':')
+    if separator and port.isdigit():
+        return host or 'localhost', int(port)
+    return str(value)
+
+
+def get_authkey(value=None, path=None):
+    """
+    Ключ аутентификации: аргумент, файл ключа, затем DECONVOLUTION_JOB_KEY_FILE и DECONVOLUTION_JOB_KEY.
+
+    Raises:
+        ValueError: ключ не задан.
+    """
+    path = path or (None if value else os.environ.get(AUTHKEY_FILE_ENV))
+    if not value and path:
+        path = Path(path).expanduser()
+        if hasattr(os, 'getuid') and path.stat().st_mode & 0o077:
+            logger.warning(f'Файл ключа {path} доступен другим пользователям, выполните chmod 600')
+        value = path.read_bytes().strip()
+    value = value or os.environ.get(AUTHKEY_ENV)
+    if not value:
+        raise ValueError(f'Не задан ключ сервера заданий: --authkey-file, {AUTHKEY_FILE_ENV} или {AUTHKEY_ENV}')
+    return value.encode() if isinstance(value, str) else value
+
+
+def generate_authkey(path):
+    """
+    Создает файл со случайным ключом, доступный только владельцу.
+
+    Returns:
+        Path: путь к файлу ключа.
+    """
+    path = Path(path).expanduser()
+    # O_EXCL: существующий ключ не перезаписывается, права задаются при создании файла
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(secrets.token_hex(32))
+    return path
+
+
+def is_unix_socket(address):
+    return isinstance(address, str) and not address.startswith('\\\\')
+
+
+def init_job_worker(log_level, blas_threads, progress_queue):
+    global _progress_queue
+    init_worker(log_level, blas_threads)
+    _progress_queue = progress_queue
+
+
+def execute_job(job_id, job):
+    """
+    Задание сервера в процессе пула: события хода подбора отправляются в общую очередь.
+
+    Последним в очередь кладется None: результат может прийти раньше событий, и задание
+    завершается только после того, как все его события получены.
+    """
+    try:
+        result = deconvolve_curve(job['x'], job['y'], job['column'], job.get('config', {}),
+                                  job.get('x_column', TEMPERATURE_COLUMN),
+                                  lambda event: _progress_queue.put((job_id, event)))
+    finally:
+        _progress_queue.put((job_id, None))
+    result['summary'] = {'file': job.get('file', ''), **result['summary']}
+    return result
+
+
+class JobScheduler:
+    """
+    Очередь заданий деконволюции с приоритетами и справедливым разделением между пользователями.
+
+    Задания выполняются в постоянном пуле из workers процессов. В пул передается не больше
+    workers заданий одновременно, поэтому порядок запуска определяет планировщик, а не очередь
+    пула. Следующим запускается задание с наибольшим приоритетом; при равных приоритетах -
+    задание пользователя, у которого меньше выполняющихся заданий и меньше израсходованное
+    время, затем более раннее.
+
+    Attributes:
+        workers (int): число процессов пула.
+        jobs (dict): номер -> запись задания (user, priority, state, events, result, error, время).
+        usage (dict): пользователь -> секунды выполнения его завершенных заданий.
+    """
+
+    def __init__(self, workers=None, blas_threads=1, log_level=logging.WARNING):
+        self.workers = workers or governor.pool_size()
+        self.jobs = {}
+        self.usage = defaultdict(float)
+        self.running = Counter()
+        self.stopped = False
+        self._ids = itertools.count(1)
+        # Выполненные задания, ожидающие последнего события, и задания, события которых уже получены
+        self._futures = {}
+        self._closed = set()
+        self._condition = threading.Condition()
+        context = multiprocessing.get_context('spawn')
+        self._progress_queue = context.Queue()
+        # spawn: каждый процесс запускает собственный слушатель очереди логов
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context, initializer=init_job_worker,
+            initargs=(log_level, blas_threads, self._progress_queue))
+        self._threads = [threading.Thread(target=self._dispatch, name='job_dispatch', daemon=True),
+                         threading.Thread(target=self._collect_progress, name='job_progress', daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job, user='', priority=0):
+        """
+        Ставит задание в очередь.
+
+        Args:
+            job (dict): x, y (исходная кривая), column, необязательные config, x_column, file.
+            user (str): пользователь, между которыми делится пул.
+            priority (int): больший приоритет запускается раньше.
+
+        Returns:
+            int: номер задания.
+        """
+        if len(job['x']) != len(job['y']):
+            raise ValueError(f"Разная длина x ({len(job['x'])}) и y ({len(job['y'])})")
+        job = {**job, 'column': str(job.get('column', 'rate'))}
+        with self._condition:
+            if self.stopped:
+                raise RuntimeError('Сервер заданий остановлен')
+            job_id = next(self._ids)
+            self.jobs[job_id] = {'id': job_id, 'user': str(user), 'priority': int(priority), 'state': QUEUED,
+                                 'column': job['column'], 'submitted': time.time(), 'started': None,
+                                 'finished': None, 'events': [], 'result': None, 'error': None, 'job': job}
+            self._condition.notify_all()
+        logger.info(f"Задание {job_id} ({user}, приоритет {priority}, {job['column']}) в очереди")
+        return job_id
+
+    def order_key(self, record):
+        return -record['priority'], self.running[record['user']], self.usage[record['user']], record['id']
+
+    def queued(self):
+        # Очередь в порядке, в котором задания будут запущены при текущей загрузке
+        return sorted((record for record in self.jobs.values() if record['state'] == QUEUED), key=self.order_key)
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self.stopped or (sum(self.running.values()) < self.workers and self.queued()))
+                if self.stopped:
+                    return
+                record = self.queued()[0]
+                record.update({'state': RUNNING, 'started': time.time()})
+                record['events'].append({'stage': RUNNING, 'time': record['started']})
+                self.running[record['user']] += 1
+                job = record.pop('job')
+                self._condition.notify_all()
+            future = self._executor.submit(execute_job, record['id'], job)
+            future.add_done_callback(lambda future, record=record: self._finish(record, future))
+
+    def _finish(self, record, future):
+        with self._condition:
+            # Процесс пула аварийно завершился: последнего события не будет
+            if future.exception() is not None or record['id'] in self._closed:
+                self._complete(record, future)
+            else:
+                self._futures[record['id']] = future
+
+    def _complete(self, record, future):
+        # Вызывается под self._condition
+        self._closed.discard(record['id'])
+        self._futures.pop(record['id'], None)
+        record['finished'] = time.time()
+        self.running[record['user']] -= 1
+        self.usage[record['user']] += record['finished'] - record['started']
+        try:
+            record['result'] = future.result()
+            status = record['result']['summary']['status']
+            record['state'] = DONE if status == 'ok' else FAILED
+            record['error'] = None if status == 'ok' else status
+        except Exception as e:
+            record.update({'state': FAILED, 'error': f'{type(e).__name__}: {e}'})
+        record['events'].append({'stage': record['state'], 'time': record['finished'], 'error': record['error']})
+        logger.info(f"Задание {record['id']}: {record['state']}, {record['finished'] - record['started']:.1f} с")
+        self._prune()
+        self._condition.notify_all()
+
+    def _prune(self):
+        finished = sorted((record for record in self.jobs.values() if record['state'] in FINISHED),
+                          key=lambda record: record['finished'] or 0)
+        for record in finished[:max(len(finished) - MAX_FINISHED, 0)]:
+            del self.jobs[record['id']]
+
+    def _collect_progress(self):
+        while True:
+            item = self._progress_queue.get()
+            if item is None:
+                return
+            job_id, event = item
+            with self._condition:
+                record = self.jobs.get(job_id)
+                if record is None or record['state'] != RUNNING:
+                    continue
+                if event is not None:
+                    record['events'].append({**event, 'time': time.time()})
+                    self._condition.notify_all()
+                elif job_id in self._futures:
+                    self._complete(record, self._futures[job_id])
+                else:
+                    self._closed.add(job_id)
+
+    def record(self, job_id):
+        record = self.jobs.get(job_id)
+        if record is None:
+            raise KeyError(f'Нет задания {job_id}')
+        return record
+
+    def status(self, job_id):
+        """
+        Состояние задания без результата.
+
+        Returns:
+            dict: id, user, priority, state, column, position (место в очереди), progress
+                (последнее событие), error и время постановки, запуска и завершения.
+        """
+        with self._condition:
+            record = self.record(job_id)
+            queued = [queued['id'] for queued in self.queued()]
+            status = {key: value for key, value in record.items() if key not in ('events', 'result', 'job')}
+            status['position'] = queued.index(job_id) + 1 if job_id in queued else None
+            status['progress'] = record['events'][-1] if record['events'] else None
+            return status
+
+    def list_jobs(self, user=None):
+        with self._condition:
+            job_ids = [job_id for job_id, record in self.jobs.items() if user is None or record['user'] == user]
+        return [self.status(job_id) for job_id in job_ids if job_id in self.jobs]
+
+    def events(self, job_id, since=0, timeout=None):
+        """
+        События задания начиная с номера since; ждет новые события не дольше timeout.
+
+        Returns:
+            tuple[list[dict], str]: события и состояние задания.
+        """
+        with self._condition:
+            record = self.record(job_id)
+            self._condition.wait_for(lambda: len(record['events']) > since or record['state'] in FINISHED, timeout)
+            return record['events'][since:], record['state']
+
+    def result(self, job_id, timeout=None):
+        """
+        Ждет завершения задания не дольше timeout.
+
+        Returns:
+            dict: состояние задания (status) и result - summary, gauss, curves, x_column.
+        """
+        with self._condition:
+            record = self.record(job_id)
+            if not self._condition.wait_for(lambda: record['state'] in FINISHED, timeout):
+                raise TimeoutError(f'Задание {job_id} не завершено за {timeout} с')
+        return {**self.status(job_id), 'result': record['result']}
+
+    def cancel(self, job_id):
+        """
+        Отменяет задание, которое еще не запущено.
+
+        Returns:
+            bool: True, если задание отменено.
+        """
+        with self._condition:
+            record = self.record(job_id)
+            if record['state'] != QUEUED:
+                return False
+            record.update({'state': CANCELLED, 'finished': time.time()})
+            record.pop('job', None)
+            record['events'].append({'stage': CANCELLED, 'time': record['finished']})
+            self._condition.notify_all()
+        return True
+
+    def stats(self):
+        with self._condition:
+            states = Counter(record['state'] for record in self.jobs.values())
+            return {'workers': self.workers, 'states': dict(states), 'running': dict(+self.running),
+                    'usage': dict(self.usage)}
+
+    def shutdown(self, wait=True):
+        """
+        Отменяет задания в очереди и останавливает пул (дожидаясь выполняющихся при wait).
+        """
+        with self._condition:
+            if self.stopped:
+                return
+            for record in self.queued():
+                self.cancel(record['id'])
+            self.stopped = True
+            self._condition.notify_all()
+        self._executor.shutdown(wait=wait)
+        self._progress_queue.put(None)
+
+
+class JobServer:
+    """
+    Локальный сервер заданий: JobScheduler, принимающий запросы JobClient через
+    multiprocessing.connection (TCP на localhost или сокет Unix, аутентификация общим ключом).
+
+    Каждое соединение обслуживается в своем потоке. Запрос - словарь с ключом op
+    (submit, status, jobs, events, result, cancel, stats, subscribe, shutdown), ответ -
+    {'ok': True, 'value': ...} или {'ok': False, 'error': ...}. На subscribe сервер присылает
+    события задания ({'event': ...}) до его завершения, последним - {'done': True, 'state': ...}.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, workers=None, blas_threads=1,
+                 log_level=logging.WARNING, authkey_file=None, socket_mode=SOCKET_MODE):
+        """
+        Args:
+            address (str | tuple): 'host:port' или путь к сокету Unix.
+            authkey (str | bytes, optional): ключ; без него читается authkey_file или переменные окружения.
+            workers (int, optional): число процессов пула.
+            blas_threads (int): потоков BLAS в каждом процессе.
+            log_level (int): уровень логирования в процессах пула.
+            authkey_file (str, optional): файл ключа.
+            socket_mode (int): права сокета Unix (например 0o660, чтобы подключалась группа).
+
+        Raises:
+            ValueError: ключ не задан.
+        """
+        self.authkey = get_authkey(authkey, authkey_file)
+        address = parse_address(address)
+        if is_unix_socket(address):
+            # Сокет сразу создается без прав для остальных, затем получает socket_mode.
+            # umask общий для процесса, поэтому сервер создается до запуска пула и потоков заданий.
+            old_umask = os.umask(0o177)
+            try:
+                self.listener = Listener(address, authkey=self.authkey)
+            finally:
+                os.umask(old_umask)
+            os.chmod(address, socket_mode)
+        else:
+            self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.scheduler = JobScheduler(workers, blas_threads, log_level)
+        self._stop = threading.Event()
+        logger.info(f'Сервер заданий: {self.address}, процессов {self.scheduler.workers}')
+
+    def serve_forever(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    connection = self.listener.accept()
+                except AuthenticationError as e:
+                    logger.warning(f'Отклонено соединение: {e}')
+                    continue
+                except OSError:
+                    if self._stop.is_set():
+                        break
+                    raise
+                threading.Thread(target=self.handle, args=(connection,), name='job_connection', daemon=True).start()
+        finally:
+            self.listener.close()
+            self.scheduler.shutdown(wait=True)
+            logger.info('Сервер заданий остановлен')
+
+    def stop(self):
+        self._stop.set()
+        # accept не прерывается закрытием сокета из другого потока, поэтому сервер будится соединением
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+
+    def handle(self, connection):
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+                op = request.pop('op', None)
+                try:
+                    if op == 'subscribe':
+                        self.stream(connection, request['job_id'])
+                        continue
+                    response = {'ok': True, 'value': self.call(op, request)}
+                except Exception as e:
+                    response = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+                try:
+                    connection.send(response)
+                except OSError:
+                    return
+                if op == 'shutdown':
+                    self.stop()
+                    return
+
+    def call(self, op, request):
+        scheduler = self.scheduler
+        handlers = {
+            'submit': lambda: scheduler.submit(request['job'], request.get('user', ''), request.get('priority', 0)),
+            'status': lambda: scheduler.status(request['job_id']),
+            'jobs': lambda: scheduler.list_jobs(request.get('user')),
+            'events': lambda: scheduler.events(request['job_id'], request.get('since', 0), request.get('timeout')),
+            'result': lambda: scheduler.result(request['job_id'], request.get('timeout')),
+            'cancel': lambda: scheduler.cancel(request['job_id']),
+            'stats': scheduler.stats,
+            'shutdown': lambda: True,
+        }
+        if op not in handlers:
+            raise ValueError(f'Неизвестная операция {op}, допустимы: {sorted(handlers) + ["subscribe"]}')
+        return handlers[op]()
+
+    def stream(self, connection, job_id):
+        since = 0
+        while True:
+            events, state = self.scheduler.events(job_id, since, timeout=1.0)
+            since += len(events)
+            for event in events:
+                connection.send({'ok': True, 'event': event})
+            if state in FINISHED and not events:
+                connection.send({'ok': True, 'done': True, 'state': state})
+                return
+
+
+class JobClient:
+    """
+    Клиент сервера заданий (интерфейс, batch-скрипты, job_server.py submit).
+
+    Одно соединение не используется несколькими потоками одновременно.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, authkey_file=None):
+        self.connection = Client(parse_address(address), authkey=get_authkey(authkey, authkey_file))
+
+    def request(self, op, **kwargs):
+        self.connection.send({'op': op, **kwargs})
+        response = self.connection.recv()
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response['value']
+
+    def submit(self, x_values, y_values, column='rate', config=None, x_column=TEMPERATURE_COLUMN, file='',
+               user=None, priority=0):
+        """
+        Отправляет кривую на деконволюцию (см. src.batch.deconvolve_curve).
+
+        Args:
+            x_values, y_values (array_like): температура и исходная кривая.
+            column (str): имя кривой.
+            config (dict, optional): конфигурация в формате batch (options, gauss, peak_types, seed).
+            x_column (str): имя столбца x в кривых результата.
+            file (str): имя файла для сводки.
+            user (str, optional): пользователь, по умолчанию текущий.
+            priority (int): приоритет задания.
+
+        Returns:
+            int: номер задания.
+        """
+        job = {'x': np.asarray(x_values, dtype=np.float64), 'y': np.asarray(y_values, dtype=np.float64),
+               'column': column, 'config': config or {}, 'x_column': x_column, 'file': file}
+        return self.request('submit', job=job, user=user or getpass.getuser(), priority=priority)
+
+    def status(self, job_id):
+        return self.request('status', job_id=job_id)
+
+    def jobs(self, user=None):
+        return self.request('jobs', user=user)
+
+    def events(self, job_id, since=0, timeout=None):
+        return self.request('events', job_id=job_id, since=since, timeout=timeout)
+
+    def result(self, job_id, timeout=None):
+        return self.request('result', job_id=job_id, timeout=timeout)
+
+    def cancel(self, job_id):
+        return self.request('cancel', job_id=job_id)
+
+    def stats(self):
+        return self.request('stats')
+
+    def subscribe(self, job_id):
+        """
+        События задания по мере выполнения (derivative, running, fit, uncertainty, done/failed).
+
+        Yields:
+            dict: событие.
+        """
+        self.connection.send({'op': 'subscribe', 'job_id': job_id})
+        while True:
+            response = self.connection.recv()
+            if not response['ok']:
+                raise RuntimeError(response['error'])
+            if response.get('done'):
+                return
+            yield response['event']
+
+    def shutdown(self):
+        return self.request('shutdown')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class MinMaxPyramid:
+    """
+    Многоуровневое прореживание ряда с сохранением формы (min/max по корзинам).
+
+    Уровень с размером корзины s хранит для каждой корзины индексы минимума и максимума y.
+    Уровни строятся один раз за O(n), каждый следующий объединяет пары корзин предыдущего,
+    после чего запрос видимого диапазона стоит O(число пикселей).
+
+    Attributes:
+        x (np.ndarray): исходные значения x (должны возрастать).
+        y (np.ndarray): исходные значения y.
+        levels (list): список (размер корзины, индексы минимумов, индексы максимумов).
+    """
+
+    def __init__(self, x, y):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        # Поиск диапазона по searchsorted возможен только для неубывающей сетки
+        self.monotonic = self.x.size < 2 or bool(np.all(np.diff(self.x) >= 0))
+        self.levels = []
+        if self.monotonic:
+            self.build()
+
+    def build(self):
+        y = self.y
+        imin = imax = np.arange(y.size)
+        size = 1
+        while imin.size > 1:
+            paired = imin.size // 2 * 2
+            a_min, b_min = imin[0:paired:2], imin[1:paired:2]
+            a_max, b_max = imax[0:paired:2], imax[1:paired:2]
+            new_min = np.where(y[b_min] < y[a_min], b_min, a_min)
+            new_max = np.where(y[b_max] > y[a_max], b_max, a_max)
+            if imin.size > paired:
+                # Нечетная последняя корзина переходит на следующий уровень без пары
+                new_min = np.append(new_min, imin[-1])
+                new_max = np.append(new_max, imax[-1])
+            imin, imax = new_min, new_max
+            size *= 2
+            self.levels.append((size, imin, imax))
+
+    def query(self, x_min, x_max, n_buckets):
+        """
+        Точки для отображения диапазона [x_min, x_max] при ширине n_buckets пикселей.
+
+        Если в диапазон попадает не больше 2 * n_buckets точек, возвращаются исходные данные,
+        иначе - минимум и максимум каждой корзины в порядке следования по x.
+
+        Args:
+            x_min (float): левая граница видимой области.
+            x_max (float): правая граница видимой области.
+            n_buckets (int): число корзин (обычно ширина осей в пикселях).
+
+        Returns:
+            tuple: массивы x и y для линии.
+        """
+        if not self.monotonic:
+            return self.x, self.y
+        n_points = self.x.size
+        # Соседние точки за границами оставляются, чтобы линия доходила до края осей
+        start = max(int(np.searchsorted(self.x, x_min, side='left')) - 1, 0)
+        stop = min(int(np.searchsorted(self.x, x_max, side='right')) + 1, n_points)
+        count = stop - start
+        if count <= 2 * n_buckets:
+            return self.x[start:stop], self.y[start:stop]
+
+        for size, imin, imax in self.levels:
+            if count / size <= n_buckets:
+                break
+        first, last = start // size, -(-stop // size)
+        lower = np.minimum(imin[first:last], imax[first:last])
+        upper = np.maximum(imin[first:last], imax[first:last])
+        indices = np.concatenate(([start], np.column_stack((lower, upper)).ravel(), [stop - 1]))
+        indices = np.unique(indices[(indices >= start) & (indices < stop)])
+        return self.x[indices], self.y[indices]
@@ -1,17 +1,105 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - : %(message)s'
+LOG_DATE_FORMAT = '%H:%M:%S'
+# Аргументы этих типов не изменяются после вызова логирования, их можно форматировать позже
+IMMUTABLE_ARG_TYPES = (str, bytes, int, float, complex, bool, type(None))
+
+
+class DispatchHandler(logging.Handler):
+    """
+    Обработчик фонового слушателя очереди логов.
+
+    Хранит изменяемый набор конечных обработчиков (консоль, файл лога текущего CSV),
+    чтобы файл лога можно было заменить, а не добавлять новый при каждой загрузке.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.handlers = {}
+
+    def set_handler(self, name, handler):
+        self.acquire()
+        try:
+            old_handler = self.handlers.pop(name, None)
+            if handler is not None:
+                self.handlers[name] = handler
+        finally:
+            self.release()
+        if old_handler is not None:
+            old_handler.close()
+
+    def handle(self, record):
+        for handler in list(self.handlers.values()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def close(self):
+        for handler in list(self.handlers.values()):
+            handler.close()
+        super().close()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler, который по возможности не форматирует запись в вызывающем потоке.
+
+    Стандартный prepare подставляет аргументы в сообщение и форматирует traceback еще до
+    постановки в очередь. Здесь запись с неизменяемыми аргументами (строки, числа) кладется
+    как есть и форматируется обработчиком слушателя. Если среди аргументов есть изменяемые
+    объекты (например, DataFrame, который правится сразу после вызова), сообщение
+    форматируется сразу, иначе слушатель записал бы значения, которых никогда не было.
+    """
+
+    def prepare(self, record):
+        args = record.args
+        if isinstance(args, dict):
+            args = args.values()
+        if args and not all(isinstance(arg, IMMUTABLE_ARG_TYPES) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+log_queue = queue.SimpleQueue()
+dispatch_handler = DispatchHandler()
+
 
 def configure_logger():
     logger = logging.getLogger(__name__)
     logger.setLevel(logging.INFO)
 
-    handler = logging.StreamHandler()
-    
     # Измените эту строку для нового формата
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - : %(message)s', datefmt='%H:%M:%S')
-    
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+
+    handler = logging.StreamHandler()
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    dispatch_handler.set_handler('stream', handler)
+
+    # В вызывающем потоке запись только кладется в очередь,
+    # форматирование и запись в файлы выполняет фоновый слушатель
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    listener = QueueListener(log_queue, dispatch_handler)
+    listener.start()
+    atexit.register(listener.stop)
 
     return logger
 
+
+def set_log_file(path):
+    """
+    Направляет лог в файл, заменяя ранее установленный файл лога.
+
+    Args:
+        path (str | Path): путь к файлу лога.
+    """
+    file_handler = logging.FileHandler(path, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+    dispatch_handler.set_handler('file', file_handler)
+
+
 logger = configure_logger()
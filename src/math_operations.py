@@ -1,17 +1,22 @@
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import pyqtSignal
 import numpy as np
 import pandas as pd
-from scipy.optimize import curve_fit
 
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 from src.logger_config import logger
+from src.instrumentation import instrumentation
+from src.resources import governor
+from src.metrics import residual_metrics, best_index, combination_params, METRICS
 
 
-class ComputeCombinationThread(QThread):
-    
+class ComputeCombinationTask:
+    """
+    Подбор одной комбинации пиков, выполняется в пуле потоков compute_best_peaks.
+    """
+
     def __init__(self, x_values, y_values, combination, initial_params, maxfev, bounds, coeff_1, s1, s2, results_dict, lock, console_message_signal):
-        super().__init__()
         self.x_values = x_values
         self.y_values = y_values
         self.combination = combination
@@ -26,34 +31,46 @@ class ComputeCombinationThread(QThread):
         self.result = None
         self.console_message_signal = console_message_signal
 
+    @instrumentation.timed('combination_fit')
     def run(self):
-        try:
-            logger.debug(f"Запуск потока для комбинации {self.combination}.")
+        with instrumentation.profile():
+            self.fit()
 
-            def fit_function(x, *params):
-                return MathOperations.peaks(x, self.combination, self.coeff_1, self.s1, self.s2, *params)
+    def fit(self):
+        try:
+            logger.debug("Запуск подбора комбинации %s.", self.combination)
 
-            popt, _ = curve_fit(fit_function, self.x_values, self.y_values, p0=self.initial_params, maxfev=self.maxfev, bounds=self.bounds, method='trf')
-            predicted = MathOperations.peaks(self.x_values, self.combination, self.coeff_1, self.s1, self.s2, *popt)
-            rmse = np.sqrt(np.mean((self.y_values - predicted) ** 2))
-            self.result = (self.combination, popt, rmse)
+            # Слот governor ограничивает подборы всех пулов процесса вместе (поиск числа пиков, бутстреп)
+            with governor.slot():
+                popt, pcov, rmse = MathOperations.fit_combination(
+                    self.x_values, self.y_values, self.combination, self.initial_params, 
+                    self.maxfev, self.bounds, self.coeff_1, self.s1, self.s2)
+            residuals = np.asarray(self.y_values, dtype=float) - MathOperations.peaks(
+                np.asarray(self.x_values, dtype=float), self.combination, self.coeff_1, self.s1, self.s2, *popt)
+            self.result = (self.combination, popt, rmse, pcov, residuals)
             
             with self.lock:
                 if self.result:
                     logger.info(f"Комбинация: {self.combination} RMSE: {np.round(rmse, 5)}")
-                    self.console_message_signal.emit(f"Комбинация: {self.combination}\n RMSE: {np.round(rmse, 4)}")
-                    self.results_dict[self.combination] = {'popt': self.result[1], 'rmse': self.result[2]}
+                    self.emit_console(f"Комбинация: {self.combination}\n RMSE: {np.round(rmse, 4)}")
+                    self.results_dict[self.combination] = {
+                        'popt': self.result[1], 'rmse': self.result[2], 'pcov': self.result[3], 'residuals': self.result[4]}
                 else:
                     logger.warning(f"Результат не найден для комбинации:\n {self.combination}")
-                logger.debug(f"Поток для комбинации: {self.combination} завершился успешно.")
+                logger.debug("Подбор комбинации: %s завершился успешно.", self.combination)
                 
         except RuntimeError:
             logger.exception(f"Не удалось подобрать комбинацию:\n {self.combination}")
-            self.console_message_signal.emit(f"Не удалось подобрать комбинацию:\n {self.combination}\n \
+            self.emit_console(f"Не удалось подобрать комбинацию:\n {self.combination}\n \
                                              Попробуйте увеличить maxvef в options.\n \
                                              или пересмотрите ограничения на форму пиков.")
         except Exception as e:
-            logger.exception(f"Неожиданное исключение в потоке для комбинации:\n {self.combination}: {str(e)}")
+            logger.exception(f"Неожиданное исключение при подборе комбинации:\n {self.combination}: {str(e)}")
+
+    def emit_console(self, message):
+        # В headless режиме (бенчмарки, CLI) сигнала консоли нет
+        if self.console_message_signal is not None:
+            self.console_message_signal.emit(message)
          
 
 class MathOperations:
@@ -105,6 +122,15 @@ class MathOperations:
         result = h * term1 * term2
         return result
 
+    @staticmethod
+    def peak_component(x: np.array, peak_type: str, h: float, z: float, w: float, coeff_a: float, s1: float, s2: float) -> np.array:
+        if peak_type == 'gauss':
+            return MathOperations.gaussian(x, h, z, w)
+        elif peak_type == 'ads':
+            return MathOperations.asymmetric_double_sigmoid(x, h, z, w, s1, s2)
+        # fraser и неизвестные типы (например, 'frazer' по умолчанию) строятся как Фрейзер-Сузуки
+        return MathOperations.fraser_suzuki(x, h, z, w, coeff_a)
+
     @staticmethod
     def peaks(x: np.array, peak_types: list, coeff_1: list, s1: list, s2: list, *params: float) -> np.array:
         y = np.zeros_like(x)
@@ -121,6 +147,26 @@ class MathOperations:
 
         return y
     
+    @staticmethod
+    def fit_combination(
+        x_values: np.array, y_values: np.array, combination: tuple[str, ...], initial_params: list[float],
+        maxfev: int, bounds: tuple[list[float], list[float]], coeff_1: list[float], s1: list[float], s2: list[float]
+        ) -> Tuple[np.array, np.array, float]:
+        
+        from scipy.optimize import curve_fit
+
+        x_values = np.asarray(x_values, dtype=float)
+        y_values = np.asarray(y_values, dtype=float)
+
+        def fit_function(x, *params):
+            return MathOperations.peaks(x, combination, coeff_1, s1, s2, *params)
+
+        with instrumentation.timer('curve_fit'):
+            popt, pcov = curve_fit(fit_function, x_values, y_values, p0=initial_params, maxfev=maxfev, bounds=bounds, method='trf')
+        predicted = MathOperations.peaks(x_values, combination, coeff_1, s1, s2, *popt)
+        rmse = np.sqrt(np.mean((y_values - predicted) ** 2))
+        return popt, pcov, rmse
+    
     @staticmethod
     def check_and_adjust_params_within_bounds(float_peaks_params: list[float], peaks_bounds: tuple[list[float], list[float]]) -> list[float]:
         lower_bounds, upper_bounds = peaks_bounds
@@ -137,16 +183,19 @@ class MathOperations:
 
     
     @staticmethod
+    @instrumentation.timed('compute_best_peaks')
     def compute_best_peaks(
         x_values: np.array, y_values: np.array, 
         peaks_params: list[str], maxfev: int, coeff_1: list[float], s1: list[float], s2: list[float],
         combinations: list[str], peaks_bounds: tuple[list[float], list[float]],
-        console_message_signal: pyqtSignal
+        console_message_signal: pyqtSignal = None, results_dict: dict = None, rank_by: str = 'rmse'
         ) -> Tuple[np.array, Tuple[str, ...], float]:
+        # results_dict, если передан, получает popt, pcov, невязки и метрики всех подобранных комбинаций;
+        # лучшая комбинация выбирается по метрике rank_by (см. src.metrics.METRICS)
         
         logger.info("Начало деконволюции пиков.")
-        logger.debug(f"Полученные начальные параметры: {peaks_params}")
-        logger.debug(f"Полученные peaks_bounds: {peaks_bounds}")
+        logger.debug("Полученные начальные параметры: %s", peaks_params)
+        logger.debug("Полученные peaks_bounds: %s", peaks_bounds)
         
         #float_peaks_params = list(map(float, peaks_params))
         #adjusted_params = MathOperations.check_and_adjust_params_within_bounds(float_peaks_params, peaks_bounds)
@@ -155,31 +204,37 @@ class MathOperations:
         best_popt = None
         best_combination = None
         
-        results_dict = {}  # Пустой словарь для результатов
+        if results_dict is None:
+            results_dict = {}  # Пустой словарь для результатов
         lock = threading.Lock()
-        threads = []
-        
-        for combination in combinations:
-            thread = ComputeCombinationThread(
-                x_values, y_values, combination, peaks_params, 
-                maxfev, peaks_bounds, coeff_1, s1, s2, results_dict, lock, console_message_signal)
-            thread.start()
-            threads.append(thread)
-        
-        # Ожидание завершения всех потоков
-        for thread in threads:
-            thread.wait()
+        combinations = list(combinations)
+
+        # Комбинации подбираются пулом из governor.pool_size() потоков, а не отдельным потоком каждая;
+        # выход из with ждет завершения всех подборов
+        with ThreadPoolExecutor(max_workers=governor.pool_size(len(combinations))) as executor:
+            for combination in combinations:
+                executor.submit(ComputeCombinationTask(
+                    x_values, y_values, combination, peaks_params,
+                    maxfev, peaks_bounds, coeff_1, s1, s2, results_dict, lock, console_message_signal).run)
 
         if not results_dict:
-            logger.error("Не удалось найти подходящую комбинацию. Все потоки завершились ошибками.")
+            logger.error("Не удалось найти подходящую комбинацию. Все подборы завершились ошибками.")
             return None, None, None
         
+        # Метрики всех комбинаций считаются одним проходом по матрице невязок
+        fitted = list(results_dict)
+        metrics = residual_metrics(
+            np.vstack([results_dict[combination]['residuals'] for combination in fitted]), y_values,
+            [combination_params(combination) for combination in fitted])
+        for i, combination in enumerate(fitted):
+            results_dict[combination].update({name: float(metrics[name][i]) for name in METRICS})
+
         # Нахождение лучшей комбинации
-        best_combination = min(results_dict, key=lambda k: results_dict[k]['rmse'])
+        best_combination = fitted[best_index(metrics, rank_by)]
         best_popt = results_dict[best_combination]['popt']
         best_rmse = results_dict[best_combination]['rmse']
 
-        logger.info(f"Лучшая комбинация: {best_combination} RMSE: {np.round(best_rmse, 4)}")
+        logger.info(f"Лучшая комбинация по {rank_by}: {best_combination} RMSE: {np.round(best_rmse, 4)}")
         logger.debug("Конец метода compute_best_peaks.")
         
         return best_popt, best_combination, best_rmse
\ No newline at end of file
@@ -0,0 +1,77 @@
+import numpy as np
+
+METRICS = ('rmse', 'r2', 'aic', 'bic', 'max_residual')
+# Метрики, у которых лучше большее значение
+HIGHER_IS_BETTER = {'r2'}
+# Коэффициенты формы пика, которые подбираются внешним оптимизатором, тоже считаются параметрами модели
+SHAPE_PARAMS = {'gauss': 0, 'fraser': 1, 'ads': 2}
+
+
+def combination_params(combination):
+    """
+    Число параметров модели: height, center, width каждого пика и его коэффициенты формы.
+    """
+    return sum(3 + SHAPE_PARAMS.get(peak_type, 1) for peak_type in combination)
+
+
+def residual_metrics(residuals, y_values, n_params):
+    """
+    Метрики качества для нескольких подборов одной кривой за один проход.
+
+    AIC = n ln(RSS / n) + 2k, BIC = n ln(RSS / n) + k ln(n), где k - число подбираемых параметров.
+
+    Args:
+        residuals (array_like): невязки (число подборов x число точек) или одна строка невязок.
+        y_values (array_like): экспериментальная кривая (для R²).
+        n_params (int | array_like): число параметров каждого подбора.
+
+    Returns:
+        dict: имя метрики -> массив значений по подборам (rss и все METRICS).
+    """
+    residuals = np.atleast_2d(np.asarray(residuals, dtype=np.float64))
+    y_values = np.asarray(y_values, dtype=np.float64)
+    n_fits, n_points = residuals.shape
+    n_params = np.broadcast_to(np.asarray(n_params, dtype=np.float64), (n_fits,))
+
+    rss = np.einsum('ij,ij->i', residuals, residuals)
+    total_ss = np.sum((y_values - y_values.mean()) ** 2)
+    log_likelihood_term = n_points * np.log(np.maximum(rss, np.finfo(np.float64).tiny) / n_points)
+    return {
+        'rss': rss,
+        'rmse': np.sqrt(rss / n_points),
+        'r2': 1 - rss / total_ss if total_ss > 0 else np.full(n_fits, np.nan),
+        'aic': log_likelihood_term + 2 * n_params,
+        'bic': log_likelihood_term + n_params * np.log(n_points),
+        'max_residual': np.max(np.abs(residuals), axis=1),
+    }
+
+
+def rank(metrics, by='rmse'):
+    """
+    Порядок подборов от лучшего к худшему по выбранной метрике.
+
+    Returns:
+        np.ndarray: индексы подборов.
+    """
+    if by not in METRICS:
+        raise ValueError(f'Неизвестная метрика {by}, допустимы: {METRICS}')
+    values = np.asarray(metrics[by], dtype=np.float64)
+    # nan (например, R² постоянной кривой) всегда в конце
+    key = -values if by in HIGHER_IS_BETTER else values
+    return np.argsort(np.where(np.isnan(key), np.inf, key), kind='stable')
+
+
+def best_index(metrics, by='rmse'):
+    return int(rank(metrics, by)[0])
+
+
+def objective_value(value, by='rmse'):
+    """
+    Значение метрики как минимизируемая цель внешнего оптимизатора.
+
+    Знак метрик из HIGHER_IS_BETTER меняется, nan заменяется на inf.
+    """
+    value = float(value)
+    if np.isnan(value):
+        return np.inf
+    return -value if by in HIGHER_IS_BETTER else value
@@ -0,0 +1,169 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+
+from src.math_operations import MathOperations
+from src.metrics import residual_metrics, METRICS
+from src.resources import governor
+from src.logger_config import logger
+
+CRITERIA = ('aic', 'bic', 'rmse')
+
+
+def residual_peak(x_values, residuals):
+    """
+    Начальные параметры нового пика в точке наибольшей невязки.
+
+    Returns:
+        list[float]: height, center, width.
+    """
+    from scipy import signal
+
+    i = int(np.argmax(residuals))
+    step = float(np.mean(np.diff(x_values)))
+    width_points = signal.peak_widths(residuals, [i], rel_height=0.5)[0][0]
+    return [float(residuals[i]), float(x_values[i]), max(width_points * step / 2.355, step)]
+
+
+def order_bounds(x_values, y_values, n_peaks):
+    # Для разного числа пиков границы общие: высота до удвоенного максимума, центр в пределах кривой
+    step = float(np.mean(np.diff(x_values)))
+    span = float(x_values[-1] - x_values[0])
+    lower = [min(0.0, 2 * float(np.min(y_values))), float(x_values[0]), step] * n_peaks
+    upper = [2 * float(np.max(y_values)), float(x_values[-1]), span / 2] * n_peaks
+    return lower, upper
+
+
+class ModelOrderSearch:
+    """
+    Подбор числа пиков: модели из N_min...N_max пиков ранжируются по информационным критериям.
+
+    Модель из N пиков стартует с решения для N - 1 пиков, к которому добавлен пик в точке
+    наибольшей невязки. Для нового пика перебираются все типы из peak_types, кандидаты
+    подбираются параллельно в пуле потоков. Наименьшая модель стартует с пиков таблицы gauss.
+    Коэффициенты формы при этом не оптимизируются, поэтому каждый кандидат - один curve_fit.
+    Предлагается самая простая модель, критерий которой хуже лучшего не более чем на delta.
+
+    Attributes:
+        candidates (list[dict]): лучшая модель каждого N (n_peaks, combination, popt, coeff_a,
+            s1, s2, residuals, метрики src.metrics, seconds).
+        best (dict): предлагаемая модель.
+    """
+
+    def __init__(self, x_values, y_values, initial_peaks, n_min, n_max, peak_types, maxfev,
+                 coeff_a, s1, s2, criterion='bic', delta=0.0, max_workers=None):
+        """
+        Args:
+            x_values, y_values (array_like): DTG кривая.
+            initial_peaks (list[dict]): строки таблицы gauss (height, center, width, type, coeff_a,
+                coeff_s1, coeff_s2), из которых берется начальная модель.
+            n_min, n_max (int): диапазон числа пиков.
+            peak_types (list[str]): типы, перебираемые для новых пиков.
+            maxfev (int): ограничение числа вычислений curve_fit.
+            coeff_a, s1, s2 (float): коэффициенты формы новых пиков.
+            criterion (str): критерий выбора модели: aic, bic или rmse.
+            delta (float): допустимое ухудшение критерия ради меньшего числа пиков.
+            max_workers (int, optional): число потоков для кандидатов одного N, по умолчанию по governor.
+        """
+        self.x_values = np.asarray(x_values, dtype=float)
+        self.y_values = np.asarray(y_values, dtype=float)
+        # Начальная модель - самые высокие пики таблицы gauss
+        self.initial_peaks = sorted(initial_peaks, key=lambda row: -float(row['height']))
+        self.n_min = max(int(n_min), 1)
+        self.n_max = max(int(n_max), self.n_min)
+        self.peak_types = list(peak_types)
+        self.maxfev = maxfev
+        self.new_shape = (float(coeff_a), float(s1), float(s2))
+        if criterion not in CRITERIA:
+            raise ValueError(f'Неизвестный критерий {criterion}, допустимы: {CRITERIA}')
+        self.criterion = criterion
+        self.delta = float(delta)
+        self.max_workers = max_workers
+        self.candidates = []
+        self.best = None
+
+    def fit_candidate(self, combination, params, coeff_a, s1, s2):
+        bounds = order_bounds(self.x_values, self.y_values, len(combination))
+        params = np.clip(params, bounds[0], bounds[1])
+        try:
+            with governor.slot():
+                popt, _, _ = MathOperations.fit_combination(
+                    self.x_values, self.y_values, combination, params, self.maxfev, bounds, coeff_a, s1, s2)
+        except (RuntimeError, ValueError) as e:
+            logger.warning(f'Модель {combination} не подобрана: {e}')
+            return None
+        residuals = self.y_values - MathOperations.peaks(self.x_values, combination, coeff_a, s1, s2, *popt)
+        return {'n_peaks': len(combination), 'combination': tuple(combination), 'popt': popt,
+                'coeff_a': list(coeff_a), 's1': list(s1), 's2': list(s2), 'residuals': residuals}
+
+    def start_model(self):
+        # Наименьшая модель: пики таблицы gauss, недостающие добавляются по невязке
+        peaks = self.initial_peaks[:self.n_min]
+        params = [float(row[key]) for row in peaks for key in ('height', 'center', 'width')]
+        coeff_a = [float(row.get('coeff_a', self.new_shape[0])) for row in peaks]
+        s1 = [float(row.get('coeff_s1', self.new_shape[1])) for row in peaks]
+        s2 = [float(row.get('coeff_s2', self.new_shape[2])) for row in peaks]
+        while len(params) < 3 * self.n_min:
+            model = MathOperations.peaks(self.x_values, ['gauss'] * (len(params) // 3), coeff_a, s1, s2, *params)
+            params.extend(residual_peak(self.x_values, self.y_values - model))
+            coeff_a.append(self.new_shape[0])
+            s1.append(self.new_shape[1])
+            s2.append(self.new_shape[2])
+        candidates = [(combination, params) for combination in product(self.peak_types, repeat=self.n_min)]
+        return candidates, coeff_a, s1, s2
+
+    def grow(self, previous):
+        # Модель из N пиков: решение для N - 1 пиков и новый пик в точке наибольшей невязки
+        residuals = self.y_values - MathOperations.peaks(
+            self.x_values, previous['combination'], previous['coeff_a'], previous['s1'], previous['s2'],
+            *previous['popt'])
+        params = list(previous['popt']) + residual_peak(self.x_values, residuals)
+        coeff_a = previous['coeff_a'] + [self.new_shape[0]]
+        s1 = previous['s1'] + [self.new_shape[1]]
+        s2 = previous['s2'] + [self.new_shape[2]]
+        candidates = [(previous['combination'] + (peak_type,), params) for peak_type in self.peak_types]
+        return candidates, coeff_a, s1, s2
+
+    def run(self, progress=None, callback=None):
+        """
+        Подбирает модели из N_min...N_max пиков.
+
+        Args:
+            progress (callable, optional): progress(candidate) после каждого N.
+            callback (callable, optional): вызывается перед каждым N, True останавливает поиск.
+
+        Returns:
+            list[dict]: кандидаты (см. атрибут candidates).
+        """
+        previous = None
+        with ThreadPoolExecutor(max_workers=self.max_workers or governor.pool_size(len(self.peak_types))) as executor:
+            for n_peaks in range(self.n_min, self.n_max + 1):
+                if callback is not None and callback(None):
+                    break
+                start = time.perf_counter()
+                candidates, coeff_a, s1, s2 = self.start_model() if previous is None else self.grow(previous)
+                fitted = [result for result in executor.map(
+                    lambda candidate: self.fit_candidate(*candidate, coeff_a, s1, s2), candidates)
+                    if result is not None]
+                if not fitted:
+                    logger.error(f'Ни одна модель из {n_peaks} пиков не подобрана')
+                    break
+                # Коэффициенты формы здесь не подбираются, поэтому параметров три на пик
+                metrics = residual_metrics([result['residuals'] for result in fitted], self.y_values,
+                                           [3 * len(result['combination']) for result in fitted])
+                for i, result in enumerate(fitted):
+                    result.update({name: float(metrics[name][i]) for name in ('rss', *METRICS)})
+                previous = min(fitted, key=lambda result: result['rss'])
+                previous['seconds'] = time.perf_counter() - start
+                self.candidates.append(previous)
+                logger.info(f"{n_peaks} пиков {previous['combination']}: RMSE {previous['rmse']:.5f}, "
+                            f"AIC {previous['aic']:.1f}, BIC {previous['bic']:.1f}, {previous['seconds']:.2f} с")
+                if progress:
+                    progress(previous)
+        if self.candidates:
+            threshold = min(candidate[self.criterion] for candidate in self.candidates) + self.delta
+            self.best = min((candidate for candidate in self.candidates if candidate[self.criterion] <= threshold),
+                            key=lambda candidate: candidate['n_peaks'])
+        return self.candidates
@@ -0,0 +1,149 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from src.deconvolution import DeconvolutionProblem, options_to_dict
+from src.resources import governor
+from src.logger_config import logger
+
+
+def observed_peak_shift(x_reference, y_reference, x_values, y_values):
+    """
+    Сдвиг главного максимума DTG кривой относительно опорной скорости нагрева.
+
+    Returns:
+        tuple[float, float]: сдвиг по x и отношение высот максимумов.
+    """
+    i_reference = int(np.argmax(y_reference))
+    i_target = int(np.argmax(y_values))
+    scale = y_values[i_target] / y_reference[i_reference] if y_reference[i_reference] else 1.0
+    return float(x_values[i_target] - x_reference[i_reference]), float(scale)
+
+
+def shift_peaks(peaks_params, peaks_bounds, shift, scale):
+    """
+    Переносит параметры пиков и их границы на другую скорость нагрева.
+
+    Центры и их границы сдвигаются на shift, высоты и их границы умножаются на scale,
+    ширины не меняются.
+
+    Args:
+        peaks_params (list[float]): height, center, width для каждого пика.
+        peaks_bounds (tuple[list[float], list[float]]): нижние и верхние границы в том же порядке.
+        shift (float): сдвиг центров.
+        scale (float): множитель высот.
+
+    Returns:
+        tuple: новые peaks_params и peaks_bounds.
+    """
+    params = np.asarray(peaks_params, dtype=float).copy()
+    lower = np.asarray(peaks_bounds[0], dtype=float).copy()
+    upper = np.asarray(peaks_bounds[1], dtype=float).copy()
+    params[0::3] *= scale
+    lower[0::3] *= scale
+    upper[0::3] *= scale
+    params[1::3] += shift
+    lower[1::3] += shift
+    upper[1::3] += shift
+    # Начальное приближение curve_fit должно лежать внутри границ
+    params = np.clip(params, np.minimum(lower, upper), np.maximum(lower, upper))
+    return params.tolist(), (np.minimum(lower, upper).tolist(), np.maximum(lower, upper).tolist())
+
+
+class MultiRateDeconvolution:
+    """
+    Деконволюция DTG кривых всех скоростей нагрева одного файла с общей структурой пиков.
+
+    Сначала подбирается опорная скорость (выбранная пользователем кривая). Остальные
+    скорости подбираются параллельно, каждая стартует с решения опорной: центры сдвинуты
+    на наблюдаемый сдвиг максимума, высоты масштабированы, коэффициенты формы передаются
+    внешнему оптимизатору как начальное приближение. Типы пиков и границы задаются один раз.
+
+    Attributes:
+        results (dict): столбец -> лучший результат DeconvolutionProblem.best и сдвиг shift.
+    """
+
+    def __init__(self, curves, reference, peaks_params, peaks_bounds, selected, shape_bounds, options,
+                 coeff_a=None, s1=None, s2=None, max_workers=None, seed=None):
+        """
+        Args:
+            curves (dict): столбец -> (x, y) DTG кривой.
+            reference (str): опорный столбец.
+            peaks_params (list[float]): начальные height, center, width для опорной кривой.
+            peaks_bounds (tuple[list[float], list[float]]): границы параметров пиков опорной кривой.
+            selected (dict): реакция -> список типов пиков.
+            shape_bounds (list[tuple[float, float]]): границы коэффициентов формы.
+            options (DataFrame | dict): опции (таблица options).
+            coeff_a, s1, s2 (list[float], optional): начальные коэффициенты формы.
+            max_workers (int, optional): число одновременно подбираемых скоростей, по умолчанию по governor.
+            seed (int, optional): зерно внешнего оптимизатора.
+        """
+        self.curves = {column: (np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+                       for column, (x, y) in curves.items()}
+        self.reference = reference
+        self.peaks_params = [float(value) for value in peaks_params]
+        self.peaks_bounds = peaks_bounds
+        self.selected = selected
+        self.shape_bounds = shape_bounds
+        self.options = options_to_dict(options)
+        self.coeff_a, self.s1, self.s2 = coeff_a, s1, s2
+        self.max_workers = max_workers
+        self.seed = seed
+        self.results = {}
+
+    def fit(self, column, peaks_params, peaks_bounds, callback=None, x0=None, coeff_a=None, s1=None, s2=None):
+        x_values, y_values = self.curves[column]
+        problem = DeconvolutionProblem(
+            x_values, y_values, peaks_params, peaks_bounds, self.selected, int(self.options['maxfev']),
+            coeff_a, s1, s2)
+        best = problem.solve(self.shape_bounds, self.options, callback=callback, seed=self.seed, x0=x0)
+        if best is not None:
+            best = {**best, 'nfev': problem.nfev}
+        return best
+
+    def run(self, progress=None, callback=None):
+        """
+        Подбирает все скорости нагрева.
+
+        Args:
+            progress (callable, optional): progress(column, result) после каждой скорости.
+            callback (callable, optional): callback внешнего оптимизатора, True останавливает подбор.
+
+        Returns:
+            dict: столбец -> результат (см. атрибут results).
+        """
+        reference_best = self.fit(self.reference, self.peaks_params, self.peaks_bounds, callback,
+                                  coeff_a=self.coeff_a, s1=self.s1, s2=self.s2)
+        if reference_best is None:
+            logger.error(f'Не удалось подобрать опорную кривую {self.reference}')
+            return self.results
+        self.results[self.reference] = {**reference_best, 'shift': 0.0}
+        if progress:
+            progress(self.reference, self.results[self.reference])
+
+        x0 = None
+        if self.shape_bounds:
+            low, high = np.array(self.shape_bounds, dtype=float).T
+            x0 = np.clip(reference_best['coefficients'], low, high)
+        x_reference, y_reference = self.curves[self.reference]
+        others = [column for column in self.curves if column != self.reference]
+
+        def fit_shifted(column):
+            shift, scale = observed_peak_shift(x_reference, y_reference, *self.curves[column])
+            params, bounds = shift_peaks(reference_best['popt'], self.peaks_bounds, shift, scale)
+            logger.info(f'{column}: сдвиг пиков {shift:.2f}, масштаб высот {scale:.3f}')
+            best = self.fit(column, params, bounds, callback, x0=x0, coeff_a=reference_best['coeff_a'],
+                            s1=reference_best['s1'], s2=reference_best['s2'])
+            return column, best, shift
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or governor.pool_size(len(others))) as executor:
+            futures = [executor.submit(fit_shifted, column) for column in others]
+            for future in as_completed(futures):
+                column, best, shift = future.result()
+                if best is None:
+                    logger.error(f'Не удалось подобрать кривую {column}')
+                    continue
+                self.results[column] = {**best, 'shift': shift}
+                if progress:
+                    progress(column, self.results[column])
+        return self.results
@@ -1,30 +1,164 @@
-from PyQt5.QtCore import Qt, QAbstractTableModel, pyqtSignal
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+DISPLAY_CACHE_LIMIT = 200000 # Максимум отформатированных ячеек в кэше
+FETCH_BATCH_SIZE = 1000 # Строк, передаваемых представлению за один fetchMore
 
 
 class PandasModel(QAbstractTableModel):
     """
     Класс для взаимодействия между pandas DataFrame и QTableView.
 
+    Модель создается один раз на таблицу и переиспользуется: новые данные передаются через
+    set_dataframe, который сообщает представлению только об изменившихся строках и столбцах.
+    Для отрисовки столбцы хранятся как массивы NumPy, отформатированные строки кэшируются.
+    Строки отдаются представлению порциями через canFetchMore/fetchMore, поэтому большой
+    файл открывается сразу, а строки за пределами прокрутки не форматируются.
+
     Attributes:
         data_changed_signal (pyqtSignal): Сигнал изменения данных.
     """
     
     data_changed_signal = pyqtSignal()
 
-    def __init__(self, data, parent=None):
+    def __init__(self, data, parent=None, virtual_columns=None):
         """
         Инициализация класса.
 
         Args:
             data (DataFrame): pandas DataFrame для отображения.
             parent (QWidget, optional): родительский виджет.
+            virtual_columns (callable, optional): возвращает словарь имя -> массив
+                столбцов, которые показываются после столбцов DataFrame, но не хранятся в нем.
         """
         QAbstractTableModel.__init__(self, parent)
+        self._virtual_columns = virtual_columns or dict
+        self._display_cache = {}
+        self._loaded_rows = 0
+        self._load(data)
+        self._loaded_rows = min(self._rows, FETCH_BATCH_SIZE)
+
+    def _load(self, data):
+        # Снимок данных для отрисовки: копии столбцов и имена виртуальных столбцов.
+        # Копии нужны, чтобы сравнить их с DataFrame, измененным на месте (например, через .at)
         self._data = data
+        self._rows = data.shape[0]
+        self._column_names = list(data.columns)
+        self._arrays = [data.iloc[:, i].to_numpy(copy=True) for i in range(data.shape[1])]
+        self._virtual_arrays = list(self._virtual_columns().values())
+        self._virtual_names = list(self._virtual_columns().keys())
+        self._display_cache.clear()
+
+    def virtual_columns(self):
+        return self._virtual_columns()
+
+    def dataframe(self):
+        return self._data
+
+    def set_dataframe(self, data):
+        """
+        Заменяет данные модели и уведомляет представление минимальным набором сигналов.
+
+        Добавление строк в конец и столбцов справа передается как вставка, изменение
+        значений без смены формы - как dataChanged по затронутым столбцам, остальные
+        случаи - как полный сброс модели.
+
+        Args:
+            data (DataFrame): новые данные (может быть тем же объектом, измененным на месте).
+        """
+        # Прежняя форма берется из снимка: DataFrame мог быть изменен на месте
+        old_rows, old_columns = self._rows, self._column_names
+        old_virtual = list(self._virtual_names)
+        new_columns = list(data.columns)
+        new_virtual = list(self._virtual_columns().keys())
+        old_arrays = self._arrays
+        rows = data.shape[0]
+
+        if old_columns == new_columns and old_virtual == new_virtual:
+            if rows > old_rows and self._prefix_unchanged(old_arrays, data, old_rows):
+                old_loaded = self._loaded_rows
+                loaded = min(rows, old_loaded + FETCH_BATCH_SIZE) if old_loaded == old_rows else old_loaded
+                if loaded > old_loaded:
+                    self.beginInsertRows(QModelIndex(), old_loaded, loaded - 1)
+                    self._load(data)
+                    self._loaded_rows = loaded
+                    self.endInsertRows()
+                else:
+                    # Новые строки еще не показаны, представление получит их через fetchMore
+                    self._load(data)
+                return
+            if rows == old_rows:
+                self._load(data)
+                self._emit_changed_columns(old_arrays)
+                return
+        elif (rows == old_rows and new_columns[:len(old_columns)] == old_columns
+              and new_virtual[:len(old_virtual)] == old_virtual
+              and (not old_virtual or new_columns == old_columns)):
+            # Новые столбцы добавлены справа от уже показанных
+            first = len(old_columns) + len(old_virtual)
+            last = len(new_columns) + len(new_virtual) - 1
+            self.beginInsertColumns(QModelIndex(), first, last)
+            self._load(data)
+            self.endInsertColumns()
+            self._emit_changed_columns(old_arrays)
+            return
+
+        self.beginResetModel()
+        self._load(data)
+        self._loaded_rows = min(self._rows, FETCH_BATCH_SIZE)
+        self.endResetModel()
+
+    def _prefix_unchanged(self, old_arrays, data, old_rows):
+        for old, i in zip(old_arrays, range(data.shape[1])):
+            new = data.iloc[:old_rows, i].to_numpy()
+            if old.dtype != new.dtype or not np.array_equal(old, new):
+                return False
+        return True
+
+    def _emit_changed_columns(self, old_arrays):
+        # dataChanged для диапазона столбцов, значения которых изменились
+        rows = self.rowCount()
+        if rows == 0:
+            return
+        changed = [i for i, (old, new) in enumerate(zip(old_arrays, self._arrays))
+                   if old.dtype != new.dtype or not np.array_equal(old, new)]
+        # Виртуальные столбцы перезаписываются на месте, их отрисованные значения считаются устаревшими
+        if self._virtual_arrays:
+            changed.append(self.columnCount() - 1)
+        if changed:
+            self.dataChanged.emit(self.index(0, min(changed)), self.index(rows - 1, max(changed)))
+
+    def remove_row(self, row, data):
+        """
+        Удаляет строку из представления.
+
+        Args:
+            row (int): номер удаленной строки.
+            data (DataFrame): данные после удаления строки.
+        """
+        if row >= self._loaded_rows:
+            self._load(data)
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._load(data)
+        self._loaded_rows -= 1
+        self.endRemoveRows()
+
+    def remove_column(self, column, data):
+        """
+        Удаляет столбец DataFrame из представления.
+
+        Args:
+            column (int): номер удаленного столбца.
+            data (DataFrame): данные после удаления.
+        """
+        self.beginRemoveColumns(QModelIndex(), column, column)
+        self._load(data)
+        self.endRemoveColumns()
 
     def rowCount(self, parent=None):
         """
-        Возвращает количество строк в DataFrame.
+        Возвращает количество строк, уже переданных представлению.
 
         Args:
             parent (QModelIndex, optional): родительский индекс (не используется).
@@ -32,7 +166,28 @@ class PandasModel(QAbstractTableModel):
         Returns:
             int: число строк.
         """
-        return self._data.shape[0]
+        return self._loaded_rows
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded_rows < self._rows
+
+    def fetchMore(self, parent=QModelIndex()):
+        """
+        Передает представлению следующую порцию строк, вызывается при прокрутке к концу таблицы.
+
+        Args:
+            parent (QModelIndex, optional): родительский индекс (не используется).
+        """
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH_SIZE, self._rows - self._loaded_rows)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + count - 1)
+        self._loaded_rows += count
+        self.endInsertRows()
 
     def columnCount(self, parent=None):
         """
@@ -44,7 +199,7 @@ class PandasModel(QAbstractTableModel):
         Returns:
             int: число столбцов.
         """
-        return self._data.shape[1]
+        return len(self._arrays) + len(self._virtual_arrays)
 
     def data(self, index, role=Qt.DisplayRole):
         """
@@ -57,10 +212,19 @@ class PandasModel(QAbstractTableModel):
         Returns:
             QVariant: данные для отображения или None, если ячейка недействительна.
         """
-        if index.isValid():
-            if role == Qt.DisplayRole:
-                return str(self._data.iloc[index.row(), index.column()])
-        return None
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row, col = index.row(), index.column()
+        if col >= len(self._arrays):
+            # Виртуальные столбцы меняются на месте во время подбора, поэтому не кэшируются
+            return str(self._virtual_arrays[col - len(self._arrays)][row])
+        text = self._display_cache.get((row, col))
+        if text is None:
+            if len(self._display_cache) >= DISPLAY_CACHE_LIMIT:
+                self._display_cache.clear()
+            text = str(self._arrays[col][row])
+            self._display_cache[(row, col)] = text
+        return text
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         """
@@ -77,10 +241,18 @@ class PandasModel(QAbstractTableModel):
         if role != Qt.DisplayRole:
             return None
         if orientation == Qt.Horizontal:
-            return self._data.columns[section]
+            if section >= len(self._arrays):
+                return self._virtual_names[section - len(self._arrays)]
+            return self._column_names[section]
         if orientation == Qt.Vertical:
             return self._data.index[section]
 
+    def _write(self, row, col, value):
+        self._data.iat[row, col] = value
+        # Запись может изменить тип столбца, поэтому массив берется заново
+        self._arrays[col] = self._data.iloc[:, col].to_numpy(copy=True)
+        self._display_cache.pop((row, col), None)
+
     def set_data(self, index, value, role=Qt.EditRole):
         """
         Изменяет данные в DataFrame.
@@ -97,7 +269,7 @@ class PandasModel(QAbstractTableModel):
         col = index.column()
 
         if role == Qt.EditRole:
-            self._data.iat[row, col] = value
+            self._write(row, col, value)
             self.dataChanged.emit(index, index)
             return True
         return False
@@ -119,7 +291,7 @@ class PandasModel(QAbstractTableModel):
 
         if role == Qt.EditRole:
             value = str(value).replace(',', '.')
-            self._data.iat[row, col] = value
+            self._write(row, col, value)
             self.dataChanged.emit(index, index)
             self.data_changed_signal.emit()  # Ваши собственные сигналы могут быть здесь
             return True
@@ -135,4 +307,6 @@ class PandasModel(QAbstractTableModel):
         Returns:
             Qt.ItemFlags: флаги, определяющие возможности ячейки.
         """
+        if index.column() >= len(self._arrays):
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
         return Qt.ItemIsEditable | Qt.ItemIsEnabled | Qt.ItemIsSelectable
@@ -0,0 +1,148 @@
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import instrumentation
+from src.logger_config import logger
+
+# Формат файла проекта (.dcproj):
+#   8 байт  - сигнатура MAGIC
+#   8 байт  - длина JSON заголовка (little-endian uint64)
+#   JSON    - таблицы gauss/options, описание столбцов данных, состояние оптимизатора
+#   массивы - столбцы данных подряд, каждый выровнен на ALIGNMENT байт,
+#             смещения в заголовке отсчитываются от начала области массивов
+MAGIC = b'DCPROJ\x00\x01'
+ALIGNMENT = 64
+PROJECT_FILTER = 'Deconvolution project(*.dcproj)'
+# На Windows отображенный в память файл нельзя заменить (os.replace завершается PermissionError),
+# поэтому там столбцы открытого проекта читаются в память и файл не остается открытым
+MAP_COLUMNS = os.name != 'nt'
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _table_to_json(df):
+    payload = json.loads(df.to_json(orient='split', index=False))
+    # Типы столбцов сохраняются отдельно: у таблицы без строк их не восстановить по данным
+    payload['dtypes'] = [str(dtype) for dtype in df.dtypes]
+    return payload
+
+
+def _table_from_json(payload):
+    df = pd.DataFrame(payload['data'], columns=payload['columns'])
+    if 'dtypes' in payload:
+        df = df.astype(dict(zip(payload['columns'], payload['dtypes'])))
+    return df
+
+
+@instrumentation.timed('project_save')
+def save_project(path, file_name, data, tables, optimizer_state=None):
+    """
+    Сохраняет сессию деконволюции в один бинарный файл.
+
+    Args:
+        path (str): путь к файлу проекта.
+        file_name (str): имя таблицы экспериментальных данных.
+        data (DataFrame): данные эксперимента вместе с _diff, _reaction_i и _cumulative столбцами.
+        tables (dict): малые таблицы (gauss, options), сохраняются в заголовке.
+        optimizer_state (dict, optional): состояние оптимизатора (лучшие коэффициенты, RMSE и т.п.).
+    """
+    arrays = []
+    columns = []
+    text_columns = {}
+    for name in data.columns:
+        column = data[name]
+        if pd.api.types.is_numeric_dtype(column):
+            array = np.ascontiguousarray(column.to_numpy(dtype=np.float64))
+            columns.append({'name': str(name), 'dtype': array.dtype.str, 'length': len(array)})
+            arrays.append(array)
+        else:
+            text_columns[str(name)] = column.astype(str).tolist()
+
+    header = {
+        'version': 1,
+        'file_name': file_name,
+        'column_order': [str(name) for name in data.columns],
+        'columns': columns,
+        'text_columns': text_columns,
+        'tables': {name: _table_to_json(table) for name, table in tables.items()},
+        'optimizer_state': optimizer_state or {},
+    }
+    # Смещения столбцов отсчитываются от начала области массивов
+    offset = 0
+    for column, array in zip(columns, arrays):
+        column['offset'] = offset
+        offset = _align(offset + array.nbytes)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    # Открытый проект отображен в память (load_project), поэтому файл нельзя перезаписать на месте:
+    # усечение отображенного файла приводит к SIGBUS. Проект пишется во временный файл рядом
+    # и заменяет старый, отображенные массивы продолжают ссылаться на прежний файл
+    # (на Windows столбцы не отображаются, см. MAP_COLUMNS).
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.dcproj-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header_bytes)))
+            f.write(header_bytes)
+            for column, array in zip(columns, arrays):
+                f.write(b'\x00' * (data_start + column['offset'] - f.tell()))
+                f.write(array.tobytes())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    logger.info(f'Проект сохранен: {path}')
+
+
+@instrumentation.timed('project_load')
+def load_project(path):
+    """
+    Открывает файл проекта.
+
+    Столбцы данных отображаются в память (copy-on-write), поэтому с диска читаются
+    только те страницы, к которым действительно обращаются. Если MAP_COLUMNS выключен
+    (Windows), столбцы читаются в память целиком.
+
+    Args:
+        path (str): путь к файлу проекта.
+
+    Returns:
+        dict: file_name, data (DataFrame), tables (dict), optimizer_state (dict).
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'Файл {path} не является проектом deconvolution_app')
+        header_length = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    data_start = _align(len(MAGIC) + 8 + header_length)
+
+    series = {}
+    for column in header['columns']:
+        dtype, offset, length = np.dtype(column['dtype']), data_start + column['offset'], column['length']
+        if MAP_COLUMNS:
+            series[column['name']] = np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=(length,))
+        else:
+            series[column['name']] = np.fromfile(path, dtype=dtype, count=length, offset=offset)
+    for name, values in header['text_columns'].items():
+        series[name] = np.asarray(values, dtype=object)
+    # copy=False сохраняет отображенные массивы без консолидации в один блок
+    data = pd.DataFrame({name: series[name] for name in header['column_order']}, copy=False)
+
+    tables = {name: _table_from_json(payload) for name, payload in header['tables'].items()}
+    logger.info(f'Проект открыт: {path}')
+    return {
+        'file_name': header['file_name'],
+        'data': data,
+        'tables': tables,
+        'optimizer_state': header['optimizer_state'],
+    }
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from src.derivative_pipeline import rate_columns
+from src.instrumentation import instrumentation
+from src.logger_config import logger
+
+TEMPERATURE_COLUMN = 'temperature'
+
+
+def temperature_column_for(rate_column, columns):
+    """
+    Столбец температуры для скорости нагрева.
+
+    Если у скорости есть собственная сетка (temperature_3 для rate_3), используется она,
+    иначе общий столбец temperature. Для имени без суффикса всегда возвращается temperature.
+    """
+    _, separator, suffix = rate_column.partition('_')
+    own_column = f'{TEMPERATURE_COLUMN}_{suffix}'
+    return own_column if separator and own_column in columns else TEMPERATURE_COLUMN
+
+
+def is_uniform(x_values, rtol=1e-3):
+    steps = np.diff(np.asarray(x_values, dtype=np.float64))
+    return steps.size == 0 or np.ptp(steps) <= rtol * abs(np.mean(steps))
+
+
+def interpolate_rows(x_grid, x_rows, y_rows):
+    """
+    Векторизованная линейная интерполяция нескольких кривых с разными сетками на одну сетку.
+
+    Args:
+        x_grid (np.ndarray): общая сетка (m,).
+        x_rows (np.ndarray): исходные сетки (k, n), возрастающие по каждой строке.
+        y_rows (np.ndarray): значения (k, n).
+
+    Returns:
+        np.ndarray: значения на общей сетке (k, m).
+    """
+    n_points = x_rows.shape[1]
+    # Индекс правого узла для каждой точки общей сетки в каждой строке
+    right = np.empty((x_rows.shape[0], x_grid.size), dtype=np.intp)
+    for i, x_row in enumerate(x_rows):
+        right[i] = np.searchsorted(x_row, x_grid)
+    right = np.clip(right, 1, n_points - 1)
+    left = right - 1
+    x_left = np.take_along_axis(x_rows, left, axis=1)
+    x_right = np.take_along_axis(x_rows, right, axis=1)
+    y_left = np.take_along_axis(y_rows, left, axis=1)
+    y_right = np.take_along_axis(y_rows, right, axis=1)
+    weight = (x_grid[None, :] - x_left) / (x_right - x_left)
+    return y_left + weight * (y_right - y_left)
+
+
+@instrumentation.timed('resample_uniform')
+def resample_uniform(df, n_points=None):
+    """
+    Строит таблицу с общей равномерной сеткой temperature и интерполированными rate_*.
+
+    Сетка покрывает пересечение диапазонов всех скоростей, шаг равен медианному шагу
+    исходных данных, если n_points не задан. Сетки temperature_<скорость> могут иметь разную
+    длину: pandas дополняет короткие столбцы NaN, такие точки в каждой строке отбрасываются.
+
+    Args:
+        df (DataFrame): исходные данные.
+        n_points (int, optional): число точек общей сетки.
+
+    Returns:
+        DataFrame: таблица temperature + rate_* на равномерной сетке.
+
+    Raises:
+        ValueError: у скорости нет столбца температуры или в нем меньше двух точек.
+    """
+    columns = rate_columns(df.columns)
+    if not columns:
+        return df
+    missing = [c for c in columns if temperature_column_for(c, df.columns) not in df.columns]
+    if missing:
+        raise ValueError(f'Нет столбца {TEMPERATURE_COLUMN} (или {TEMPERATURE_COLUMN}_<скорость>) '
+                         f'для столбцов {missing}')
+    x_rows = np.vstack([df[temperature_column_for(c, df.columns)].to_numpy(dtype=np.float64) for c in columns])
+    y_rows = np.vstack([df[c].to_numpy(dtype=np.float64) for c in columns])
+    valid = np.isfinite(x_rows) & np.isfinite(y_rows)
+    lengths = valid.sum(axis=1)
+    if lengths.min() < 2:
+        raise ValueError(f'Столбец {columns[int(np.argmin(lengths))]} содержит меньше двух точек')
+    # Пропуски уходят в конец строки (+inf), сортировка - на случай убывающей или перемешанной сетки
+    x_rows = np.where(valid, x_rows, np.inf)
+    order = np.argsort(x_rows, axis=1, kind='stable')
+    x_rows = np.take_along_axis(x_rows, order, axis=1)
+    y_rows = np.take_along_axis(y_rows, order, axis=1)
+
+    x_min = x_rows[:, 0].max()
+    x_max = x_rows[np.arange(len(columns)), lengths - 1].min()
+    if n_points is None:
+        with np.errstate(invalid='ignore'): # inf - inf в хвостах коротких строк
+            steps = np.diff(x_rows, axis=1)
+        step = np.median(steps[np.isfinite(steps)])
+        n_points = int(np.floor((x_max - x_min) / step)) + 1
+    x_grid = np.linspace(x_min, x_max, n_points)
+
+    # Узлы сетки не выходят за последнюю конечную точку строки, поэтому хвост +inf не используется
+    resampled = pd.DataFrame(interpolate_rows(x_grid, x_rows, y_rows).T, columns=columns)
+    resampled.insert(0, TEMPERATURE_COLUMN, x_grid)
+    logger.info(f'Столбцы {columns} передискретизированы на равномерную сетку из {n_points} точек '
+                f'[{x_min:.2f}, {x_max:.2f}]')
+    return resampled
@@ -0,0 +1,262 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from src.logger_config import logger
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+# Переменные окружения, которые читают библиотеки BLAS/OpenMP при загрузке numpy в новых процессах
+BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'BLIS_NUM_THREADS',
+                 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+
+def available_cpus():
+    # Учитывается маска привязки процесса, а не все ядра машины
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def parse_cpu_list(value):
+    """
+    Список ядер из строки вида '0-3,8'.
+
+    Returns:
+        list[int]: номера ядер, пустой список для пустой строки.
+    """
+    cpus = []
+    for part in str(value).replace(' ', '').split(','):
+        if not part or part.lower() == 'nan':
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def set_affinity(cpus):
+    """
+    Привязывает к ядрам все потоки процесса.
+
+    sched_setaffinity(0) меняет маску только вызывающего потока, поэтому на Linux маска
+    задается каждому потоку из /proc/self/task. Потоки и процессы, созданные позже, наследуют ее.
+    """
+    tasks = '/proc/self/task'
+    thread_ids = [int(name) for name in os.listdir(tasks)] if os.path.isdir(tasks) else [0]
+    for thread_id in thread_ids:
+        try:
+            os.sched_setaffinity(thread_id, cpus)
+        except ProcessLookupError:
+            pass # Поток успел завершиться
+
+
+def prepare_process(affinity=None, blas_threads=None):
+    """
+    Привязка к ядрам и число потоков BLAS до загрузки numpy.
+
+    Вызывается точками входа командной строки первой: OpenBLAS при загрузке создает пул
+    потоков по маске привязки и переменным окружения, после загрузки их уже не изменить.
+    Модуль не импортирует numpy, чтобы вызов был возможен раньше него.
+    """
+    cpus = parse_cpu_list(affinity) if affinity else []
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        set_affinity(cpus)
+    if blas_threads:
+        for name in BLAS_ENV_VARS:
+            os.environ[name] = str(blas_threads)
+
+
+class ResourceGovernor:
+    """
+    Единое ограничение вычислительных ресурсов процесса.
+
+    Подборы внутри процесса (curve_fit в ComputeCombinationTask и поиске числа пиков,
+    least_squares в GlobalFit, бутстреп без пула) занимают слот семафора на workers слотов.
+    Пулы потоков создаются размером pool_size, а семафор ограничивает все пулы процесса
+    вместе, если они работают одновременно. Пулы процессов
+    (бутстреп, batch.py) слотов родительского процесса не занимают, их размер задает pool_size.
+    Каждому подбору разрешено blas_threads потоков BLAS, поэтому по умолчанию
+    workers * blas_threads не превышает число доступных ядер. Несколько копий приложения
+    на одной машине делят ядра через cpu_workers и cpu_affinity.
+
+    Attributes:
+        cpus (int): число доступных процессу ядер.
+        workers (int): число слотов для подборов и размер пулов по умолчанию.
+        blas_threads (int): потоков BLAS на один подбор.
+        affinity (list[int]): ядра, к которым привязан процесс (пусто - без привязки).
+    """
+
+    def __init__(self):
+        self.cpus = available_cpus()
+        self.workers = self.cpus
+        self.blas_threads = 0
+        self.affinity = []
+        self._blas_limits = None
+        self._semaphore = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.reset_usage()
+
+    def configure(self, workers=0, blas_threads=1, affinity=None):
+        """
+        Задает бюджет ресурсов. Вызывается перед расчетом, пока слоты не заняты.
+
+        Если подборы еще занимают или ждут слоты, бюджет не меняется: новый семафор
+        не учитывал бы слоты, занятые на прежнем.
+
+        Args:
+            workers (int): число одновременных подборов, 0 - доступные ядра / blas_threads.
+            blas_threads (int): потоков BLAS на подбор, 0 - не ограничивать.
+            affinity (str | list[int], optional): ядра для привязки ('0-7,16'). Привязка действует
+                на все потоки процесса и на потоки и процессы, созданные после нее.
+
+        Returns:
+            bool: True, если бюджет применен.
+        """
+        cpus = parse_cpu_list(affinity) if isinstance(affinity, str) else list(affinity or [])
+        with self._lock:
+            if self.active or self.waiting:
+                logger.warning(f'Ресурсы не изменены: заняты слоты подбора ({self.active}, '
+                               f'ожидают {self.waiting}), действует прежний бюджет из {self.workers} слотов')
+                return False
+            if cpus:
+                if hasattr(os, 'sched_setaffinity'):
+                    set_affinity(cpus)
+                else:
+                    logger.warning('Привязка к ядрам не поддерживается этой системой')
+                    cpus = []
+            self.affinity = cpus
+            self.cpus = available_cpus()
+            self.blas_threads = max(int(blas_threads), 0)
+            self.workers = int(workers) or max(1, self.cpus // max(self.blas_threads, 1))
+            self._semaphore = threading.BoundedSemaphore(self.workers)
+        self.limit_blas()
+        logger.info(f'Ресурсы: ядер {self.cpus}, слотов подбора {self.workers}, '
+                    f'потоков BLAS {self.blas_threads or "без ограничения"}, привязка {cpus or "нет"}')
+        return True
+
+    def configure_from_options(self, options):
+        """
+        Бюджет из таблицы options (cpu_workers, blas_threads, cpu_affinity).
+        """
+        return self.configure(int(float(options.get('cpu_workers', 0))), int(float(options.get('blas_threads', 1))),
+                       str(options.get('cpu_affinity', '')))
+
+    def limit_blas(self):
+        # Прежнее ограничение снимается, иначе ограничения threadpoolctl накладываются друг на друга
+        if self._blas_limits is not None:
+            self._blas_limits.restore_original_limits()
+            self._blas_limits = None
+        if not self.blas_threads:
+            return
+        # Новые процессы пулов (spawn) загружают numpy заново и читают переменные окружения
+        for name in BLAS_ENV_VARS:
+            os.environ[name] = str(self.blas_threads)
+        # В текущем процессе BLAS уже загружен, ограничить его можно только через threadpoolctl
+        if threadpool_limits is not None:
+            self._blas_limits = threadpool_limits(limits=self.blas_threads, user_api='blas')
+        else:
+            logger.debug('threadpoolctl не установлен: потоки BLAS ограничены только в новых процессах')
+
+    def pool_size(self, tasks=None):
+        """
+        Размер пула потоков или процессов для tasks независимых задач.
+        """
+        return max(1, min(self.workers, tasks)) if tasks is not None else self.workers
+
+    @contextmanager
+    def slot(self):
+        """
+        Занимает слот на время одного подбора, учитывая ожидание и занятость.
+        """
+        requested = time.perf_counter()
+        # Семафор берется под блокировкой: configure не заменит его, пока слот ожидается или занят
+        with self._lock:
+            semaphore = self._semaphore
+            self.waiting += 1
+        with semaphore:
+            started = time.perf_counter()
+            with self._lock:
+                self.waiting -= 1
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+                self.wait_time += started - requested
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.busy_time += time.perf_counter() - started
+                    self.slots_used += 1
+
+    def reset_usage(self):
+        with self._lock:
+            self.active = 0
+            self.peak_active = 0
+            self.slots_used = 0
+            self.busy_time = 0.0
+            self.wait_time = 0.0
+            self.started_at = time.perf_counter()
+            self.cpu_started_at = time.process_time()
+            self.usage_started_at = {children: self.rusage(children) for children in (False, True)}
+
+    @staticmethod
+    def rusage(children=False):
+        """
+        Процессорное время и переключения контекста (только Unix).
+
+        Returns:
+            tuple | None: (процессорное время, добровольные, вынужденные переключения).
+        """
+        if resource is None:
+            return None
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime, usage.ru_nvcsw, usage.ru_nivcsw
+
+    def report(self, children=False):
+        """
+        Сводка загрузки с последнего reset_usage.
+
+        Args:
+            children (bool): учитывать завершенные дочерние процессы (пулы spawn).
+
+        Returns:
+            str: время, средняя загрузка ядер, занятость слотов и переключения контекста.
+        """
+        wall = max(time.perf_counter() - self.started_at, 1e-9)
+        cpu = time.process_time() - self.cpu_started_at
+        switches = None
+        if resource is not None:
+            # Процессорное время дочерних процессов добавляется к собственному, переключения - суммарные
+            sources = (False, True) if children else (False,)
+            deltas = [[now - before for now, before in zip(self.rusage(source), self.usage_started_at[source])]
+                      for source in sources]
+            if children:
+                cpu += deltas[1][0]
+            switches = [int(sum(delta[k] for delta in deltas)) for k in (1, 2)]
+        with self._lock:
+            busy, wait, used, peak = self.busy_time, self.wait_time, self.slots_used, self.peak_active
+        lines = [f'Загрузка ресурсов (всего {wall:.3f} с):',
+                 f'  процессорное время {cpu:.3f} с, в среднем {cpu / wall:.2f} из {self.cpus} ядер '
+                 f'({100 * cpu / wall / self.cpus:.0f}%)']
+        if used:
+            lines.append(f'  подборов {used}, занятость слотов {100 * busy / wall / self.workers:.0f}% '
+                         f'из {self.workers}, одновременно до {peak}, ожидание слота {wait:.3f} с')
+        if switches is not None:
+            lines.append(f'  переключений контекста: добровольных {switches[0]}, вынужденных {switches[1]}')
+        return '\n'.join(lines)
+
+
+governor = ResourceGovernor()
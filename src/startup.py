@@ -0,0 +1,96 @@
+import importlib
+import importlib.util
+import os
+import threading
+import time
+
+from src.logger_config import logger
+
+# Модули, которые не нужны для показа окна: загружаются в фоне после него или при первом использовании
+WARM_UP_MODULES = ('scipy.optimize', 'scipy.signal', 'scipy.stats', 'scipy.sparse', 'scienceplots')
+PLOT_STYLE = ['science', 'no-latex', 'nature', 'grid']
+# Файлы стилей внутри пакета scienceplots, в том же порядке, что и PLOT_STYLE
+PLOT_STYLE_FILES = ['science.mplstyle', 'misc/no-latex.mplstyle', 'journals/nature.mplstyle', 'misc/grid.mplstyle']
+
+_style_lock = threading.Lock()
+_style_applied = False
+
+
+def plot_style_files():
+    """
+    Пути к файлам стилей scienceplots без импорта пакета.
+
+    Импорт scienceplots загружает matplotlib.pyplot, а файлы стилей можно передать
+    в matplotlib.style.use напрямую.
+
+    Returns:
+        list[str] | None: пути или None, если пакет или какой-то из файлов не найден.
+    """
+    spec = importlib.util.find_spec('scienceplots')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    styles = os.path.join(spec.submodule_search_locations[0], 'styles')
+    paths = [os.path.join(styles, *name.split('/')) for name in PLOT_STYLE_FILES]
+    return paths if all(os.path.isfile(path) for path in paths) else None
+
+
+def apply_plot_style():
+    """
+    Применяет стиль scienceplots до создания фигур графика.
+
+    Стиль задает и параметры фигуры (размер, dpi), поэтому вызывается перед созданием
+    Figure в UIInitializer. Файлы стилей читаются напрямую через matplotlib.style,
+    поэтому ни matplotlib.pyplot, ни scienceplots при этом не загружаются.
+    """
+    global _style_applied
+    with _style_lock:
+        if _style_applied:
+            return
+        import matplotlib.style
+        paths = plot_style_files()
+        if paths is not None:
+            matplotlib.style.use(paths)
+        else:
+            # Другая структура пакета: стили регистрируются импортом scienceplots
+            import scienceplots
+            matplotlib.style.use(PLOT_STYLE)
+        _style_applied = True
+
+
+def warm_up(modules=WARM_UP_MODULES):
+    """
+    Импортирует тяжелые модули в фоновом потоке, чтобы первый расчет не ждал импорта.
+
+    Returns:
+        threading.Thread: запущенный поток.
+    """
+    def run():
+        start = time.perf_counter()
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logger.warning(f'Фоновая загрузка {name} не удалась: {e}')
+        logger.debug(f'Фоновая загрузка модулей завершена за {time.perf_counter() - start:.2f} с')
+
+    thread = threading.Thread(target=run, name='warm_up', daemon=True)
+    thread.start()
+    return thread
+
+
+def startup_report(started_at, imports_finished_at):
+    """
+    Время от запуска интерпретатора до показа окна.
+
+    Args:
+        started_at (float): time.perf_counter() в начале main.py.
+        imports_finished_at (float): time.perf_counter() после импортов main.py.
+
+    Returns:
+        str: сообщение для лога и консоли.
+    """
+    shown_at = time.perf_counter()
+    message = (f'Окно показано через {shown_at - started_at:.2f} с: импорт {imports_finished_at - started_at:.2f} с, '
+               f'создание окна {shown_at - imports_finished_at:.2f} с')
+    logger.info(message)
+    return message
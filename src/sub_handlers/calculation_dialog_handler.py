@@ -1,6 +1,7 @@
 from PyQt5.QtWidgets import QDialog, QHBoxLayout, QGroupBox, QVBoxLayout, QLabel, QLineEdit, QCheckBox, QPushButton
 import numpy as np
 from src.logger_config import logger
+from src.deconvolution import extract_shape_bounds
 from itertools import product
 
 
@@ -217,22 +218,7 @@ class CalculationDialogHandler:
         return selected, combinations, coeffs_bounds, peaks_bounds
 
     def extract_bounds_selected_combinations(self, selected_combinations, coeffs_bounds):
-        
-        result = []
-        
-        bounds_keys = {
-            'fraser': [('a_bottom_constraint', 'a_top_constraint')],
-            'ads': [('s1_bottom_constraint', 's1_top_constraint'),
-                    ('s2_bottom_constraint', 's2_top_constraint')]
-        }
-        
-        for reaction, functions in selected_combinations.items():            
-            for func in functions:                
-                if func in bounds_keys:                    
-                    for bottom_key, top_key in bounds_keys[func]:                        
-                        bounds = coeffs_bounds[reaction][func]                       
-                        result.append((bounds[bottom_key], bounds[top_key]))
-                        
+        result = extract_shape_bounds(selected_combinations, coeffs_bounds)
         logger.debug(f'extracted_bounds: {result}')        
         return result
 
@@ -3,12 +3,15 @@ from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 from .graph_handler import GraphHandler
 import numpy as np
 import pandas as pd
-from sklearn.metrics import r2_score
-from scipy import signal
 from time import sleep
 import uuid
 
 from src.logger_config import logger
+from src.derivative_pipeline import DerivativePipeline, rate_columns
+from src.resampling import resample_uniform, is_uniform
+from src.instrumentation import instrumentation
+from src.uncertainty import covariance_uncertainty, apply_uncertainty
+from src.metrics import objective_value
 
 class DataHandler(QObject):
     console_message_signal = pyqtSignal(str)
@@ -27,7 +30,11 @@ class DataHandler(QObject):
         self.math_operations = main_app.math_operations
         self.ui_initializer = main_app.ui_initializer
         self.graph_handler = GraphHandler(main_app)
+        self.derivative_pipeline = DerivativePipeline()
         self.received_data = None
+        self.best_fit = None
+        # Лучшее значение метрики rank_by за текущую оптимизацию (для rmse порогом служит options.rmse)
+        self.best_score = np.inf
     
     def connect_signals(self):
         self.table_manager.column_data_returned_signal.connect(self.store_received_data)
@@ -38,8 +45,12 @@ class DataHandler(QObject):
     def store_received_data(self, data, request_id):
         self.pending_data_requests[request_id] = data
                
+    # Запросы retrieve_* почти целиком состоят из ожидания ответа GUI потока, поэтому время
+    # считается только здесь: отдельные таймеры retrieve_* учли бы его второй раз
+    @instrumentation.timed('wait_for_data')
     def wait_for_data(self, request_id):
         while request_id not in self.pending_data_requests:
+            instrumentation.count('wait_for_data_sleeps')
             sleep(0.05) # Ждем 50 мс и проверяем снова
         data = self.pending_data_requests.pop(request_id)  # получаем и удаляем данные по ключу
         return data
@@ -60,26 +71,52 @@ class DataHandler(QObject):
         request_id = uuid.uuid4()
         self.table_manager.get_column_data_signal.emit(table_name, column_name, request_id)
         data = self.wait_for_data(request_id)
-        logger.debug(f"Полученные данные для {var_name}: \n {data}")
+        logger.debug("Полученные данные для %s: \n %s", var_name, data)
         return data
     
+    def smoothing_params(self):
+        # Кнопки вызываются из GUI потока, поэтому опции читаются напрямую, без опроса через сигналы
+        options_data = self.table_manager.data['options']
+        window_length = int(float(options_data['window_length'].values.item()))
+        polyorder = int(float(options_data['polyorder'].values.item()))
+        if window_length <= polyorder:
+            window_length, polyorder = 1, 0
+            self.console_message_signal.emit(f'\n Ошибка! Сглаживание не применено.\nЗначение window_length должно быть больше polyorder\n')
+        return window_length, polyorder, str(options_data['Savitzky_mode'].values.item())
+
+    def compute_smoothed_derivatives(self, x_column_name: str, y_column_names: list[str]) -> dict:
+        file_name = self.viewer.file_name
+        x_values = self.table_manager.get_column_values(file_name, x_column_name).to_numpy(dtype=float)
+        if not is_uniform(x_values):
+            self.console_message_signal.emit(
+                f'\nВнимание: шаг по {x_column_name} неравномерный, фильтр Савицкого-Голея предполагает равномерную сетку. '
+                f'Используйте Resample или опцию resample_uniform.\n')
+        y_columns = {name: self.table_manager.get_column_values(file_name, name).to_numpy(dtype=float)
+                     for name in y_column_names}
+        return self.derivative_pipeline.differentiate(
+            file_name, x_column_name, x_values, y_columns, *self.smoothing_params())
+
     def add_diff_button_pushed(self, x_column_name: str, y_column_name: str):
         # Вычисление производной
-        x_values = self.retrieve_column_data(self.viewer.file_name, x_column_name)
-        y_values = self.retrieve_column_data(self.viewer.file_name, y_column_name)        
-        dy_dx = self.math_operations.compute_derivative(x_values, y_values)
-        options_data = self.retrieve_table_data('options')
-        if options_data['window_length'].astype(int).item() <= options_data['polyorder'].astype(int).item():
-            options_data['window_length'] = 1
-            options_data['polyorder'] = 0
-            self.console_message_signal.emit(f'\n Ошибка! Сглаживание не применено.\nЗначение window_length должно быть больше polyorder\n')
-        dy_dx_smooth = signal.savgol_filter(
-            dy_dx, 
-            window_length=options_data['window_length'].astype(int).item(),
-            polyorder=options_data['polyorder'].astype(int).item(), 
-            mode=options_data['Savitzky_mode'].astype(str).item())
-        
+        dy_dx_smooth = self.compute_smoothed_derivatives(x_column_name, [y_column_name])[y_column_name]
         self.update_data_after_add_diff(dy_dx_smooth, y_column_name)
+
+    def resample_uniform(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Все rate_* приводятся к общей равномерной сетке temperature
+        options_data = self.table_manager.data['options']
+        n_points = int(float(options_data['resample_points'].values.item())) or None
+        return resample_uniform(df, n_points)
+
+    def add_diff_all_button_pushed(self, x_column_name: str):
+        # Производные всех столбцов rate_* вычисляются одним пакетом
+        y_column_names = rate_columns(self.table_manager.data[self.viewer.file_name].columns)
+        if not y_column_names:
+            self.console_message_signal.emit('\nНет столбцов rate_* для дифференцирования\n')
+            return
+        derivatives = self.compute_smoothed_derivatives(x_column_name, y_column_names)
+        new_columns = {f"{name}_diff": values for name, values in derivatives.items()}
+        self.table_manager.add_columns_signal.emit(self.viewer.file_name, new_columns)
+        self.update_ui_after_add_diff(next(iter(new_columns)))
             
     def update_data_after_add_diff(self, derivative_array: np.array, y_column_name: str):
         new_column_name = f"{y_column_name}_diff"
@@ -96,16 +133,18 @@ class DataHandler(QObject):
     
     def get_peaks_params(self):        
         gaussian_data = self.retrieve_table_data('gauss')        
-        logger.info(f"Полученные данные в get_peaks_params: \n {gaussian_data}")
+        logger.debug("Полученные данные в get_peaks_params: \n %s", gaussian_data)
         
         peaks_params = []
         for index, row in gaussian_data.iterrows():
-            logger.debug(f"Обработка строки {index}: height={row['height']}, center={row['center']}, width={row['width']}")
+            logger.debug("Обработка строки %s: height=%s, center=%s, width=%s", index, row['height'], row['center'], row['width'])
             peaks_params.extend([row['height'], row['center'], row['width']]) 
         return peaks_params
     
-    def update_gaussian_data(self, best_params, best_combination, coeff_a, s1, s2):        
+    def update_gaussian_data(self, best_params, best_combination, coeff_a, s1, s2, uncertainty=None):        
         gaussian_data = self.retrieve_table_data('gauss')
+        if uncertainty:
+            gaussian_data = apply_uncertainty(gaussian_data, uncertainty)
                 
         for i, peak_type in enumerate(best_combination):
             height = best_params[3 * i]
@@ -126,10 +165,10 @@ class DataHandler(QObject):
         return gaussian_data
 
     def update_ui_and_data(self, best_params, best_combination, coeff_a, 
-                           s1, s2, best_rmse, x_values, y_column_name, coefficients):
+                           s1, s2, best_rmse, x_values, y_column_name, coefficients, uncertainty=None, r2=None):
         
         best_gaussian_data = self.update_gaussian_data(
-            best_params, best_combination, coeff_a, s1, s2)
+            best_params, best_combination, coeff_a, s1, s2, uncertainty)
         
         self.table_manager.update_table_signal.emit('gauss', best_gaussian_data)
         self.console_message_signal.emit(f'Новое лучшее RMSE: {best_rmse:.5f}\n')
@@ -140,17 +179,15 @@ class DataHandler(QObject):
         self.table_manager.add_reaction_cumulative_func_signal.emit(
             best_params, best_combination, x_values, y_column_name, cumulative_func, coeff_a, s1, s2)
         
-        y_values = self.retrieve_column_data(self.viewer.file_name, y_column_name)
-        cumulative_values = self.retrieve_column_data(self.viewer.file_name, y_column_name + '_cumulative')
-        r2 = r2_score(y_values, cumulative_values)
-        self.console_message_signal.emit(f'R2 score: {r2:.5f}\n')
+        if r2 is not None:
+            self.console_message_signal.emit(f'R2 score: {r2:.5f}\n')
         
         self.graph_handler.rebuild_gaussians_signal.emit()
 
     def modify_gauss_dataframe(self, selected_combinations: dict, coefficients: list[float]) -> pd.DataFrame:
         coefficients = coefficients.tolist()
         gaussian_data = self.retrieve_table_data('gauss')
-        logger.debug(f'Получен gaussian_data: {gaussian_data}')
+        logger.debug('Получен gaussian_data: %s', gaussian_data)
         
         for index, row in gaussian_data.iterrows():
             reaction = row['reaction']
@@ -164,8 +201,9 @@ class DataHandler(QObject):
         self.table_manager.update_table_signal.emit('gauss', gaussian_data)
     
     def compute_peaks_button_pushed(
-        self, coefficients: list[float], selected: dict, peaks_params: list[float], combinations: list[tuple[str,...]], peaks_bounds: list[tuple[float, float]]) -> float:
-        logger.debug(f'Получены coefficients: {coefficients}')
+        self, coefficients: list[float], selected: dict, peaks_params: list[float], combinations: list[tuple[str,...]], peaks_bounds: list[tuple[float, float]]) -> tuple[float, float]:
+        # Возвращает значение rank_by для минимизации (см. objective_value) и RMSE лучшей комбинации
+        logger.debug('Получены coefficients: %s', coefficients)
               
         self.modify_gauss_dataframe(selected, coefficients) 
          
@@ -179,18 +217,37 @@ class DataHandler(QObject):
         s2 = self.retrieve_and_log_data('gauss', 'coeff_s2', 'coeff_s2').astype(float).to_list()
         maxfev = options_data['maxfev'].astype(int).item()        
                
+        rank_by = str(options_data['rank_by'].values.item())
+        results = {}
         best_params, best_combination, best_rmse = self.math_operations.compute_best_peaks(
-            x_values, y_values, peaks_params, maxfev, coeff_a, s1, s2, combinations, peaks_bounds, self.console_message_signal)
+            x_values, y_values, peaks_params, maxfev, coeff_a, s1, s2, combinations, peaks_bounds, self.console_message_signal,
+            results, rank_by)
+        if best_rmse is None:
+            return np.inf, None
 
-        if best_rmse < options_data['rmse'].astype(float).item():
+        # Улучшение и значение для внешнего оптимизатора определяются той же метрикой, что и выбор комбинации
+        score = objective_value(results[best_combination][rank_by], rank_by)
+        threshold = options_data['rmse'].astype(float).item() if rank_by == 'rmse' else self.best_score
+        if score < threshold:
+            self.best_score = score
             options_data['rmse'] = best_rmse
-            self.table_manager.update_table_signal.emit('options', options_data)            
-            self.update_ui_and_data(best_params, best_combination, coeff_a, s1, s2, best_rmse, x_values, y_column_name, coefficients)
+            self.table_manager.update_table_signal.emit('options', options_data)
+            # Ошибки параметров по ковариации лучшей комбинации почти ничего не стоят и считаются сразу
+            uncertainty = covariance_uncertainty(
+                x_values, best_combination, best_params, results[best_combination]['pcov'], coeff_a, s1, s2,
+                float(options_data['confidence'].values.item()))
+            # Исходные данные лучшего подбора нужны для бутстрепа после завершения оптимизации
+            self.best_fit = {
+                'x_values': x_values, 'y_values': y_values, 'combination': best_combination, 'popt': best_params,
+                'bounds': peaks_bounds, 'coeff_a': coeff_a, 's1': s1, 's2': s2, 'maxfev': maxfev}
+            self.update_ui_and_data(best_params, best_combination, coeff_a, s1, s2, best_rmse, x_values, y_column_name,
+                                    coefficients, uncertainty, results[best_combination]['r2'])
         else:
-            self.console_message_signal.emit(f'\nУлучшения нет. Лучшее RMSE: {best_rmse:.5f}\n')
+            self.console_message_signal.emit(
+                f'\nУлучшения нет. {rank_by} этого шага: {results[best_combination][rank_by]:.5f}, RMSE: {best_rmse:.5f}\n')
             self.console_message_signal.emit(f'Лучшая комбинация пиков: {best_combination}\n\n')
 
-        return best_rmse
+        return score, best_rmse
     
     
 
@@ -1,9 +1,50 @@
 from PyQt5.QtWidgets import QApplication, QLineEdit, QInputDialog, QTableWidgetItem
 from PyQt5.QtCore import Qt
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
 import numpy as np
 
 from src.logger_config import logger
+from src.instrumentation import instrumentation
+from src.lod import MinMaxPyramid
+from src.math_operations import MathOperations
+from src.startup import apply_plot_style
+
+GRID_POINTS = 1000 # Точек в сетке для кривых реакций
+FRAME_BUDGET_MS = 33 # Минимальный интервал между перерисовками графика
+REBUILD_DEBOUNCE_MS = 150 # Окно объединения правок таблицы gauss
+
+
+def compute_component_curves(x, components):
+    """
+    Кривые реакций для измененных строк таблицы gauss.
+
+    Args:
+        x (np.ndarray): сетка по температуре.
+        components (list): пары (номер строки, (ключ сетки, параметры строки)).
+
+    Returns:
+        dict: номер строки -> ((ключ сетки, параметры), кривая).
+    """
+    curves = {}
+    for i, (key, (peak_type, h, z, w, coeff_a, s1, s2)) in components:
+        curves[i] = ((key, (peak_type, h, z, w, coeff_a, s1, s2)),
+                     MathOperations.peak_component(x, peak_type, h, z, w, coeff_a, s1, s2))
+    return curves
+
+
+class ComponentCurvesThread(QThread):
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, x, components):
+        super().__init__()
+        self.x = x
+        self.components = components
+
+    def run(self):
+        with instrumentation.timer('component_curves'):
+            curves = compute_component_curves(self.x, self.components)
+        self.finished_signal.emit(curves)
+
 
 class GraphHandler(QObject):
     # Определение сигналов для каждого метода
@@ -43,6 +84,28 @@ class GraphHandler(QObject):
         self.viewer = main_app.viewer
         self.table_manager = main_app.table_manager        
 
+        # Постоянные объекты графика, обновляемые на месте
+        self.axes = None
+        self.data_line = None
+        self.data_pyramid = None
+        # Ключ построенной пирамиды: (файл, столбец x, столбец y, версия данных файла)
+        self.data_pyramid_key = None
+        self.component_lines = []
+        self.cumulative_line = None
+        self.x_grid_cache = (None, None)
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.setInterval(FRAME_BUDGET_MS)
+        self.redraw_timer.timeout.connect(self.draw)
+        # Кривые компонент по строкам gauss: номер строки -> ((сетка, параметры), кривая)
+        self.curve_cache = {}
+        self.curves_thread = None
+        self.rebuild_pending = False
+        self.rebuild_timer = QTimer(self)
+        self.rebuild_timer.setSingleShot(True)
+        self.rebuild_timer.setInterval(REBUILD_DEBOUNCE_MS)
+        self.rebuild_timer.timeout.connect(self.start_background_rebuild)
+
         # Подключение сигналов к соответствующим слотам
         self.on_release_signal.connect(self.on_release)
         self.on_press_signal.connect(self.on_press)
@@ -79,61 +142,205 @@ class GraphHandler(QObject):
         self.press_x = event.xdata
         self.press_y = event.ydata
 
+    @instrumentation.timed('rebuild_gaussians')
     def rebuild_gaussians(self):
         """
         Перестроение всех гауссовых кривых на графике.
 
-        Пересоздает график, учитывая актуальные данные из таблицы.
-        """
-        self.plot_graph()
-        
-        if self.table_manager.data['gauss'].size == 0:
-            return        
-        
-        ax = self.ui_initializer.figure1.get_axes()[0]
-        cumfunc = np.zeros(1000)
-        for _, row in self.table_manager.data['gauss'].iterrows():            
-            x_column_data = self.table_manager.data[self.viewer.file_name][self.ui_initializer.combo_box_x.currentText()]
-            x = np.linspace(min(x_column_data), max(x_column_data), 1000)
-            if row['type'] == 'gauss':
-                y = self.math_operations.gaussian(x, row['height'], row['center'], row['width'])
-            elif row['type'] == 'fraser':
-                y = self.math_operations.fraser_suzuki(
-                    x, float(row['height']), float(row['center']), float(row['width']), float(row['coeff_a']))
-                _coef = str(row['coeff_a'])
-                logger.debug(f'В rebuild_gaussians коэффициент = {_coef}')
-            elif row['type'] == 'ads':
-                y = self.math_operations.asymmetric_double_sigmoid(
-                    x, float(row['height']), float(row['center']), float(row['width']), float(row['coeff_s1']), float(row['coeff_s2']))
-                _coef1 = str(row['coeff_s1'])
-                _coef2 = str(row['coeff_s2'])
-                logger.debug(f'В rebuild_gaussians coeff_a = {_coef1}, coeff_2 = {_coef2}')
+        Линии компонент и суммарной кривой создаются один раз и дальше обновляются через
+        set_data, перерисовка холста откладывается до ближайшего кадра. Пересчитываются
+        только кривые строк, параметры которых изменились.
+        """
+        if not self.update_data_line():
+            return
+
+        gauss = self.table_manager.data['gauss']
+        if gauss.size == 0:
+            self.remove_component_lines()
+            self.request_draw()
+            return
+
+        x = self.x_grid(self.ui_initializer.combo_box_x.currentText())
+        params = self.component_params()
+        if params is None:
+            return
+        self.curve_cache.update(compute_component_curves(x, self.changed_components(params)))
+        self.apply_component_curves(x, params)
+
+    def schedule_rebuild(self):
+        """
+        Отложенное перестроение после правки таблицы gauss.
+
+        Правки, пришедшие в течение REBUILD_DEBOUNCE_MS, объединяются в одно обновление,
+        кривые считаются в фоновом потоке.
+        """
+        self.rebuild_timer.start()
+
+    def start_background_rebuild(self):
+        if self.curves_thread is not None and self.curves_thread.isRunning():
+            # Новые правки учтутся сразу после завершения текущего пересчета
+            self.rebuild_pending = True
+            return
+        x_column = self.ui_initializer.combo_box_x.currentText()
+        gauss = self.table_manager.data['gauss']
+        if self.axes is None or not x_column or gauss.size == 0:
+            self.rebuild_gaussians()
+            return
+        params = self.component_params()
+        if params is None:
+            return
+        x = self.x_grid(x_column)
+        self.curves_thread = ComponentCurvesThread(x, self.changed_components(params))
+        self.curves_thread.finished_signal.connect(
+            lambda curves, x=x, params=params: self.on_curves_computed(x, params, curves))
+        self.curves_thread.start()
+
+    def on_curves_computed(self, x, params, curves):
+        self.curve_cache.update(curves)
+        if x is self.x_grid_cache[1] and self.axes is not None:
+            self.apply_component_curves(x, params)
+        if self.rebuild_pending:
+            self.rebuild_pending = False
+            self.start_background_rebuild()
+
+    def component_params(self):
+        """
+        Параметры кривых из таблицы gauss.
+
+        Returns:
+            list: кортежи (тип, h, z, w, coeff_a, coeff_s1, coeff_s2) по строкам или None,
+                если в таблице есть нечисловое значение (например, во время ввода).
+        """
+        try:
+            return [(row['type'], float(row['height']), float(row['center']), float(row['width']),
+                     float(row['coeff_a']), float(row['coeff_s1']), float(row['coeff_s2']))
+                    for row in self.table_manager.data['gauss'].to_dict('records')]
+        except (TypeError, ValueError) as e:
+            logger.warning(f'Таблица gauss содержит нечисловое значение: {e}')
+            return None
+
+    def changed_components(self, params):
+        # Строки, для которых в кэше нет кривой с такими параметрами на текущей сетке
+        key = self.x_grid_cache[0]
+        return [(i, (key, row_params)) for i, row_params in enumerate(params)
+                if self.curve_cache.get(i, (None,))[0] != (key, row_params)]
+
+    def apply_component_curves(self, x, params):
+        for i in [i for i in self.curve_cache if i >= len(params)]:
+            del self.curve_cache[i]
+        curves = [self.curve_cache[i][1] for i in range(len(params))]
+
+        ax = self.axes
+        for i, y in enumerate(curves):
+            if i < len(self.component_lines):
+                self.component_lines[i].set_data(x, y)
             else:
-                y = self.math_operations.fraser_suzuki(
-                    x, float(row['height']), float(row['center']), float(row['width']), float(row['coeff_a']))
-                _coef = str(row['coeff_a'])
-                logger.debug(f'В rebuild_gaussians отработал else вместо fraser')
-            
-            ax.plot(x, y)
-            cumfunc += y
-        ax.plot(x, cumfunc,)
-        self.ui_initializer.canvas1.draw()
+                self.component_lines.append(ax.plot(x, y)[0])
+        for line in self.component_lines[len(curves):]:
+            line.remove()
+        del self.component_lines[len(curves):]
 
+        cumulative = np.sum(curves, axis=0)
+        if self.cumulative_line is None:
+            self.cumulative_line = ax.plot(x, cumulative)[0]
+        else:
+            self.cumulative_line.set_data(x, cumulative)
+        self.rescale()
+        self.request_draw()
+
+    @instrumentation.timed('plot_graph')
     def plot_graph(self):
         """
         Построение базового графика.
 
         Задача - отобразить данные из выпадающего списка столбцов таблицы на графике.
         """
+        if self.update_data_line():
+            self.remove_component_lines()
+            self.request_draw()
+
+    def update_data_line(self):
+        """
+        Обновляет линию экспериментальных данных выбранных столбцов.
+
+        Returns:
+            bool: True, если столбцы выбраны и линия построена.
+        """
         x_column = self.ui_initializer.combo_box_x.currentText() 
         y_column = self.ui_initializer.combo_box_y.currentText() 
 
         if not x_column or not y_column:  
+            return False
+
+        file_name = self.viewer.file_name
+        # Пирамида строится заново только для других столбцов или измененных данных
+        key = (file_name, x_column, y_column, self.table_manager.data_version(file_name))
+        if key != self.data_pyramid_key:
+            with instrumentation.timer('data_pyramid'):
+                self.data_pyramid = MinMaxPyramid(
+                    self.table_manager.get_column_values(file_name, x_column),
+                    self.table_manager.get_column_values(file_name, y_column))
+            self.data_pyramid_key = key
+        # Оси создаются заново, только если фигура была очищена
+        if self.axes is None or self.axes not in self.ui_initializer.figure1.axes:
+            apply_plot_style()
+            self.ui_initializer.figure1.clear()
+            self.axes = self.ui_initializer.figure1.add_subplot(111)
+            self.data_line = self.axes.plot([], [], 'b-')[0]
+            self.component_lines = []
+            self.cumulative_line = None
+            self.axes.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        x_values = self.data_pyramid.x
+        if x_values.size:
+            self.render_data_line(np.nanmin(x_values), np.nanmax(x_values))
+        else:
+            self.data_line.set_data([], [])
+        self.rescale()
+        return True
+
+    def render_data_line(self, x_min, x_max):
+        """
+        Передает линии данных прореженные точки видимого диапазона.
+
+        Точек не больше двух на пиксель ширины осей, полное разрешение показывается
+        только при достаточном увеличении.
+        """
+        n_buckets = max(int(self.axes.bbox.width), 100)
+        self.data_line.set_data(*self.data_pyramid.query(x_min, x_max, n_buckets))
+
+    def on_xlim_changed(self, ax):
+        # Масштабирование и панорамирование: точки пересчитываются из пирамиды
+        if self.data_pyramid is None or ax is not self.axes:
             return
+        self.render_data_line(*sorted(ax.get_xlim()))
+        self.request_draw()
+
+    def remove_component_lines(self):
+        for line in self.component_lines:
+            line.remove()
+        self.component_lines = []
+        if self.cumulative_line is not None:
+            self.cumulative_line.remove()
+            self.cumulative_line = None
 
-        self.ui_initializer.figure1.clear() 
+    def rescale(self):
+        self.axes.relim()
+        self.axes.autoscale_view()
+
+    def x_grid(self, x_column):
+        """
+        Сетка из GRID_POINTS точек по диапазону столбца x, кэшируется для выбранного столбца.
+        """
+        x_values = self.table_manager.get_column_values(self.viewer.file_name, x_column).to_numpy(dtype=np.float64)
+        key = (self.viewer.file_name, x_column, x_values.size, x_values.min(), x_values.max())
+        if self.x_grid_cache[0] != key:
+            self.x_grid_cache = (key, np.linspace(key[3], key[4], GRID_POINTS))
+        return self.x_grid_cache[1]
 
-        ax = self.ui_initializer.figure1.add_subplot(111) 
-        ax.plot(self.viewer.df[x_column], self.viewer.df[y_column], 'b-')
+    def request_draw(self):
+        # Перерисовка не чаще одного раза за кадр, промежуточные обновления объединяются
+        if not self.redraw_timer.isActive():
+            self.redraw_timer.start()
 
-        self.ui_initializer.canvas1.draw()
+    def draw(self):
+        self.ui_initializer.canvas1.draw_idle()
@@ -0,0 +1,157 @@
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import OptimizeResult
+from scipy.stats import norm, qmc
+
+from src.logger_config import logger
+
+
+class GaussianProcess:
+    """
+    Гауссовский процесс с квадратично-экспоненциальным ядром на нормированных координатах.
+
+    Длина корреляции подбирается по максимуму логарифма маргинального правдоподобия на сетке значений.
+    Если матрица ковариации не раскладывается ни при одной длине, добавка к диагонали увеличивается.
+    """
+
+    length_scales = np.geomspace(0.05, 2.0, 12)
+    max_noise = 1e-2
+
+    def __init__(self, noise=1e-6):
+        self.noise = noise
+
+    @staticmethod
+    def kernel(a, b, length_scale):
+        sq_dist = np.sum((a[:, None, :] - b[None, :, :]) ** 2, axis=-1)
+        return np.exp(-0.5 * sq_dist / length_scale ** 2)
+
+    def fit(self, x, y):
+        self.x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.y_mean = y.mean()
+        self.y_std = y.std() or 1.0
+        y_norm = (y - self.y_mean) / self.y_std
+
+        noise = self.noise
+        while True:
+            best_likelihood = -np.inf
+            for length_scale in self.length_scales:
+                k = self.kernel(self.x, self.x, length_scale) + noise * np.eye(len(self.x))
+                try:
+                    factor = cho_factor(k, lower=True)
+                except np.linalg.LinAlgError:
+                    continue
+                alpha = cho_solve(factor, y_norm)
+                likelihood = -0.5 * y_norm @ alpha - np.sum(np.log(np.diag(factor[0])))
+                if likelihood > best_likelihood:
+                    best_likelihood = likelihood
+                    self.length_scale, self.factor, self.alpha = length_scale, factor, alpha
+            if np.isfinite(best_likelihood):
+                return self
+            if noise >= self.max_noise:
+                raise np.linalg.LinAlgError('Матрица ковариации суррогата не раскладывается')
+            noise = min(noise * 100, self.max_noise)
+
+    def predict(self, x):
+        k_star = self.kernel(np.asarray(x, dtype=float), self.x, self.length_scale)
+        mean = k_star @ self.alpha
+        v = cho_solve(self.factor, k_star.T)
+        variance = np.clip(1.0 - np.sum(k_star * v.T, axis=1), 1e-12, None)
+        return mean * self.y_std + self.y_mean, np.sqrt(variance) * self.y_std
+
+
+class SurrogateOptimizer:
+    """
+    Внешняя оптимизация коэффициентов формы пиков по суррогатной модели.
+
+    Настоящая целевая функция (перебор комбинаций в compute_best_peaks) вызывается только
+    для точек начального плана и для кандидатов с максимальным ожидаемым улучшением (EI).
+
+    Attributes:
+        objective (callable): дорогая целевая функция.
+        bounds (list[tuple[float, float]]): границы коэффициентов.
+        init_points (int): число точек начального плана (латинский гиперкуб).
+        max_evals (int): общий бюджет вызовов целевой функции.
+        n_candidates (int): число случайных кандидатов для максимизации EI.
+        callback (callable, optional): вызывается после каждой итерации, True останавливает поиск.
+    """
+
+    def __init__(self, objective, bounds, init_points=8, max_evals=30, n_candidates=2000, callback=None, seed=None):
+        self.objective = objective
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.init_points = max(int(init_points), 2)
+        self.max_evals = max(int(max_evals), self.init_points)
+        self.n_candidates = int(n_candidates)
+        self.callback = callback
+        self.rng = np.random.default_rng(seed)
+
+    def to_bounds(self, unit_x):
+        lower, upper = self.bounds[:, 0], self.bounds[:, 1]
+        return lower + unit_x * (upper - lower)
+
+    def evaluate(self, unit_x):
+        value = self.objective(self.to_bounds(unit_x))
+        # Неудачная оценка не должна ломать суррогат
+        return value if value is not None and np.isfinite(value) else np.nan
+
+    def expected_improvement(self, model, candidates, best_value):
+        mean, std = model.predict(candidates)
+        improvement = best_value - mean
+        z = improvement / std
+        return improvement * norm.cdf(z) + std * norm.pdf(z)
+
+    def propose(self, model, unit_points, values):
+        dimension = self.bounds.shape[0]
+        best_point = unit_points[np.nanargmin(values)]
+        # Глобальные кандидаты и локальные возмущения вокруг лучшей точки
+        global_candidates = self.rng.random((self.n_candidates, dimension))
+        local_candidates = np.clip(
+            best_point + self.rng.normal(scale=0.05, size=(self.n_candidates // 4, dimension)), 0, 1)
+        candidates = np.vstack([global_candidates, local_candidates])
+        ei = self.expected_improvement(model, candidates, np.nanmin(values))
+        return candidates[np.argmax(ei)]
+
+    def minimize(self):
+        dimension = self.bounds.shape[0]
+        sampler = qmc.LatinHypercube(d=dimension, seed=self.rng)
+        unit_points = sampler.random(self.init_points)
+        values = np.array([self.evaluate(point) for point in unit_points])
+        message = 'Исчерпан бюджет вызовов целевой функции'
+        nit = 0
+        success = True
+        model = None
+
+        while len(values) < self.max_evals:
+            valid = np.isfinite(values)
+            if valid.sum() < 2:
+                message = 'Недостаточно успешных вызовов целевой функции для построения суррогата'
+                success = False
+                break
+            try:
+                model = GaussianProcess().fit(unit_points[valid], values[valid])
+            except np.linalg.LinAlgError as e:
+                # Используется суррогат прошлой итерации, а без него - случайная точка
+                logger.warning(f'{e}, используется {"прежний суррогат" if model else "случайная точка"}')
+            if model is not None:
+                candidate = self.propose(model, unit_points[valid], values[valid])
+            else:
+                candidate = self.rng.random(dimension)
+            value = self.evaluate(candidate)
+            unit_points = np.vstack([unit_points, candidate])
+            values = np.append(values, value)
+            nit += 1
+            logger.info(f'Суррогатная оптимизация: итерация {nit}, значение {value:.5f}, лучшее {np.nanmin(values):.5f}')
+
+            if self.callback and self.callback(self.to_bounds(unit_points[np.nanargmin(values)])):
+                message = 'Остановка по запросу callback'
+                break
+
+        if not np.isfinite(values).any():
+            # Ни один вызов не удался: возвращается первая точка плана с бесконечным значением
+            return OptimizeResult(
+                x=self.to_bounds(unit_points[0]), fun=np.inf, nfev=len(values), nit=nit, success=False,
+                message='Все вызовы целевой функции завершились неудачно')
+        best = np.nanargmin(values)
+        return OptimizeResult(
+            x=self.to_bounds(unit_points[best]), fun=values[best], nfev=len(values), nit=nit,
+            success=success, message=message)
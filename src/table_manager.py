@@ -4,10 +4,12 @@ from PyQt5.QtWidgets import QTableView, QStackedWidget, QFileDialog
 from PyQt5.QtCore import Qt, QObject, pyqtSlot
 import pandas as pd
 from src.pandas_model import PandasModel
+from src.component_store import ComponentStore
 import uuid
 import os
 
 from src.logger_config import logger
+from src.instrumentation import instrumentation
 
 class TableManager(QObject):
     get_data_signal = pyqtSignal(str, uuid.UUID)
@@ -16,6 +18,7 @@ class TableManager(QObject):
     fill_table_signal = pyqtSignal(str)
     add_row_signal = pyqtSignal(str, pd.DataFrame)
     add_column_signal = pyqtSignal(str, str, object)
+    add_columns_signal = pyqtSignal(str, object)
     delete_row_signal = pyqtSignal(int)
     delete_column_signal = pyqtSignal(int)
     fill_combo_boxes_signal = pyqtSignal(str, list, bool)
@@ -32,6 +35,7 @@ class TableManager(QObject):
         self.fill_table_signal.connect(self.fill_table)
         self.add_row_signal.connect(self.add_row)
         self.add_column_signal.connect(self.add_column)
+        self.add_columns_signal.connect(self.add_columns)
         self.delete_row_signal.connect(self.delete_row)
         self.delete_column_signal.connect(self.delete_column)
         self.fill_combo_boxes_signal.connect(self.fill_combo_boxes)
@@ -49,16 +53,55 @@ class TableManager(QObject):
         self.table_indexes = {}
         self.current_table_name = None
         self.bufer_table_name = None
+        self.component_store = ComponentStore()
+        # Счетчики изменений таблиц: по ним кэши производных данных понимают, что данные устарели
+        self.data_versions = {}
         
         for name in table_names:
             self.data[name] = table_dict[name]
-            self.models[name] = PandasModel(self.data[name])
+            self.models[name] = self.create_model(name)
             self.tables[name] = QTableView()
             self.tables[name].setModel(self.models[name])
             self.stacked_widget.addWidget(self.tables[name])
             self.table_indexes[name] = self.stacked_widget.count() - 1  
         
         logger.info(f"Object ID at init: {id(self)} - table names: {self.table_names}")      
+
+    def create_model(self, table_name):
+        # Подобранные кривые реакций показываются в таблице как виртуальные столбцы
+        model = PandasModel(
+            self.data[table_name], virtual_columns=lambda: self.component_store.columns(table_name))
+        model.data_changed_signal.connect(lambda: self.bump_version(table_name))
+        return model
+
+    def data_version(self, table_name):
+        return self.data_versions.get(table_name, 0)
+
+    def bump_version(self, table_name):
+        self.data_versions[table_name] = self.data_version(table_name) + 1
+
+    def refresh_model(self, table_name):
+        # Модель таблицы создается один раз, дальше ей передаются только новые данные
+        if table_name in self.models:
+            self.models[table_name].set_dataframe(self.data[table_name])
+        else:
+            self.models[table_name] = self.create_model(table_name)
+            self.tables[table_name].setModel(self.models[table_name])
+
+    def column_names(self, table_name):
+        return [*self.data[table_name].columns, *self.component_store.column_names(table_name)]
+
+    def get_column_values(self, table_name, column_name):
+        if column_name in self.data[table_name].columns:
+            return self.data[table_name][column_name]
+        values = self.component_store.get_column(table_name, column_name)
+        if values is None:
+            raise KeyError(column_name)
+        return pd.Series(values, index=self.data[table_name].index, name=column_name, copy=False)
+
+    def materialize_table(self, table_name):
+        # Виртуальные столбцы превращаются в настоящие только при экспорте
+        return self.component_store.materialize(table_name, self.data[table_name])
         
     @pyqtSlot(str, uuid.UUID)
     def get_data(self, table_name, request_id=None):
@@ -66,7 +109,7 @@ class TableManager(QObject):
             raise ValueError(f"Неизвестное имя таблицы: {table_name}")
         
         data = self.data[table_name]
-        logger.debug(f'Переданы данные из таблицы {table_name}: \n {data}')        
+        logger.debug('Переданы данные из таблицы %s: \n %s', table_name, data)        
         
         if request_id:
             self.get_data_returned_signal.emit(data, request_id)
@@ -75,12 +118,12 @@ class TableManager(QObject):
     
     @pyqtSlot(str, str, uuid.UUID)
     def get_column_data(self, table_name, column_name, request_id=None):
-        logger.debug(f'get_column_data table_name: {table_name} column_name: {column_name} request_id: {request_id}')
+        logger.debug('get_column_data table_name: %s column_name: %s request_id: %s', table_name, column_name, request_id)
         
         if table_name not in self.table_names:
             raise ValueError(f"Неизвестное имя таблицы: {table_name}")
 
-        column_data = self.data[table_name][column_name]
+        column_data = self.get_column_values(table_name, column_name)
         
         if pd.to_numeric(column_data, errors='coerce').notna().all():
             self.column_data_returned_signal.emit(column_data, request_id)            
@@ -96,8 +139,8 @@ class TableManager(QObject):
             self.stacked_widget.addWidget(self.tables[table_name])
         
         self.data[table_name] = data
-        self.models[table_name] = PandasModel(self.data[table_name])
-        self.tables[table_name].setModel(self.models[table_name])
+        self.bump_version(table_name)
+        self.refresh_model(table_name)
     
     @pyqtSlot(str)
     def fill_table(self, table_name):
@@ -108,10 +151,7 @@ class TableManager(QObject):
         self.bufer_table_name = self.current_table_name
         self.current_table_name = table_name
             
-        self.models[table_name] = PandasModel(self.data[table_name])        
-        self.tables[table_name].setModel(self.models[table_name])
-
-        self.tables[table_name].reset()
+        self.refresh_model(table_name)
 
         index = self.table_indexes[table_name]
         self.stacked_widget.setCurrentIndex(index)
@@ -124,8 +164,19 @@ class TableManager(QObject):
             raise ValueError(f"Неизвестное имя таблицы: {table_name}")
         
         self.data[table_name][column_name] = column_data
-        self.models[table_name] = PandasModel(self.data[table_name])
-        self.tables[table_name].setModel(self.models[table_name])        
+        self.bump_version(table_name)
+        self.refresh_model(table_name)
+
+    @pyqtSlot(str, object)
+    def add_columns(self, table_name, columns):
+        # Несколько столбцов за одно уведомление модели
+        if table_name not in self.table_names:
+            raise ValueError(f"Неизвестное имя таблицы: {table_name}")
+        
+        for column_name, column_data in columns.items():
+            self.data[table_name][column_name] = column_data
+        self.bump_version(table_name)
+        self.refresh_model(table_name)
 
     @pyqtSlot(str, pd.DataFrame)
     def add_row(self, table_name, row_data):
@@ -133,6 +184,7 @@ class TableManager(QObject):
             raise ValueError(f"Неизвестное имя таблицы: {table_name}")
 
         self.data[table_name] = pd.concat([self.data[table_name], row_data], ignore_index=True)
+        self.bump_version(table_name)
         self.fill_table(table_name)
 
     @pyqtSlot(str, list, bool)
@@ -140,8 +192,8 @@ class TableManager(QObject):
         if table_name not in self.table_names:
             raise ValueError(f"Неизвестное имя таблицы: {table_name}")
         
-        columns = self.data[table_name].columns
-        logger.debug(f'fill_combo_boxes table_name: {table_name}, columns: {columns}')
+        columns = self.column_names(table_name)
+        logger.debug('fill_combo_boxes table_name: %s, columns: %s', table_name, columns)
         
         for combo_box in combo_boxes:
             if block_signals:
@@ -153,29 +205,17 @@ class TableManager(QObject):
 
     @pyqtSlot(object, tuple, object, str, object, object, object, object)
     def add_reaction_cumulative_func(self, best_params, best_combination, x_values, y_column, cumulative_func, coeff_a, coeff_s1, coeff_s2):        
-                
-        for i, peak_type in enumerate(best_combination):
-            a0 = best_params[3 * i]
-            a1 = best_params[3 * i + 1]
-            a2 = best_params[3 * i + 2]
-            
-            new_column_name = y_column + '_reaction_' + str(i)
-            
-            if peak_type == 'gauss':
-                peak_func = self.math_operations.gaussian(x_values, a0, a1, a2)
-            elif peak_type == 'fraser':
-                peak_func = self.math_operations.fraser_suzuki(x_values, a0, a1, a2, coeff_a[i])
-            elif peak_type == 'ads': 
-                s1 = coeff_s1[i]
-                s2 = coeff_s2[i]
-                peak_func = self.math_operations.asymmetric_double_sigmoid(x_values, a0, a1, a2, s1, s2)
-            
-            self.data[self.viewer.file_name][new_column_name] = peak_func
-            cumulative_func += peak_func
-
-        new_column_name = y_column + '_cumulative'
-        self.data[self.viewer.file_name][new_column_name] = cumulative_func
-
+        file_name = self.viewer.file_name
+        component_set = self.component_store.update(
+            file_name, y_column, best_combination, best_params, x_values, coeff_a, coeff_s1, coeff_s2)
+        
+        # Столбцы с теми же именами, пришедшие из файла, заменяются виртуальными
+        stale_columns = [c for c in component_set.column_names() if c in self.data[file_name].columns]
+        if stale_columns:
+            self.data[file_name].drop(columns=stale_columns, inplace=True)
+        cumulative_func[:] = component_set.cumulative
+        self.bump_version(file_name)
+        self.refresh_model(file_name)
     
     @pyqtSlot(float, float, float)
     def add_gaussian_to_table(self, height, center, width):        
@@ -190,22 +230,27 @@ class TableManager(QObject):
                                  'coeff_s2': [float(self.data['options']['coeff_s2'].values)]
                                  })
         self.data['gauss'] = pd.concat([self.gaus, row_data], ignore_index=True)
-        self.models['gauss'] = PandasModel(self.gaus)
-        self.tables['gauss'].setModel(self.models['gauss'])
+        self.bump_version('gauss')
+        self.refresh_model('gauss')
         self.fill_table_signal.emit('gauss')
 
     @pyqtSlot(int)
     def delete_row(self, row_number):               
+        self.bump_version(self.current_table_name)
         self.data[self.current_table_name] = self.data[self.current_table_name].drop(self.data[self.current_table_name].index[row_number])
-        self.models[self.current_table_name] = PandasModel(self.data[self.current_table_name])
-        self.tables[self.current_table_name].setModel(self.models[self.current_table_name])        
+        self.models[self.current_table_name].remove_row(row_number, self.data[self.current_table_name])
 
     @pyqtSlot(int)
     def delete_column(self, column_number):              
-        column_name = self.data[self.current_table_name].columns[column_number]        
-        self.data[self.current_table_name] = self.data[self.current_table_name].drop(columns=[column_name])
-        self.models[self.current_table_name] = PandasModel(self.data[self.current_table_name])
-        self.tables[self.current_table_name].setModel(self.models[self.current_table_name])  
+        self.bump_version(self.current_table_name)
+        if column_number >= self.data[self.current_table_name].shape[1]:
+            column_name = self.column_names(self.current_table_name)[column_number]
+            self.component_store.remove_column(self.current_table_name, column_name)
+            self.refresh_model(self.current_table_name)
+        else:
+            column_name = self.data[self.current_table_name].columns[column_number]        
+            self.data[self.current_table_name] = self.data[self.current_table_name].drop(columns=[column_name])
+            self.models[self.current_table_name].remove_column(column_number, self.data[self.current_table_name])
                 
     def save_table_to_csv(self, table_name='gauss'):
         logger.info('Метод save_table_to_csv вызван.') 
@@ -214,12 +259,13 @@ class TableManager(QObject):
             logger.info(f'Таблица {table_name} существует в области видимости.')
             df_to_save = self.data[table_name]            
             
-            logger.info(f'Сохраняем следующий DataFrame: {df_to_save.head()}') 
+            logger.debug('Сохраняем следующий DataFrame: %s', df_to_save.head()) 
             file_name, _ = QFileDialog.getSaveFileName(None, 'Save CSV', os.getenv('HOME'), 'CSV(*.csv)')            
             if file_name:
                 logger.info(f'Файл сохранится как: {file_name}')        
                 try:
-                    df_to_save.to_csv(file_name, index=False, encoding='utf-8')
+                    with instrumentation.timer('csv_export'):
+                        df_to_save.to_csv(file_name, index=False, encoding='utf-8')
                     logger.info('Файл успешно сохранен.')                    
                 except Exception as e: 
                     logger.error(f'Ошибка в процессе сохранения файла: {e}')                    
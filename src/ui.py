@@ -1,10 +1,14 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QComboBox, QLabel, QSplitter, QTabWidget, QTextEdit, QApplication
-from PyQt5.QtCore import QSize, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import QSize, Qt, pyqtSignal, pyqtSlot, QTimer
 from PyQt5.QtGui import QTextCursor
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from PyQt5.QtCore import pyqtSlot
 import logging
+import threading
+from collections import deque
+
+from src.startup import apply_plot_style
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +64,7 @@ class UIInitializer(QWidget):
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - : %(message)s', datefmt='%H:%M:%S')
         handler.setFormatter(formatter)
         logger.addHandler(handler)
+        self.console_handler = handler
         return console_widget
 
     def console_log_stream(self):
@@ -74,11 +79,21 @@ class UIInitializer(QWidget):
         self.button_load_csv = self.create_button('Load CSV', self.parent.load_csv_table)
         self.button_export_csv = self.create_button('Export CSV', self.viewer.export_csv)
         self.button_export_coeffs = self.create_button('Save coeffs', lambda: self.parent.table_manager.save_table_to_csv(table_name='gauss'))
+        self.button_export_conversion = self.create_button('Export α', self.parent.export_conversion)
         self.button_compute_peaks = self.create_button('Compute peaks', self.parent.compute_peaks)
+        self.button_compute_multi_rate = self.create_button('Compute all rates', self.parent.compute_peaks_multi_rate)
+        self.button_compute_global = self.create_button('Global fit', self.parent.compute_peaks_global)
+        self.button_rate_table = self.create_button('Rate Table', self.parent.show_rate_table)
+        self.button_model_order = self.create_button('Model order', self.parent.compute_model_order)
+        self.button_apply_order = self.create_button('Apply order', self.parent.apply_model_order)
         self.button_interactive = self.create_button('Interactive Mode', self.parent.switch_to_interactive_mode, checkable=True)
         self.button_add_diff = self.create_button('Add Diff', self.parent.add_diff)
+        self.button_add_diff_all = self.create_button('Diff All', self.parent.add_diff_all)
+        self.button_resample = self.create_button('Resample', self.parent.resample_data)
         self.button_options_mode = self.create_button('Options Mode', self.parent.options_mode)
         self.button_stop_computing = self.create_button('Stop Computing', self.parent.stop_computing_peaks)
+        self.button_save_project = self.create_button('Save Project', self.parent.save_project)
+        self.button_open_project = self.create_button('Open Project', self.parent.open_project)
         logger.debug("Кнопки созданы.")
         
     def create_combo_boxes(self):
@@ -95,11 +110,21 @@ class UIInitializer(QWidget):
         buttons_layout.addWidget(self.button_load_csv)
         buttons_layout.addWidget(self.button_export_csv)
         buttons_layout.addWidget(self.button_export_coeffs)
+        buttons_layout.addWidget(self.button_export_conversion)
         buttons_layout.addWidget(self.button_options_mode)     
         buttons_layout.addWidget(self.button_compute_peaks)
+        buttons_layout.addWidget(self.button_compute_multi_rate)
+        buttons_layout.addWidget(self.button_compute_global)
+        buttons_layout.addWidget(self.button_rate_table)
+        buttons_layout.addWidget(self.button_model_order)
+        buttons_layout.addWidget(self.button_apply_order)
         buttons_layout.addWidget(self.button_interactive)
         buttons_layout.addWidget(self.button_add_diff)
+        buttons_layout.addWidget(self.button_add_diff_all)
+        buttons_layout.addWidget(self.button_resample)
         buttons_layout.addWidget(self.button_stop_computing)
+        buttons_layout.addWidget(self.button_save_project)
+        buttons_layout.addWidget(self.button_open_project)
         buttons_layout.addWidget(self.combo_box_x)
         buttons_layout.addWidget(self.combo_box_y)
         
@@ -125,6 +150,8 @@ class UIInitializer(QWidget):
         return table_widget
 
     def create_graph_widget(self):
+        # Стиль применяется до создания Figure: иначе параметры фигуры из стиля к ней не применятся
+        apply_plot_style()
         # Создание нового объекта Figure для хранения графика
         figure = Figure()
         figure.set_size_inches(7, 5, forward=True)
@@ -194,14 +221,54 @@ class UIInitializer(QWidget):
       
     @pyqtSlot(str)
     def update_console(self, text):
-        self.console_widget.append(text)
+        # Сообщения копятся в буфере и выводятся пачками по таймеру
+        self.console_handler.push(text + '\n')
         
 class QTextEditLogger(logging.Handler):
+    """
+    Обработчик логов для консоли приложения с пакетным выводом.
+
+    Записи из любых потоков складываются в буфер, а виджет обновляется в GUI потоке
+    по таймеру не чаще одного раза за flush_interval мс и не больше max_chars символов за раз,
+    поэтому сотни сообщений о комбинациях не блокируют интерфейс.
+    """
+    flush_interval = 100
+    max_chars = 20000
+    max_backlog = 5000
+
     def __init__(self, widget):
         super().__init__()
         self.widget = widget
+        self.buffer = deque()
+        self.dropped = 0
+        # push вызывается и из потоков логирования, и из GUI потока через update_console
+        self.buffer_lock = threading.Lock()
+        self.timer = QTimer(widget)
+        self.timer.timeout.connect(self.flush_to_widget)
+        self.timer.start(self.flush_interval)
 
     def emit(self, record):
-        msg = self.format(record)
+        self.push(self.format(record) + '\n')
+
+    def push(self, text):
+        with self.buffer_lock:
+            if len(self.buffer) >= self.max_backlog:
+                self.buffer.popleft()
+                self.dropped += 1
+            self.buffer.append(text)
+
+    def flush_to_widget(self):
+        if not self.buffer:
+            return
+        chunks = []
+        size = 0
+        with self.buffer_lock:
+            if self.dropped:
+                chunks.append(f'... пропущено сообщений: {self.dropped}\n')
+                self.dropped = 0
+            while self.buffer and size < self.max_chars:
+                text = self.buffer.popleft()
+                chunks.append(text)
+                size += len(text)
         self.widget.moveCursor(QTextCursor.End)
-        self.widget.insertPlainText(msg + '\n')
+        self.widget.insertPlainText(''.join(chunks))
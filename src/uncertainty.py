@@ -0,0 +1,211 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.math_operations import MathOperations
+from src.instrumentation import instrumentation
+from src.resources import governor
+from src.logger_config import logger
+
+PEAK_PARAMS = ['height', 'center', 'width']
+# Столбцы таблицы gauss с неопределенностями: стандартные ошибки и полуширины доверительных интервалов
+UNCERTAINTY_COLUMNS = ['height_se', 'center_se', 'width_se', 'area', 'area_se',
+                       'height_ci', 'center_ci', 'width_ci', 'area_ci', 'uncertainty']
+# Пробные подборы в текущем процессе, по которым оценивается, окупится ли пул процессов
+PILOT_SAMPLES = 8
+# Примерная цена запуска процессов пула (spawn заново импортирует PyQt5 и scipy)
+POOL_STARTUP_S = 3.0
+
+
+def peak_areas(x_values, combination, popt, coeff_a, s1, s2):
+    """
+    Площади компонент (интеграл по x методом трапеций).
+
+    Returns:
+        np.ndarray: площадь каждой реакции.
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    return np.array([
+        np.trapz(MathOperations.peak_component(
+            x_values, peak_type, *popt[3 * i:3 * i + 3], coeff_a[i], s1[i], s2[i]), x_values)
+        for i, peak_type in enumerate(combination)])
+
+
+def area_gradient(x_values, peak_type, params, coeff_a, s1, s2):
+    # Центральные разности площади по height, center, width
+    gradient = np.zeros(3)
+    for j in range(3):
+        step = 1e-6 * max(abs(params[j]), 1.0)
+        shifted = np.array([params, params], dtype=float)
+        shifted[0, j] += step
+        shifted[1, j] -= step
+        upper, lower = (np.trapz(MathOperations.peak_component(x_values, peak_type, *p, coeff_a, s1, s2), x_values)
+                        for p in shifted)
+        gradient[j] = (upper - lower) / (2 * step)
+    return gradient
+
+
+def covariance_uncertainty(x_values, combination, popt, pcov, coeff_a, s1, s2, confidence=0.95):
+    """
+    Неопределенности по ковариационной матрице curve_fit.
+
+    Стандартные ошибки параметров - корни диагонали pcov, ошибка площади переносится
+    через градиент площади по height, center, width (дельта-метод). Доверительные
+    интервалы строятся по t-распределению с n - p степенями свободы.
+
+    Args:
+        x_values (array_like): значения x подобранной кривой.
+        combination (tuple[str, ...]): типы пиков.
+        popt (array_like): подобранные параметры.
+        pcov (np.ndarray): ковариационная матрица параметров.
+        coeff_a, s1, s2 (list[float]): коэффициенты формы.
+        confidence (float): уровень доверия.
+
+    Returns:
+        list[dict]: для каждой реакции значения столбцов UNCERTAINTY_COLUMNS.
+    """
+    from scipy import stats
+
+    x_values = np.asarray(x_values, dtype=float)
+    popt = np.asarray(popt, dtype=float)
+    pcov = np.asarray(pcov, dtype=float)
+    # Вырожденная задача: curve_fit возвращает inf, такие ошибки показываются как nan
+    with np.errstate(invalid='ignore'):
+        se = np.sqrt(np.diag(pcov))
+    se[~np.isfinite(se)] = np.nan
+    dof = max(x_values.size - popt.size, 1)
+    t_value = stats.t.ppf(0.5 + confidence / 2, dof)
+    areas = peak_areas(x_values, combination, popt, coeff_a, s1, s2)
+
+    rows = []
+    for i, peak_type in enumerate(combination):
+        block = slice(3 * i, 3 * i + 3)
+        gradient = area_gradient(x_values, peak_type, popt[block], coeff_a[i], s1[i], s2[i])
+        with np.errstate(invalid='ignore'):
+            area_se = float(np.sqrt(gradient @ pcov[block, block] @ gradient))
+        row = {f'{param}_se': se[3 * i + j] for j, param in enumerate(PEAK_PARAMS)}
+        row.update({'area': areas[i], 'area_se': area_se if np.isfinite(area_se) else np.nan})
+        row.update({f'{name}_ci': t_value * row[f'{name}_se'] for name in PEAK_PARAMS + ['area']})
+        row['uncertainty'] = 'covariance'
+        rows.append(row)
+    return rows
+
+
+def bootstrap_chunk(task):
+    """
+    Серия бутстреп-подборов в одном процессе пула.
+
+    Returns:
+        np.ndarray: подобранные параметры (успешные выборки x число параметров).
+    """
+    rng = np.random.default_rng(task['seed'])
+    fitted, residuals = task['fitted'], task['residuals']
+    samples = []
+    for _ in range(task['n_samples']):
+        y_values = fitted + rng.choice(residuals, size=residuals.size, replace=True)
+        try:
+            # В текущем процессе выборки делят слоты с остальными подборами, в пуле слот свой
+            with governor.slot():
+                popt, _, _ = MathOperations.fit_combination(
+                    task['x_values'], y_values, task['combination'], task['popt'], task['maxfev'],
+                    task['bounds'], task['coeff_a'], task['s1'], task['s2'])
+        except (RuntimeError, ValueError):
+            continue
+        samples.append(popt)
+    return np.array(samples, dtype=float).reshape(-1, len(task['popt']))
+
+
+@instrumentation.timed('bootstrap')
+def bootstrap_uncertainty(x_values, y_values, combination, popt, bounds, coeff_a, s1, s2, maxfev,
+                          n_samples=200, workers=None, confidence=0.95, seed=None):
+    """
+    Неопределенности остаточным бутстрепом.
+
+    Остатки лучшего подбора перемешиваются с возвращением и добавляются к модельной кривой,
+    каждая выборка подбирается заново curve_fit с теплым стартом из popt. Первые PILOT_SAMPLES
+    выборок подбираются в текущем процессе; если по их времени остальные займут меньше, чем
+    запуск пула, пул не создается. Иначе выборки делятся на равные серии по процессам пула.
+
+    Args:
+        x_values, y_values (array_like): подобранная кривая.
+        combination (tuple[str, ...]): типы пиков.
+        popt (array_like): лучшие параметры.
+        bounds (tuple[list[float], list[float]]): границы параметров пиков.
+        coeff_a, s1, s2 (list[float]): коэффициенты формы (в выборках не меняются).
+        maxfev (int): ограничение числа вычислений curve_fit.
+        n_samples (int): число бутстреп-выборок.
+        workers (int, optional): наибольшее число процессов (по умолчанию слоты governor),
+            1 - подбор в текущем процессе.
+        confidence (float): уровень доверия для процентильных интервалов.
+        seed (int, optional): зерно генератора случайных чисел.
+
+    Returns:
+        list[dict]: для каждой реакции значения столбцов UNCERTAINTY_COLUMNS.
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    popt = np.asarray(popt, dtype=float)
+    fitted = MathOperations.peaks(x_values, combination, coeff_a, s1, s2, *popt)
+    seeds = iter(np.random.SeedSequence(seed).spawn(n_samples))
+    task = {'x_values': x_values, 'fitted': fitted, 'residuals': y_values - fitted,
+            'combination': tuple(combination), 'popt': popt, 'bounds': bounds, 'maxfev': maxfev,
+            'coeff_a': list(coeff_a), 's1': list(s1), 's2': list(s2)}
+
+    pilot = min(PILOT_SAMPLES, n_samples)
+    start = time.perf_counter()
+    chunks = [bootstrap_chunk({**task, 'seed': next(seeds), 'n_samples': pilot})]
+    remaining = n_samples - pilot
+    estimated = (time.perf_counter() - start) / max(pilot, 1) * remaining
+    workers = max(1, min(workers or governor.pool_size(), remaining))
+    if workers == 1 or estimated < POOL_STARTUP_S:
+        if remaining:
+            chunks.append(bootstrap_chunk({**task, 'seed': next(seeds), 'n_samples': remaining}))
+    else:
+        tasks = [{**task, 'seed': next(seeds), 'n_samples': remaining // workers + (k < remaining % workers)}
+                 for k in range(workers)]
+        logger.info(f'Бутстреп: {remaining} выборок в {workers} процессах, оценка {estimated:.1f} с в одном процессе')
+        # spawn: каждый процесс запускает собственный слушатель очереди логов
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            chunks.extend(executor.map(bootstrap_chunk, tasks))
+    samples = np.vstack(chunks)
+    logger.info(f'Бутстреп: {samples.shape[0]} из {n_samples} выборок подобраны')
+    if samples.shape[0] < 2:
+        return None
+
+    areas = np.array([peak_areas(x_values, combination, sample, coeff_a, s1, s2) for sample in samples])
+    tail = (1 - confidence) / 2 * 100
+    param_low, param_high = np.percentile(samples, [tail, 100 - tail], axis=0)
+    area_low, area_high = np.percentile(areas, [tail, 100 - tail], axis=0)
+    param_se = samples.std(axis=0, ddof=1)
+    area_se = areas.std(axis=0, ddof=1)
+    best_areas = peak_areas(x_values, combination, popt, coeff_a, s1, s2)
+
+    rows = []
+    for i in range(len(combination)):
+        row = {f'{param}_se': param_se[3 * i + j] for j, param in enumerate(PEAK_PARAMS)}
+        row.update({'area': best_areas[i], 'area_se': area_se[i]})
+        # Полуширина процентильного интервала
+        row.update({f'{param}_ci': (param_high[3 * i + j] - param_low[3 * i + j]) / 2
+                    for j, param in enumerate(PEAK_PARAMS)})
+        row['area_ci'] = (area_high[i] - area_low[i]) / 2
+        row['uncertainty'] = f'bootstrap({samples.shape[0]})'
+        rows.append(row)
+    return rows
+
+
+def apply_uncertainty(gauss, rows):
+    """
+    Записывает неопределенности реакций в таблицу gauss (строки по порядку реакций).
+
+    Returns:
+        DataFrame: таблица gauss с заполненными столбцами UNCERTAINTY_COLUMNS.
+    """
+    gauss = gauss.copy()
+    values = pd.DataFrame(rows, index=gauss.index[:len(rows)])
+    # Столбцы заменяются целиком, чтобы тип uncertainty (строка) не конфликтовал с числовыми
+    for column in values.columns:
+        gauss[column] = values[column].reindex(gauss.index)
+    return gauss
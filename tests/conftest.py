@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Тесты запускаются из корня проекта: модули импортируются как src.<модуль>, как в main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import batch
+from src import batch as batch_module
+
+
+def write_tga(path):
+    # Потеря массы из двух стадий: DTG кривая содержит два пика
+    x = np.linspace(100, 500, 401)
+
+    def mass(shift):
+        stages = [(30, 220 + shift, 20), (40, 350 + shift, 25)]
+        return 100 - sum(loss / (1 + np.exp(-(x - center) / (width / 4))) for loss, center, width in stages)
+
+    pd.DataFrame({'temperature': x, 'rate_3': mass(0), 'rate_10': mass(15)}).to_csv(path, index=False)
+
+
+def test_cli_writes_summary_and_per_file_outputs(tmp_path):
+    data = tmp_path / 'sample.csv'
+    write_tga(data)
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({'n_peaks': 2, 'peak_types': ['gauss'], 'seed': 1,
+                                  'options': {'maxfev': 2000, 'maxiter': 1, 'popsize': 2}}))
+    output = tmp_path / 'results'
+
+    assert batch.main([str(data), '--config', str(config), '--output', str(output), '--workers', '1']) == 0
+
+    summary = pd.read_csv(output / 'summary.csv')
+    assert sorted(summary['column']) == ['rate_10', 'rate_3']
+    assert (summary['status'] == 'ok').all()
+    assert (summary['n_peaks'] == 2).all() and (summary['r2'] > 0.9).all()
+    curves = pd.read_csv(output / 'sample_deconvoluted.csv')
+    assert {'rate_3_diff_reaction_0', 'rate_3_diff_cumulative', 'rate_10_diff_reaction_1'} <= set(curves.columns)
+    assert len(pd.read_csv(output / 'sample_rate_3_gauss.csv')) == 2
+    with np.load(output / 'sample_conversion.npz') as conversion:
+        assert conversion['alpha'].shape[0] == 4
+
+
+def test_run_job_reads_each_file_once(tmp_path, monkeypatch):
+    data = tmp_path / 'sample.csv'
+    write_tga(data)
+    reads = []
+    load_csv_file = batch_module.load_csv_file
+    monkeypatch.setattr(batch_module, 'load_csv_file', lambda path: reads.append(path) or load_csv_file(path))
+    monkeypatch.setattr(batch_module, 'deconvolve_curve',
+                        lambda x, y, column, config, x_column: {'summary': {'column': column, 'status': 'ok'}})
+    batch_module._read_file.cache_clear()
+
+    for column in ['rate_3', 'rate_10']:
+        assert batch_module.run_job({'file': str(data), 'column': column, 'config': {}})['summary']['status'] == 'ok'
+    assert len(reads) == 1
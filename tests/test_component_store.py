@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from src.component_store import ComponentStore
+from src.math_operations import MathOperations
+
+
+def fitted_store(x):
+    store = ComponentStore()
+    store.update('file', 'rate_3_diff', ('gauss', 'fraser'), [1.0, 150, 10, 0.5, 200, 15], x,
+                 [-0.01, 0.1], [1.0, 1.0], [1.0, 1.0])
+    return store
+
+
+def test_update_reuses_arrays_in_place():
+    x = np.linspace(100, 300, 101)
+    store = fitted_store(x)
+    component_set = store.get('file', 'rate_3_diff')
+    reactions = component_set.reactions
+    store.update('file', 'rate_3_diff', ('gauss', 'fraser'), [2.0, 150, 10, 0.5, 200, 15], x,
+                 [-0.01, 0.1], [1.0, 1.0], [1.0, 1.0])
+    assert store.get('file', 'rate_3_diff').reactions is reactions
+    np.testing.assert_allclose(reactions[0], MathOperations.gaussian(x, 2.0, 150, 10))
+    np.testing.assert_allclose(component_set.cumulative, reactions.sum(axis=0))
+
+
+def test_virtual_columns_and_materialize():
+    x = np.linspace(100, 300, 101)
+    store = fitted_store(x)
+    names = ['rate_3_diff_reaction_0', 'rate_3_diff_reaction_1', 'rate_3_diff_cumulative']
+    assert store.column_names('file') == names
+    df = pd.DataFrame({'temperature': x, 'rate_3_diff_cumulative': np.zeros_like(x)})
+    materialized = store.materialize('file', df)
+    assert list(materialized.columns) == ['temperature', *names]
+    np.testing.assert_array_equal(materialized['rate_3_diff_cumulative'], store.get_column('file', names[-1]))
+    assert store.materialize('other', df) is df
+
+
+def test_remove_column_drops_whole_set():
+    store = fitted_store(np.linspace(100, 300, 11))
+    assert store.remove_column('file', 'rate_3_diff_reaction_1')
+    assert store.columns('file') == {}
+    assert not store.remove_column('file', 'rate_3_diff_cumulative')
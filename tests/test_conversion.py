@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.component_store import ComponentStore
+from src.conversion import heating_rate, cumulative_trapezoid, temperatures_at_levels, conversion_arrays, \
+    conversion_from_components
+
+
+def test_heating_rate_from_column_name():
+    assert heating_rate('rate_10_diff') == 10.0
+    assert heating_rate('rate_2.5') == 2.5
+    assert np.isnan(heating_rate('temperature'))
+
+
+def test_cumulative_trapezoid_matches_numpy():
+    x = np.linspace(0, 2, 21)
+    y = np.vstack([x ** 2, np.sin(x)])
+    integral = cumulative_trapezoid(np.vstack([x, x]), y)
+    assert np.all(integral[:, 0] == 0)
+    np.testing.assert_allclose(integral[:, -1], np.trapz(y, x, axis=1))
+
+
+def test_temperatures_at_levels_interpolates_linearly():
+    x = np.array([[0.0, 10.0, 20.0]])
+    alpha = np.array([[0.0, 0.5, 1.0]])
+    np.testing.assert_allclose(temperatures_at_levels(x, alpha, [0.25, 0.5, 0.75]), [[5.0, 10.0, 15.0]])
+
+
+def test_symmetric_peak_reaches_half_conversion_at_center():
+    x = np.linspace(100, 300, 2001)
+    peak = np.exp(-((x - 200) ** 2) / (2 * 15 ** 2))
+    arrays = conversion_arrays(x[None, :], peak[None, :], ['rate_5_diff'], [0], levels=[0.5])
+    assert arrays['rate'][0] == 5.0
+    assert abs(arrays['T_at_alpha'][0, 0] - 200) < 0.1
+    np.testing.assert_allclose(arrays['alpha'][0, -1], 1.0)
+    np.testing.assert_allclose(np.trapz(arrays['dalpha_dT'][0], x), 1.0, rtol=1e-6)
+
+
+def test_conversion_from_components_uses_every_reaction():
+    x = np.linspace(100, 300, 201)
+    store = ComponentStore()
+    store.update('file', 'rate_3_diff', ('gauss', 'gauss'), [1, 150, 10, 2, 250, 10], x, [0, 0], [1, 1], [1, 1])
+    arrays = conversion_from_components({'rate_3_diff': store.get('file', 'rate_3_diff')}, {'rate_3_diff': x})
+    assert arrays['alpha'].shape == (2, x.size)
+    assert arrays['reaction'].tolist() == [0, 1]
+    assert conversion_from_components({}, {}) is None
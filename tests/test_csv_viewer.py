@@ -0,0 +1,72 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import csv_viewer
+from src.csv_viewer import CSVViewer, read_csv_file, detect_encoding
+
+
+class TableManager:
+    def __init__(self):
+        self.data = {'options': pd.DataFrame({'csv_cache': [1]})}
+
+
+@pytest.fixture
+def viewer(tmp_path, monkeypatch):
+    # Папка кэша создается в текущем каталоге
+    monkeypatch.chdir(tmp_path)
+    viewer = CSVViewer({})
+    viewer.table_manager = TableManager()
+    viewer.file_path = str(tmp_path / 'data.csv')
+    pd.DataFrame({'temperature': [30.0, 31.0, 32.0], 'rate_3': [100.0, 99.5, 99.0]}).to_csv(viewer.file_path, index=False)
+    return viewer
+
+
+def test_second_load_comes_from_cache(viewer, monkeypatch):
+    viewer.load_csv()
+    first = viewer.df
+
+    def fail(*args, **kwargs):
+        raise AssertionError('CSV прочитан повторно')
+
+    monkeypatch.setattr(viewer, 'read_csv', fail)
+    viewer.load_csv()
+    pd.testing.assert_frame_equal(viewer.df, first)
+
+
+def test_changed_file_invalidates_cache(viewer, tmp_path):
+    viewer.load_csv()
+    stat = os.stat(viewer.file_path)
+    pd.DataFrame({'temperature': [30.0, 31.0], 'rate_3': [1.0, 2.0]}).to_csv(viewer.file_path, index=False)
+    os.utime(viewer.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    viewer.load_csv()
+    assert viewer.df['rate_3'].tolist() == [1.0, 2.0]
+    # Кэш прежнего состояния файла удален
+    assert len(list((tmp_path / csv_viewer.CACHE_FOLDER).glob('*.npz'))) == 1
+
+
+def test_python_engine_when_pyarrow_rejects_file(tmp_path, monkeypatch):
+    path = tmp_path / 'data.csv'
+    path.write_text('temperature,rate_3\n30,100\n31,99\n', encoding='utf-8')
+    read_csv = pd.read_csv
+    engines = []
+
+    def reject_pyarrow(*args, engine=None, **kwargs):
+        engines.append(engine)
+        if engine == 'pyarrow':
+            raise ValueError('pyarrow не поддерживает этот файл')
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(csv_viewer.pd, 'read_csv', reject_pyarrow)
+    df = read_csv_file(path, 'utf-8')
+    assert engines == ['pyarrow', None]
+    assert df.dtypes.tolist() == ['float64', 'float64']
+    assert df['rate_3'].tolist() == [100.0, 99.0]
+
+
+def test_encoding_is_detected_from_sample(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_bytes('температура,скорость\n'.encode('cp1251') * 50)
+    assert detect_encoding(path).lower() == 'windows-1251'
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from src.deconvolution import DEFAULT_OPTIONS, DeconvolutionProblem, options_to_dict, extract_shape_bounds, \
+    split_shape_coefficients, initial_peaks_from_curve
+from src.math_operations import MathOperations
+
+SELECTED = {'Reaction_1': ['gauss'], 'Reaction_2': ['fraser', 'ads'], 'Reaction_3': ['gauss', 'fraser']}
+COEFFS_BOUNDS = {
+    'Reaction_1': {},
+    'Reaction_2': {'fraser': {'a_bottom_constraint': -4, 'a_top_constraint': -0.01},
+                   'ads': {'s1_bottom_constraint': 0, 's1_top_constraint': 10,
+                           's2_bottom_constraint': 1, 's2_top_constraint': 5}},
+    'Reaction_3': {'fraser': {'a_bottom_constraint': -2, 'a_top_constraint': -0.1}},
+}
+
+
+def test_options_to_dict_accepts_table_and_dict():
+    table = pd.DataFrame({name: [value] for name, value in DEFAULT_OPTIONS.items()})
+    assert options_to_dict(table) == DEFAULT_OPTIONS
+    options = options_to_dict(DEFAULT_OPTIONS)
+    assert options == DEFAULT_OPTIONS and options is not DEFAULT_OPTIONS
+
+
+def test_shape_bounds_and_split_use_the_same_order():
+    assert extract_shape_bounds(SELECTED, COEFFS_BOUNDS) == [(-4, -0.01), (0, 10), (1, 5), (-2, -0.1)]
+    coeff_a, s1, s2 = split_shape_coefficients(SELECTED, [-1.0, 2.0, 3.0, -0.5], [0, 0, 0], [1, 1, 1], [1, 1, 1])
+    assert coeff_a == [0, -1.0, -0.5]
+    assert s1 == [1, 2.0, 1]
+    assert s2 == [1, 3.0, 1]
+
+
+def test_problem_fits_synthetic_gaussians():
+    x = np.linspace(100, 400, 301)
+    true_params = [1.0, 200, 15, 0.6, 280, 20]
+    y = MathOperations.peaks(x, ('gauss', 'gauss'), [0, 0], [1, 1], [1, 1], *true_params)
+
+    initial = initial_peaks_from_curve(x, y, 2)
+    np.testing.assert_allclose(initial[1::3], [200, 280], atol=1)
+    bounds = ([0.1, 180, 5, 0.1, 260, 5], [2, 220, 40, 2, 300, 40])
+    problem = DeconvolutionProblem(x, y, initial, bounds, {'Reaction_1': ['gauss'], 'Reaction_2': ['gauss']}, 2000)
+    best = problem.solve([], DEFAULT_OPTIONS)
+
+    assert problem.nfev == 1
+    assert best['combination'] == ('gauss', 'gauss')
+    assert best['rmse'] < 1e-4
+    np.testing.assert_allclose(best['popt'], true_params, rtol=1e-3)
+    assert best['metrics']['r2'] > 0.9999
+
+
+def test_problem_minimises_rank_by_with_outer_optimizer():
+    x = np.linspace(100, 400, 151)
+    y = MathOperations.peaks(x, ('fraser',), [-0.5], [1], [1], 1.0, 250, 20)
+    bounds = ([0.5, 230, 10], [1.5, 270, 30])
+    problem = DeconvolutionProblem(x, y, [1.0, 250, 20], bounds, {'Reaction_1': ['fraser']}, 2000)
+    options = {**DEFAULT_OPTIONS, 'popsize': 3, 'maxiter': 2, 'rank_by': 'bic'}
+    best = problem.solve([(-1.0, -0.1)], options, seed=0)
+
+    assert problem.nfev > 1
+    assert best['score'] == best['metrics']['bic']
+    assert -1.0 <= best['coeff_a'][0] <= -0.1
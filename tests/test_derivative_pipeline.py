@@ -0,0 +1,43 @@
+import numpy as np
+from scipy import signal
+
+from src.derivative_pipeline import DerivativePipeline, rate_columns
+
+
+def curves():
+    x = np.linspace(30, 600, 400)
+    return x, {'rate_3': 100 - 0.05 * x, 'rate_5': 100 - 0.0001 * x ** 2}
+
+
+def test_rate_columns_skip_derivatives():
+    assert rate_columns(['temperature', 'rate_3', 'rate_3_diff', 'rate_10.5']) == ['rate_3', 'rate_10.5']
+
+
+def test_matches_single_column_savgol():
+    x, y_columns = curves()
+    result = DerivativePipeline().differentiate('file', 'temperature', x, y_columns, 11, 3, 'nearest')
+    for column, values in y_columns.items():
+        expected = signal.savgol_filter(-np.gradient(values, x), 11, 3, mode='nearest')
+        np.testing.assert_allclose(result[column], expected)
+
+
+def test_edited_values_are_recomputed():
+    x, y_columns = curves()
+    pipeline = DerivativePipeline()
+    before = pipeline.differentiate('file', 'temperature', x, y_columns, 11, 3, 'nearest')['rate_3']
+    # Правка ячейки таблицы меняет значения при тех же именах файла и столбцов
+    y_columns['rate_3'] = y_columns['rate_3'].copy()
+    y_columns['rate_3'][200] += 5
+    after = pipeline.differentiate('file', 'temperature', x, y_columns, 11, 3, 'nearest')['rate_3']
+    assert not np.allclose(before, after)
+    expected = signal.savgol_filter(-np.gradient(y_columns['rate_3'], x), 11, 3, mode='nearest')
+    np.testing.assert_allclose(after, expected)
+
+
+def test_smoothing_change_reuses_gradient():
+    x, y_columns = curves()
+    pipeline = DerivativePipeline()
+    pipeline.differentiate('file', 'temperature', x, y_columns, 11, 3, 'nearest')
+    gradient = pipeline.gradients[('file', 'temperature', 'rate_3')][1]
+    pipeline.differentiate('file', 'temperature', x, y_columns, 21, 2, 'nearest')
+    assert pipeline.gradients[('file', 'temperature', 'rate_3')][1] is gradient
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from src.early_stopping import EarlyStopping
+
+
+def test_target_rmse_stops():
+    stopping = EarlyStopping(target_rmse=0.1)
+    stopping.update(0.5)
+    assert stopping.check() is None
+    stopping.update(0.05)
+    assert 'RMSE' in stopping.check()
+
+
+def test_target_r2_uses_variance_of_curve():
+    stopping = EarlyStopping(target_r2=0.99, y_variance=1.0)
+    stopping.update(0.2)  # R2 = 0.96
+    assert stopping.check() is None
+    stopping.update(0.05)  # R2 = 0.9975
+    assert 'R2' in stopping.check()
+
+
+def test_patience_counts_generations_without_improvement():
+    stopping = EarlyStopping(patience=2, min_rel_improvement=0.01)
+    stopping.update(1.0)
+    assert stopping.check() is None
+    stopping.update(0.999)
+    assert stopping.check() is None
+    assert stopping.check() is not None
+    assert stopping.stale_generations == 2
+
+
+def test_population_spread_from_convergence():
+    stopping = EarlyStopping(spread_tol=1e-3, de_tol=0.01)
+    assert stopping.check(convergence=1.0) is None  # разброс 1e-2
+    assert stopping.check(convergence=100.0) is not None  # разброс 1e-4
+
+
+def test_zero_thresholds_never_stop():
+    options = pd.DataFrame({'target_rmse': [0.0], 'target_r2': [0.0], 'patience': [0], 'tol': [0.1]})
+    stopping = EarlyStopping.from_options(options, np.arange(10.0))
+    stopping.update(0.0)
+    assert all(stopping.check(convergence=1e9) is None for _ in range(5))
+
+
+def test_spread_rule_needs_de_tol():
+    stopping = EarlyStopping(spread_tol=1e-3, de_tol=0.0)
+    assert stopping.check(convergence=1e9) is None
+
+
+def test_stop_is_not_followed_by_polish():
+    from src.deconvolution import run_outer_optimizer, DEFAULT_OPTIONS
+
+    calls = []
+
+    def objective(x):
+        calls.append(x)
+        return float(np.sum(x ** 2))
+
+    options = {**DEFAULT_OPTIONS, 'popsize': 4, 'maxiter': 50}
+    run_outer_optimizer(objective, [(-1, 1), (-1, 1)], options, callback=lambda x, convergence=None: True, seed=0)
+    # Начальная популяция и одно поколение, без вызовов доводки L-BFGS-B
+    assert len(calls) == 2 * 4 * 2
@@ -0,0 +1,30 @@
+import numpy as np
+
+from src.global_fit import GlobalFit
+from src.math_operations import MathOperations
+
+
+def test_shared_fit_recovers_shifted_peaks():
+    x = np.linspace(100, 400, 301)
+    params = {'rate_3': [1.0, 200, 15, 0.5, 260, 20], 'rate_10': [1.0, 220, 15, 0.5, 280, 20]}
+    curves = {column: (x, MathOperations.peaks(x, ('gauss', 'gauss'), [0, 0], [1, 1], [1, 1], *values))
+              for column, values in params.items()}
+    bounds = ([0.1, 180, 5, 0.1, 240, 5], [2, 220, 30, 2, 280, 40])
+    fit = GlobalFit(curves, 'rate_3', [0.9, 195, 12, 0.6, 255, 18], bounds,
+                    {'Reaction_1': ['gauss'], 'Reaction_2': ['gauss']}, {}, [0, 0], [1, 1], [1, 1])
+    results = fit.run()
+    assert set(results) == {'rate_3', 'rate_10'}
+    for column, values in params.items():
+        assert results[column]['rmse'] < 1e-3
+        np.testing.assert_allclose(results[column]['popt'][[1, 4]], [values[1], values[4]], atol=0.5)
+
+
+def test_jacobian_sparsity_is_block_diagonal():
+    x = np.linspace(0, 1, 5)
+    curves = {'rate_3': (x, x), 'rate_5': (x, x)}
+    fit = GlobalFit(curves, 'rate_3', [1, 0.5, 0.1], ([0, 0, 0.01], [2, 1, 1]), {'Reaction_1': ['gauss']}, {},
+                    [0], [1], [1])
+    sparsity = fit.jac_sparsity(n_shape=1, n_peak_params=3).toarray()
+    assert sparsity.shape == (10, 7)
+    assert sparsity[:5, :4].all() and not sparsity[:5, 4:].any()
+    assert sparsity[5:, 0].all() and sparsity[5:, 4:].all() and not sparsity[5:, 1:4].any()
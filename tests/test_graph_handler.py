@@ -0,0 +1,125 @@
+import os
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.figure import Figure
+from PyQt5.QtWidgets import QApplication
+
+from src.sub_handlers import graph_handler
+from src.sub_handlers.graph_handler import GraphHandler
+
+
+class ComboBox:
+    def __init__(self, text):
+        self.text = text
+
+    def currentText(self):
+        return self.text
+
+
+class Canvas:
+    def __init__(self):
+        self.draws = 0
+
+    def draw_idle(self):
+        self.draws += 1
+
+
+class TableManager:
+    def __init__(self, df, gauss):
+        self.data = {'file': df, 'gauss': gauss}
+        self.version = 0
+
+    def data_version(self, table_name):
+        return self.version
+
+    def get_column_values(self, table_name, column):
+        return self.data[table_name][column]
+
+
+class MainApp:
+    def __init__(self, table_manager):
+        self.ui_initializer = type('UI', (), {})()
+        self.ui_initializer.combo_box_x = ComboBox('temperature')
+        self.ui_initializer.combo_box_y = ComboBox('rate_3_diff')
+        self.ui_initializer.figure1 = Figure()
+        self.ui_initializer.canvas1 = Canvas()
+        self.math_operations = None
+        self.viewer = type('Viewer', (), {'file_name': 'file'})()
+        self.table_manager = table_manager
+
+
+def gauss_table(heights):
+    return pd.DataFrame({'reaction': [f'Reaction_{i + 1}' for i in range(len(heights))], 'height': heights,
+                         'center': [200.0 + 50 * i for i in range(len(heights))], 'width': [20.0] * len(heights),
+                         'type': ['gauss'] * len(heights), 'coeff_a': [-0.01] * len(heights),
+                         'coeff_s1': [1.0] * len(heights), 'coeff_s2': [1.0] * len(heights)})
+
+
+@pytest.fixture
+def handler():
+    app = QApplication.instance() or QApplication([])
+    x = np.linspace(100, 400, 301)
+    df = pd.DataFrame({'temperature': x, 'rate_3_diff': np.exp(-(x - 220) ** 2 / 800)})
+    handler = GraphHandler(MainApp(TableManager(df, gauss_table([1.0, 0.5]))))
+    yield handler
+    handler.redraw_timer.stop()
+    handler.rebuild_timer.stop()
+    app.processEvents()
+
+
+def process_events_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_repeated_updates_reuse_line_objects(handler):
+    handler.rebuild_gaussians()
+    axes, data_line = handler.axes, handler.data_line
+    component_lines, cumulative_line = list(handler.component_lines), handler.cumulative_line
+    assert len(component_lines) == 2
+
+    handler.table_manager.data['gauss'] = gauss_table([2.0, 0.5])
+    handler.rebuild_gaussians()
+    handler.rebuild_gaussians()
+
+    assert handler.axes is axes and handler.data_line is data_line
+    assert handler.component_lines == component_lines and handler.cumulative_line is cumulative_line
+    assert len(axes.lines) == 4
+    np.testing.assert_allclose(component_lines[0].get_ydata().max(), 2.0, rtol=1e-3)
+
+    # Базовый график убирает кривые реакций, но оставляет оси и линию данных
+    handler.plot_graph()
+    assert handler.axes is axes and handler.data_line is data_line
+    assert list(axes.lines) == [data_line]
+    # Перерисовка откладывается до ближайшего кадра и объединяет все обновления
+    assert process_events_until(lambda: handler.ui_initializer.canvas1.draws > 0)
+    assert handler.ui_initializer.canvas1.draws == 1
+
+
+def test_debounce_coalesces_rapid_edits(handler, monkeypatch):
+    handler.rebuild_gaussians()
+    calls = []
+    compute = graph_handler.compute_component_curves
+
+    def counting_compute(x, components):
+        calls.append([i for i, _ in components])
+        return compute(x, components)
+
+    monkeypatch.setattr(graph_handler, 'compute_component_curves', counting_compute)
+    for height in [1.5, 2.0, 2.5, 3.0]:
+        handler.table_manager.data['gauss'] = gauss_table([height, 0.5])
+        handler.schedule_rebuild()
+
+    assert process_events_until(lambda: calls and not handler.curves_thread.isRunning())
+    process_events_until(lambda: False, timeout=graph_handler.REBUILD_DEBOUNCE_MS / 1000 * 2)
+    # Один пересчет и только для измененной строки
+    assert calls == [[0]]
+    np.testing.assert_allclose(handler.component_lines[0].get_ydata().max(), 3.0, rtol=1e-3)
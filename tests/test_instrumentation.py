@@ -0,0 +1,46 @@
+import threading
+
+from src.instrumentation import Instrumentation
+
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+
+def test_profile_merges_worker_threads():
+    instrumentation = Instrumentation()
+    instrumentation.enable_profiling()
+
+    def worker():
+        with instrumentation.profile():
+            busy_work()
+
+    with instrumentation.profile():
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    stats = instrumentation.collect_profile()
+    calls = [value[1] for (_, _, name), value in stats.stats.items() if name == 'busy_work']
+    assert calls == [3]
+    assert instrumentation.collect_profile() is None
+
+
+def test_profile_is_noop_when_disabled():
+    instrumentation = Instrumentation()
+    with instrumentation.profile():
+        busy_work()
+    assert instrumentation.collect_profile() is None
+
+
+def test_timers_accumulate():
+    instrumentation = Instrumentation()
+    for _ in range(2):
+        with instrumentation.timer('stage'):
+            pass
+    instrumentation.count('events', 3)
+    assert instrumentation.timers['stage'][0] == 2
+    assert instrumentation.counters['events'] == 3
+    assert 'stage' in instrumentation.summary()
@@ -0,0 +1,85 @@
+import os
+import stat
+import threading
+
+import numpy as np
+import pytest
+from multiprocessing.connection import AuthenticationError
+
+from src.job_server import JobServer, JobClient, get_authkey, generate_authkey, parse_address, DONE, CANCELLED
+
+CONFIG = {'options': {'maxiter': 1, 'popsize': 2, 'maxfev': 200}, 'n_peaks': 1, 'peak_types': ['gauss'], 'seed': 1}
+
+
+def curve():
+    # Интегральная кривая с одним пиком производной
+    x = np.linspace(100, 500, 300)
+    return x, np.cumsum(np.exp(-(x - 300) ** 2 / 800))
+
+
+def test_parse_address():
+    assert parse_address('localhost:6060') == ('localhost', 6060)
+    assert parse_address(':7000') == ('localhost', 7000)
+    assert parse_address('/tmp/jobs.sock') == '/tmp/jobs.sock'
+
+
+def test_authkey_is_required(monkeypatch):
+    monkeypatch.delenv('DECONVOLUTION_JOB_KEY', raising=False)
+    monkeypatch.delenv('DECONVOLUTION_JOB_KEY_FILE', raising=False)
+    with pytest.raises(ValueError):
+        get_authkey()
+    monkeypatch.setenv('DECONVOLUTION_JOB_KEY', 'secret')
+    assert get_authkey() == b'secret'
+
+
+def test_generated_key_file(tmp_path):
+    path = generate_authkey(tmp_path / 'key')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert len(get_authkey(path=path)) == 64
+    with pytest.raises(FileExistsError):
+        generate_authkey(path)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = JobServer(str(tmp_path / 'jobs.sock'), authkey='secret', workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.stop()
+    thread.join(timeout=60)
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='сокет Unix')
+def test_socket_is_private(server):
+    assert stat.S_IMODE(os.stat(server.address).st_mode) == 0o600
+
+
+def test_wrong_key_is_rejected(server):
+    with pytest.raises(AuthenticationError):
+        JobClient(server.address, 'wrong')
+
+
+def test_priority_and_fair_share(server):
+    x, y = curve()
+    with JobClient(server.address, 'secret') as alice, JobClient(server.address, 'secret') as bob:
+        first = alice.submit(x, y, 'rate_3', CONFIG, user='alice')
+        # Остальные задания ставятся в очередь, когда первое уже занимает единственный процесс
+        assert alice.events(first, timeout=60)[0][0]['stage'] == 'running'
+        alice_second = alice.submit(x, y, 'rate_3', CONFIG, user='alice')
+        cancelled = alice.submit(x, y, 'rate_3', CONFIG, user='alice')
+        bob_first = bob.submit(x, y, 'rate_3', CONFIG, user='bob')
+        urgent = bob.submit(x, y, 'rate_3', CONFIG, user='bob', priority=5)
+        assert alice.cancel(cancelled)
+
+        events = [event['stage'] for event in bob.subscribe(urgent)]
+        assert events[0] == 'running' and events[-1] == DONE
+        results = {job_id: alice.result(job_id, timeout=300) for job_id in (first, alice_second, bob_first, urgent)}
+        assert alice.status(cancelled)['state'] == CANCELLED
+
+    assert all(result['state'] == DONE for result in results.values())
+    started = sorted(results, key=lambda job_id: results[job_id]['started'])
+    # Первое задание уже выполнялось; затем приоритет, затем пользователь, еще не получавший время
+    assert started == [first, urgent, bob_first, alice_second]
+    summary = results[urgent]['result']['summary']
+    assert summary['status'] == 'ok' and summary['n_peaks'] == 1
@@ -0,0 +1,30 @@
+import numpy as np
+
+from src.lod import MinMaxPyramid
+
+
+def test_small_ranges_return_raw_points():
+    x = np.arange(100.0)
+    y = np.sin(x)
+    qx, qy = MinMaxPyramid(x, y).query(10, 20, 50)
+    np.testing.assert_array_equal(qx, x[9:22])
+    np.testing.assert_array_equal(qy, y[9:22])
+
+
+def test_decimation_keeps_extremes_and_order():
+    rng = np.random.default_rng(0)
+    x = np.arange(100000.0)
+    y = rng.normal(size=x.size)
+    y[54321] = 50.0
+    y[12345] = -50.0
+    qx, qy = MinMaxPyramid(x, y).query(x[0], x[-1], 200)
+    assert qx.size <= 4 * 200 + 2
+    assert np.all(np.diff(qx) > 0)
+    assert qy.max() == 50.0 and qy.min() == -50.0
+
+
+def test_non_monotonic_x_is_not_decimated():
+    x = np.array([0.0, 2.0, 1.0, 3.0])
+    pyramid = MinMaxPyramid(x, x)
+    assert not pyramid.monotonic
+    assert pyramid.query(0, 3, 1)[0] is pyramid.x
@@ -0,0 +1,27 @@
+import logging
+import queue
+
+import pandas as pd
+
+from src.logger_config import DeferredQueueHandler
+
+
+def queue_record(msg, args):
+    records = queue.SimpleQueue()
+    record = logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+    DeferredQueueHandler(records).handle(record)
+    return records.get_nowait()
+
+
+def test_scalar_args_are_queued_unformatted():
+    queued = queue_record('generation %s, rmse %.3f', (3, 0.5))
+    assert queued.args == (3, 0.5)
+    assert queued.getMessage() == 'generation 3, rmse 0.500'
+
+
+def test_mutable_args_are_formatted_before_queueing():
+    df = pd.DataFrame({'height': [1.0]})
+    queued = queue_record('gauss:\n%s', (df,))
+    df.at[0, 'height'] = 2.0
+    assert queued.args is None
+    assert '1.0' in queued.getMessage() and '2.0' not in queued.getMessage()
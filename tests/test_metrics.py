@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from src.metrics import residual_metrics, rank, best_index, combination_params, objective_value
+
+
+def test_residual_metrics_match_definitions():
+    rng = np.random.default_rng(0)
+    y_values = rng.normal(size=50)
+    residuals = rng.normal(scale=0.1, size=(3, 50))
+    metrics = residual_metrics(residuals, y_values, [3, 6, 9])
+    for i, row in enumerate(residuals):
+        rss = np.sum(row ** 2)
+        assert metrics['rmse'][i] == pytest.approx(np.sqrt(rss / 50))
+        assert metrics['r2'][i] == pytest.approx(1 - rss / np.sum((y_values - y_values.mean()) ** 2))
+        assert metrics['aic'][i] == pytest.approx(50 * np.log(rss / 50) + 2 * 3 * (i + 1))
+        assert metrics['bic'][i] == pytest.approx(50 * np.log(rss / 50) + 3 * (i + 1) * np.log(50))
+        assert metrics['max_residual'][i] == pytest.approx(np.max(np.abs(row)))
+
+
+def test_rank_orders_r2_descending_and_nan_last():
+    metrics = {'rmse': np.array([0.3, 0.1, 0.2]), 'r2': np.array([0.5, np.nan, 0.9])}
+    assert rank(metrics, 'rmse').tolist() == [1, 2, 0]
+    assert rank(metrics, 'r2').tolist() == [2, 0, 1]
+    assert best_index(metrics, 'r2') == 2
+    with pytest.raises(ValueError):
+        rank(metrics, 'mae')
+
+
+def test_combination_params_count_shape_coefficients():
+    assert combination_params(('gauss', 'fraser', 'ads')) == 3 + 4 + 5
+
+
+def test_objective_value_is_minimised():
+    assert objective_value(0.2, 'rmse') == 0.2
+    assert objective_value(0.9, 'r2') < objective_value(0.5, 'r2')
+    assert objective_value(np.nan, 'r2') == np.inf
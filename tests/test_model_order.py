@@ -0,0 +1,31 @@
+import numpy as np
+
+from src.metrics import residual_metrics
+from src.model_order import ModelOrderSearch
+
+
+def two_peaks():
+    x = np.linspace(100, 500, 400)
+    y = 1.0 * np.exp(-(x - 250) ** 2 / (2 * 20 ** 2)) + 0.6 * np.exp(-(x - 350) ** 2 / (2 * 25 ** 2))
+    noise = np.random.default_rng(0).normal(0, 0.005, x.size)
+    return x, y + noise
+
+
+def test_two_peaks_are_found():
+    x, y = two_peaks()
+    initial = [{'height': 1.0, 'center': 255, 'width': 22}]
+    search = ModelOrderSearch(x, y, initial, 1, 3, ['gauss', 'fraser'], 2000, -0.01, 1, 1, criterion='bic', delta=10)
+    candidates = search.run()
+    assert [candidate['n_peaks'] for candidate in candidates] == [1, 2, 3]
+    assert search.best['n_peaks'] == 2
+
+
+def test_criteria_count_only_fitted_parameters():
+    # Коэффициенты формы fraser фиксированы, поэтому штраф одинаков для gauss и fraser
+    x, y = two_peaks()
+    search = ModelOrderSearch(x, y, [{'height': 1.0, 'center': 255, 'width': 22}], 2, 2, ['gauss', 'fraser'],
+                              2000, -0.01, 1, 1)
+    candidate = search.run()[0]
+    expected = residual_metrics(candidate['residuals'], y, 3 * candidate['n_peaks'])
+    assert candidate['bic'] == expected['bic'][0]
+    assert candidate['aic'] == expected['aic'][0]
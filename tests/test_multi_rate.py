@@ -0,0 +1,45 @@
+import numpy as np
+
+from src import multi_rate
+from src.deconvolution import DEFAULT_OPTIONS
+from src.math_operations import MathOperations
+from src.multi_rate import MultiRateDeconvolution, shift_peaks
+
+SHAPE = ([0, 0], [1, 1], [1, 1])
+
+
+def test_shift_peaks_moves_centers_and_scales_heights():
+    params, (lower, upper) = shift_peaks([1.0, 200, 10], ([0.5, 190, 5], [2.0, 210, 20]), 15, 2.0)
+    assert params == [2.0, 215, 10]
+    assert lower == [1.0, 205, 5] and upper == [4.0, 225, 20]
+
+
+def test_reference_is_fitted_first_and_warm_starts_other_rates(monkeypatch):
+    x = np.linspace(100, 400, 301)
+    true_params = {'rate_3': [1.0, 200, 15, 0.5, 260, 20], 'rate_10': [1.2, 220, 15, 0.6, 280, 20]}
+    curves = {column: (x, MathOperations.peaks(x, ('gauss', 'gauss'), *SHAPE, *params))
+              for column, params in true_params.items()}
+    calls = []
+    original_shift_peaks = multi_rate.shift_peaks
+
+    def recording_shift_peaks(peaks_params, peaks_bounds, shift, scale):
+        calls.append((list(peaks_params), shift, scale))
+        return original_shift_peaks(peaks_params, peaks_bounds, shift, scale)
+
+    monkeypatch.setattr(multi_rate, 'shift_peaks', recording_shift_peaks)
+    order = []
+    engine = MultiRateDeconvolution(
+        curves, 'rate_3', [0.9, 195, 12, 0.6, 255, 18], ([0.1, 180, 5, 0.1, 240, 5], [2, 220, 30, 2, 280, 40]),
+        {'Reaction_1': ['gauss'], 'Reaction_2': ['gauss']}, [], DEFAULT_OPTIONS)
+    results = engine.run(progress=lambda column, result: order.append(column))
+
+    assert order == ['rate_3', 'rate_10']
+    # Вторая скорость стартует с решения опорной, сдвинутого на наблюдаемый сдвиг максимума
+    assert len(calls) == 1
+    start_params, shift, scale = calls[0]
+    np.testing.assert_allclose(start_params, results['rate_3']['popt'])
+    assert shift == results['rate_10']['shift'] == 20.0
+    assert scale > 1
+    for column, params in true_params.items():
+        assert results[column]['rmse'] < 1e-3
+        np.testing.assert_allclose(results[column]['popt'][[1, 4]], params[1::3][:2], atol=0.5)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from src.pandas_model import PandasModel
+
+
+def changed_columns(model, action):
+    ranges = []
+    model.dataChanged.connect(lambda first, last: ranges.append((first.column(), last.column())))
+    action()
+    return ranges
+
+
+def test_added_column_does_not_mark_old_columns_changed():
+    df = pd.DataFrame({'a': np.arange(5.0), 'b': np.arange(5.0) * 2})
+    model = PandasModel(df)
+
+    def add_column():
+        df['c'] = np.ones(5)
+        model.set_dataframe(df)
+
+    assert changed_columns(model, add_column) == []
+    assert model.columnCount() == 3
+
+
+def test_replaced_values_are_reported():
+    df = pd.DataFrame({'a': np.arange(5.0), 'b': np.arange(5.0) * 2, 'c': np.zeros(5)})
+    model = PandasModel(df)
+    updated = df.copy()
+    updated.loc[2, 'b'] = -1.0
+    assert changed_columns(model, lambda: model.set_dataframe(updated)) == [(1, 1)]
+    assert model.data(model.index(2, 1)) == '-1.0'
+
+
+def test_identical_copy_emits_nothing():
+    df = pd.DataFrame({'a': np.arange(5.0), 'b': list('abcde')})
+    model = PandasModel(df)
+    assert changed_columns(model, lambda: model.set_dataframe(df.copy())) == []
+
+
+def test_in_place_edit_of_same_dataframe_is_reported():
+    df = pd.DataFrame({'a': np.arange(5.0), 'b': np.arange(5.0) * 2, 'c': np.zeros(5)})
+    model = PandasModel(df)
+
+    def edit_in_place():
+        df.at[3, 'c'] = 7.0
+        model.set_dataframe(df)
+
+    assert changed_columns(model, edit_in_place) == [(2, 2)]
+    assert model.data(model.index(3, 2)) == '7.0'
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from src.project_file import save_project, load_project
+
+
+def make_data():
+    x = np.linspace(30, 600, 500)
+    return pd.DataFrame({'temperature': x, 'rate_3': np.exp(-(x - 300) ** 2 / 2000), 'label': ['a'] * len(x)})
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'session.dcproj'
+    data = make_data()
+    gauss = pd.DataFrame({'reaction': ['Reaction_1'], 'height': [1.0], 'center': [300.0], 'width': [30.0]})
+    save_project(path, 'file.csv', data, {'gauss': gauss}, {'rmse': 0.1})
+
+    project = load_project(path)
+    assert project['file_name'] == 'file.csv'
+    assert project['optimizer_state'] == {'rmse': 0.1}
+    pd.testing.assert_frame_equal(project['tables']['gauss'], gauss)
+    np.testing.assert_array_equal(project['data']['rate_3'], data['rate_3'])
+    assert project['data']['label'].tolist() == data['label'].tolist()
+
+
+def test_resave_opened_project_to_same_path(tmp_path):
+    # Столбцы открытого проекта отображены в память из того же файла
+    path = tmp_path / 'session.dcproj'
+    data = make_data()
+    save_project(path, 'file.csv', data, {})
+    project = load_project(path)
+
+    project['data']['rate_3'] = project['data']['rate_3'] * 2
+    save_project(path, project['file_name'], project['data'], project['tables'])
+
+    reloaded = load_project(path)
+    np.testing.assert_allclose(reloaded['data']['rate_3'], data['rate_3'] * 2)
+    np.testing.assert_array_equal(reloaded['data']['temperature'], data['temperature'])
+    assert [p.name for p in tmp_path.iterdir()] == ['session.dcproj']
+
+
+def test_resave_opened_project_without_maps(tmp_path, monkeypatch):
+    # Режим Windows: файл открытого проекта не должен оставаться отображенным в память
+    monkeypatch.setattr('src.project_file.MAP_COLUMNS', False)
+    path = tmp_path / 'session.dcproj'
+    data = make_data()
+    save_project(path, 'file.csv', data, {})
+    project = load_project(path)
+    assert not any(isinstance(project['data'][name].values.base, np.memmap) or
+                   isinstance(project['data'][name].values, np.memmap) for name in ['temperature', 'rate_3'])
+
+    save_project(path, project['file_name'], project['data'], project['tables'])
+    np.testing.assert_array_equal(load_project(path)['data']['rate_3'], data['rate_3'])
+
+
+def test_empty_table_keeps_column_types(tmp_path):
+    path = tmp_path / 'session.dcproj'
+    gauss = pd.DataFrame({'reaction': pd.Series(dtype=object), 'height': pd.Series(dtype=float),
+                          'center': pd.Series(dtype=float)})
+    save_project(path, 'file.csv', make_data(), {'gauss': gauss})
+    pd.testing.assert_frame_equal(load_project(path)['tables']['gauss'], gauss)
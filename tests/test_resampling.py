@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.resampling import resample_uniform, interpolate_rows, temperature_column_for, is_uniform
+
+
+def test_interpolate_rows_matches_np_interp():
+    x_rows = np.array([[0.0, 1.0, 3.0, 6.0], [0.0, 2.0, 4.0, 6.0]])
+    y_rows = np.sin(x_rows)
+    grid = np.linspace(0, 6, 13)
+    result = interpolate_rows(grid, x_rows, y_rows)
+    for row, x_row, y_row in zip(result, x_rows, y_rows):
+        np.testing.assert_allclose(row, np.interp(grid, x_row, y_row))
+
+
+def test_temperature_column_for():
+    assert temperature_column_for('rate_3', ['temperature_3', 'rate_3']) == 'temperature_3'
+    assert temperature_column_for('rate_5', ['temperature', 'rate_5']) == 'temperature'
+    assert temperature_column_for('mass', ['temperature', 'mass', 'temperature_']) == 'temperature'
+
+
+def test_resample_uneven_grid_lengths():
+    # Короткие столбцы дополняются NaN, как при чтении реального файла с разными сетками
+    x_3 = np.linspace(30, 600, 400)
+    x_10 = np.linspace(40, 590, 250)
+    df = pd.concat([
+        pd.DataFrame({'temperature_3': x_3, 'rate_3': x_3 / 100}),
+        pd.DataFrame({'temperature_10': x_10, 'rate_10': x_10 / 50}),
+    ], axis=1)
+    assert df['rate_10'].isna().any()
+
+    resampled = resample_uniform(df)
+    grid = resampled['temperature'].to_numpy()
+    assert np.isfinite(resampled.to_numpy()).all()
+    assert grid[0] == pytest.approx(40) and grid[-1] == pytest.approx(590)
+    assert is_uniform(grid)
+    np.testing.assert_allclose(resampled['rate_3'], grid / 100)
+    np.testing.assert_allclose(resampled['rate_10'], grid / 50)
+
+
+def test_resample_descending_grid_with_fixed_points():
+    x = np.linspace(600, 30, 300)
+    df = pd.DataFrame({'temperature': x, 'rate_3': x ** 2})
+    resampled = resample_uniform(df, n_points=50)
+    assert len(resampled) == 50
+    np.testing.assert_allclose(resampled['rate_3'], resampled['temperature'] ** 2, rtol=1e-3)
+
+
+def test_resample_without_rate_columns_returns_input():
+    df = pd.DataFrame({'temperature': [1.0, 2.0], 'mass': [3.0, 4.0]})
+    assert resample_uniform(df) is df
+
+
+def test_resample_without_temperature_column_is_a_clear_error():
+    df = pd.DataFrame({'time': [1.0, 2.0], 'rate_3': [3.0, 4.0]})
+    with pytest.raises(ValueError, match='temperature'):
+        resample_uniform(df)
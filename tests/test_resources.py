@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from src.resources import ResourceGovernor, parse_cpu_list, set_affinity
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list('0-3,8, 2') == [0, 1, 2, 3, 8]
+    assert parse_cpu_list('') == []
+
+
+def test_slots_limit_concurrency():
+    governor = ResourceGovernor()
+    governor.configure(workers=2, blas_threads=0)
+    release = threading.Event()
+
+    def fit():
+        with governor.slot():
+            release.wait(5)
+
+    threads = [threading.Thread(target=fit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert governor.slots_used == 4
+    assert governor.peak_active <= 2
+    assert governor.pool_size(1) == 1 and governor.pool_size() == 2
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='маска потоков читается из /proc')
+def test_affinity_applies_to_existing_threads():
+    cpus = sorted(os.sched_getaffinity(0))
+    started, done = threading.Event(), threading.Event()
+    thread_ids = []
+
+    def worker():
+        thread_ids.append(threading.get_native_id())
+        started.set()
+        done.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    started.wait(5)
+    try:
+        set_affinity(cpus[:1])
+        assert os.sched_getaffinity(thread_ids[0]) == set(cpus[:1])
+    finally:
+        set_affinity(cpus)
+        done.set()
+        thread.join()
+
+
+def test_configure_is_refused_while_slots_are_busy():
+    governor = ResourceGovernor()
+    governor.configure(workers=2, blas_threads=0)
+    with governor.slot():
+        assert not governor.configure(workers=5, blas_threads=0)
+        assert governor.workers == 2
+    assert governor.configure(workers=5, blas_threads=0)
+    assert governor.workers == 5
+
+
+def test_blas_limits_are_restored_before_new_ones():
+    threadpoolctl = pytest.importorskip('threadpoolctl')
+    original = [info['num_threads'] for info in threadpoolctl.threadpool_info() if info['user_api'] == 'blas']
+    governor = ResourceGovernor()
+    governor.configure(workers=1, blas_threads=1)
+    governor.configure(workers=1, blas_threads=0)
+    assert [info['num_threads'] for info in threadpoolctl.threadpool_info() if info['user_api'] == 'blas'] == original
+
+
+def test_combinations_run_in_a_pool_of_governor_size(monkeypatch):
+    import numpy as np
+    from src import math_operations
+    from src.math_operations import MathOperations
+
+    governor = math_operations.governor
+    governor.configure(workers=2, blas_threads=0)
+    thread_ids = set()
+    fit_combination = MathOperations.fit_combination
+
+    def recording_fit(*args):
+        thread_ids.add(threading.get_ident())
+        return fit_combination(*args)
+
+    monkeypatch.setattr(MathOperations, 'fit_combination', staticmethod(recording_fit))
+    x = np.linspace(0, 10, 50)
+    y = np.exp(-(x - 5) ** 2)
+    combinations = [('gauss',)] * 6
+    popt, combination, rmse = MathOperations.compute_best_peaks(
+        x, y, [1, 5, 1], 1000, [-0.01], [1], [1], combinations, ([0.5, 4, 0.5], [2, 6, 2]))
+    assert len(thread_ids) <= 2
+    assert rmse < 1e-3
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.startup import plot_style_files, startup_report
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_python(code):
+    env = {**os.environ, 'QT_QPA_PLATFORM': 'offscreen'}
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_import_main_does_not_load_heavy_modules():
+    loaded = run_python(
+        "import sys, main\n"
+        "print(','.join(m for m in ('scipy', 'matplotlib.pyplot', 'scienceplots') if m in sys.modules))")
+    assert loaded == ''
+
+
+@pytest.mark.skipif(plot_style_files() is None, reason='scienceplots не установлен')
+def test_plot_style_applies_to_figure_without_pyplot():
+    output = run_python(
+        "import sys\n"
+        "import matplotlib\n"
+        "from src.startup import apply_plot_style\n"
+        "default = tuple(matplotlib.rcParams['figure.figsize'])\n"
+        "apply_plot_style()\n"
+        "from matplotlib.figure import Figure\n"
+        "print(tuple(Figure().get_size_inches()) != default, 'matplotlib.pyplot' in sys.modules, "
+        "'scienceplots' in sys.modules)")
+    assert output == 'True False False'
+
+
+def test_startup_report_splits_imports_and_window():
+    message = startup_report(0.0, 0.0)
+    assert message.startswith('Окно показано через') and 'импорт 0.00 с' in message
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.surrogate_optimizer import GaussianProcess, SurrogateOptimizer
+
+
+def test_finds_minimum_of_quadratic():
+    result = SurrogateOptimizer(lambda x: float(np.sum((x - 0.3) ** 2)), [(-1, 1), (-1, 1)],
+                                init_points=6, max_evals=25, seed=0).minimize()
+    assert result.success
+    assert result.nfev == 25
+    assert result.fun < 0.05
+
+
+def test_all_failed_evaluations_are_reported():
+    result = SurrogateOptimizer(lambda x: np.nan, [(0, 1)], init_points=3, max_evals=10, seed=0).minimize()
+    assert not result.success
+    assert result.fun == np.inf
+    assert result.nfev == 3
+
+
+def test_insufficient_evaluations_are_not_success():
+    calls = []
+
+    def objective(x):
+        calls.append(x)
+        return 1.0 if len(calls) == 1 else None
+
+    result = SurrogateOptimizer(objective, [(0, 1)], init_points=4, max_evals=10, seed=0).minimize()
+    assert not result.success
+    assert result.fun == 1.0
+
+
+def test_singular_kernel_falls_back_to_random_point(monkeypatch):
+    def fail(self, x, y):
+        raise np.linalg.LinAlgError('singular')
+
+    monkeypatch.setattr(GaussianProcess, 'fit', fail)
+    result = SurrogateOptimizer(lambda x: float(x[0]), [(0, 1)], init_points=3, max_evals=6, seed=0).minimize()
+    assert result.success
+    assert result.nfev == 6
+
+
+def test_gaussian_process_raises_when_no_jitter_helps(monkeypatch):
+    monkeypatch.setattr(GaussianProcess, 'kernel', staticmethod(lambda a, b, length_scale: -np.ones((len(a), len(b)))))
+    with pytest.raises(np.linalg.LinAlgError):
+        GaussianProcess().fit(np.array([[0.0], [1.0]]), np.array([0.0, 1.0]))
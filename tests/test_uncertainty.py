@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from src.math_operations import MathOperations
+from src.uncertainty import peak_areas, covariance_uncertainty, bootstrap_uncertainty, apply_uncertainty, \
+    UNCERTAINTY_COLUMNS
+
+X = np.linspace(100, 300, 201)
+POPT = [1.0, 180.0, 12.0, 0.6, 230.0, 15.0]
+BOUNDS = ([0.1, 150, 5, 0.1, 200, 5], [3, 210, 30, 3, 260, 30])
+SHAPE = ([0.0, 0.0], [1.0, 1.0], [1.0, 1.0])
+
+
+def noisy_curve(seed=0):
+    y = MathOperations.peaks(X, ('gauss', 'gauss'), *SHAPE, *POPT)
+    return y + np.random.default_rng(seed).normal(scale=0.01, size=X.size)
+
+
+def test_gaussian_area_is_analytic():
+    areas = peak_areas(X, ('gauss', 'gauss'), POPT, *SHAPE)
+    np.testing.assert_allclose(areas, [1.0 * 12 * np.sqrt(2 * np.pi), 0.6 * 15 * np.sqrt(2 * np.pi)], rtol=1e-4)
+
+
+def test_covariance_uncertainty_rows():
+    y = noisy_curve()
+    popt, pcov, _ = MathOperations.fit_combination(X, y, ('gauss', 'gauss'), POPT, 2000, BOUNDS, *SHAPE)
+    rows = covariance_uncertainty(X, ('gauss', 'gauss'), popt, pcov, *SHAPE, confidence=0.95)
+    assert len(rows) == 2
+    for row in rows:
+        assert set(row) == set(UNCERTAINTY_COLUMNS)
+        assert row['uncertainty'] == 'covariance'
+        assert 0 < row['center_se'] < 1
+        assert row['center_ci'] > row['center_se']
+
+
+def test_bootstrap_in_process_is_reproducible():
+    y = noisy_curve()
+    first = bootstrap_uncertainty(X, y, ('gauss', 'gauss'), POPT, BOUNDS, *SHAPE, 2000, n_samples=12, workers=1,
+                                  seed=3)
+    second = bootstrap_uncertainty(X, y, ('gauss', 'gauss'), POPT, BOUNDS, *SHAPE, 2000, n_samples=12, workers=1,
+                                   seed=3)
+    assert first[0]['uncertainty'] == 'bootstrap(12)'
+    assert first[1]['width_se'] == second[1]['width_se']
+
+
+def test_apply_uncertainty_fills_gauss_table():
+    gauss = pd.DataFrame({'reaction': ['Reaction_1', 'Reaction_2'], 'height': [1.0, 0.6]})
+    rows = [{column: 0.1 for column in UNCERTAINTY_COLUMNS} for _ in range(2)]
+    result = apply_uncertainty(gauss, rows)
+    assert all(column in result.columns for column in UNCERTAINTY_COLUMNS)